@@ -0,0 +1,41 @@
+"""session queue indexes
+
+Revision ID: 6c1e2f9a4b70
+Revises: 8095375c2374
+Create Date: 2026-10-17 10:15:12.481305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6c1e2f9a4b70"
+down_revision: Union[str, Sequence[str], None] = "8095375c2374"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_blocks_roadmap_id_order_index",
+        "blocks",
+        ["roadmap_id", "order_index"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_cards_block_id",
+        "cards",
+        ["block_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_cards_block_id", table_name="cards")
+    op.drop_index("ix_blocks_roadmap_id_order_index", table_name="blocks")
@@ -0,0 +1,61 @@
+"""card scheduling
+
+Revision ID: a3d95c07e21f
+Revises: 6c1e2f9a4b70
+Create Date: 2026-10-17 11:40:27.915630
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a3d95c07e21f"
+down_revision: Union[str, Sequence[str], None] = "6c1e2f9a4b70"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "cards",
+        sa.Column(
+            "due_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.add_column(
+        "cards",
+        sa.Column("interval_days", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "cards",
+        sa.Column("ease_factor", sa.Float(), server_default="2.5", nullable=False),
+    )
+    op.add_column(
+        "cards",
+        sa.Column("repetitions", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.create_index(
+        "ix_cards_user_id_due_at",
+        "cards",
+        ["user_id", "due_at"],
+        unique=False,
+    )
+    op.execute("ALTER TYPE session_mode ADD VALUE IF NOT EXISTS 'due'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # 'due' stays in session_mode: PostgreSQL cannot drop enum values
+    op.drop_index("ix_cards_user_id_due_at", table_name="cards")
+    op.drop_column("cards", "repetitions")
+    op.drop_column("cards", "ease_factor")
+    op.drop_column("cards", "interval_days")
+    op.drop_column("cards", "due_at")
@@ -0,0 +1,64 @@
+"""answer events table
+
+Revision ID: 5e8b2d41c9a6
+Revises: a3d95c07e21f
+Create Date: 2026-10-17 13:05:44.208173
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5e8b2d41c9a6"
+down_revision: Union[str, Sequence[str], None] = "a3d95c07e21f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "answer_events",
+        sa.Column(
+            "id", sa.Uuid(), server_default=sa.text("gen_random_uuid()"), nullable=False
+        ),
+        sa.Column("user_id", sa.Uuid(), nullable=False),
+        sa.Column("session_id", sa.UUID(), nullable=False),
+        sa.Column("card_id", sa.UUID(), nullable=False),
+        sa.Column(
+            "outcome",
+            sa.Enum("correct", "incorrect", "review", name="answer_outcome"),
+            nullable=False,
+        ),
+        sa.Column("latency_ms", sa.Integer(), nullable=True),
+        sa.Column(
+            "ts",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+            name=op.f("fk_answer_events_user_id_users"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_answer_events")),
+    )
+    op.create_index(
+        "ix_answer_events_card_id_ts",
+        "answer_events",
+        ["card_id", "ts"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_answer_events_card_id_ts", table_name="answer_events")
+    op.drop_table("answer_events")
+    sa.Enum(name="answer_outcome").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,35 @@
+"""active sessions index
+
+Revision ID: c47f0e93ab18
+Revises: 5e8b2d41c9a6
+Create Date: 2026-10-17 14:20:09.337164
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c47f0e93ab18"
+down_revision: Union[str, Sequence[str], None] = "5e8b2d41c9a6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_sessions_active_updated_at",
+        "sessions",
+        ["updated_at"],
+        unique=False,
+        postgresql_where=sa.text("status = 'active'"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_sessions_active_updated_at", table_name="sessions")
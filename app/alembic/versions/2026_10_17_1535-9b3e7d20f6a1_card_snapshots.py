@@ -0,0 +1,112 @@
+"""card snapshots
+
+Revision ID: 9b3e7d20f6a1
+Revises: c47f0e93ab18
+Create Date: 2026-10-17 15:35:21.904417
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9b3e7d20f6a1"
+down_revision: Union[str, Sequence[str], None] = "c47f0e93ab18"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# same as app.shared.queue.snapshot_fingerprint
+QUEUE_FINGERPRINT = (
+    "encode(sha256(convert_to(array_to_string({queue}, ','), 'UTF8')), 'hex')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "card_snapshots",
+        sa.Column(
+            "id", sa.Uuid(), server_default=sa.text("gen_random_uuid()"), nullable=False
+        ),
+        sa.Column("fingerprint", sa.String(length=64), nullable=False),
+        sa.Column("card_ids", sa.ARRAY(sa.UUID()), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_card_snapshots")),
+        sa.UniqueConstraint("fingerprint", name=op.f("uq_card_snapshots_fingerprint")),
+    )
+    op.add_column("sessions", sa.Column("snapshot_id", sa.Uuid(), nullable=True))
+    op.add_column("sessions", sa.Column("shuffle_seed", sa.BigInteger(), nullable=True))
+    op.add_column(
+        "sessions",
+        sa.Column(
+            "total_cards", sa.Integer(), server_default=sa.text("0"), nullable=False
+        ),
+    )
+    op.create_foreign_key(
+        op.f("fk_sessions_snapshot_id_card_snapshots"),
+        "sessions",
+        "card_snapshots",
+        ["snapshot_id"],
+        ["id"],
+    )
+
+    # existing queues become unshuffled snapshots in their stored order
+    op.execute(
+        f"""
+        INSERT INTO card_snapshots (fingerprint, card_ids, size)
+        SELECT DISTINCT ON (fingerprint) fingerprint, card_ids_queue, cardinality(card_ids_queue)
+        FROM (
+            SELECT {QUEUE_FINGERPRINT.format(queue="card_ids_queue")} AS fingerprint,
+                   card_ids_queue
+            FROM sessions
+            WHERE cardinality(card_ids_queue) > 0
+        ) AS queues
+        ON CONFLICT (fingerprint) DO NOTHING
+        """
+    )
+    op.execute(
+        f"""
+        UPDATE sessions
+        SET snapshot_id = card_snapshots.id, total_cards = card_snapshots.size
+        FROM card_snapshots
+        WHERE cardinality(sessions.card_ids_queue) > 0
+          AND card_snapshots.fingerprint
+              = {QUEUE_FINGERPRINT.format(queue="sessions.card_ids_queue")}
+        """
+    )
+    op.drop_column("sessions", "card_ids_queue")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column(
+        "sessions",
+        sa.Column("card_ids_queue", sa.ARRAY(sa.UUID()), nullable=True),
+    )
+    # shuffled sessions come back in snapshot order
+    op.execute(
+        """
+        UPDATE sessions
+        SET card_ids_queue = card_snapshots.card_ids
+        FROM card_snapshots
+        WHERE card_snapshots.id = sessions.snapshot_id
+        """
+    )
+    op.drop_constraint(
+        op.f("fk_sessions_snapshot_id_card_snapshots"),
+        "sessions",
+        type_="foreignkey",
+    )
+    op.drop_column("sessions", "total_cards")
+    op.drop_column("sessions", "shuffle_seed")
+    op.drop_column("sessions", "snapshot_id")
+    op.drop_table("card_snapshots")
@@ -0,0 +1,51 @@
+"""card snapshots used_at
+
+Revision ID: e4a7c2d9f318
+Revises: 9b3e7d20f6a1
+Create Date: 2026-10-17 16:50:42.118903
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e4a7c2d9f318"
+down_revision: Union[str, Sequence[str], None] = "9b3e7d20f6a1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "card_snapshots",
+        sa.Column(
+            "used_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        "ix_card_snapshots_used_at",
+        "card_snapshots",
+        ["used_at"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_sessions_snapshot_id",
+        "sessions",
+        ["snapshot_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_sessions_snapshot_id", table_name="sessions")
+    op.drop_index("ix_card_snapshots_used_at", table_name="card_snapshots")
+    op.drop_column("card_snapshots", "used_at")
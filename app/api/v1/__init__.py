@@ -12,6 +12,7 @@ from .block import router as block_router
 from .card import router as card_router
 
 from .session import router as session_router
+from .metrics import router as metrics_router
 
 http_bearer = HTTPBearer(auto_error=False)
 
@@ -26,3 +27,4 @@ router.include_router(roadmap_router)
 router.include_router(block_router)
 router.include_router(card_router)
 router.include_router(session_router)
+router.include_router(metrics_router)
@@ -1,6 +1,6 @@
 from typing import Annotated, TYPE_CHECKING
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from starlette import status
 
 from app.core.authentication.fastapi_users import current_active_user
@@ -61,10 +61,14 @@ async def get_blocks(
         "BlockService",
         Depends(get_block_service),
     ],
-) -> list[BlockRead]:
-    return await block_service.get_by_filters(
-        current_user,
-        filters,
+) -> Response:
+    # cached JSON is sent as is; response_model only documents it
+    return Response(
+        await block_service.get_by_filters_json(
+            current_user,
+            filters,
+        ),
+        media_type="application/json",
     )
 
 
@@ -84,10 +88,14 @@ async def get_block(
         "BlockService",
         Depends(get_block_service),
     ],
-) -> BlockRead:
-    return await block_service.get_by_id(
-        current_user,
-        block_id,
+) -> Response:
+    # cached JSON is sent as is; response_model only documents it
+    return Response(
+        await block_service.get_by_id_json(
+            current_user,
+            block_id,
+        ),
+        media_type="application/json",
     )
 
 
@@ -1,6 +1,6 @@
 from typing import Annotated, TYPE_CHECKING
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Response
 from starlette import status
 
 from app.core.authentication.fastapi_users import current_active_user
@@ -61,10 +61,14 @@ async def get_cards(
         "CardService",
         Depends(get_card_service),
     ],
-) -> list[CardRead]:
-    return await card_service.get_by_filters(
-        current_user,
-        filters,
+) -> Response:
+    # cached JSON is sent as is; response_model only documents it
+    return Response(
+        await card_service.get_by_filters_json(
+            current_user,
+            filters,
+        ),
+        media_type="application/json",
     )
 
 
@@ -84,10 +88,14 @@ async def get_card(
         "CardService",
         Depends(get_card_service),
     ],
-) -> CardRead:
-    return await card_service.get_by_id(
-        current_user,
-        card_id,
+) -> Response:
+    # cached JSON is sent as is; response_model only documents it
+    return Response(
+        await card_service.get_by_id_json(
+            current_user,
+            card_id,
+        ),
+        media_type="application/json",
     )
 
 
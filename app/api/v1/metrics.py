@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from app.core.authentication.fastapi_users import current_active_superuser
+from app.core.config import settings
+from app.utils.cache import cache_metrics
+
+router = APIRouter(
+    prefix=settings.api.v1.metrics,
+    tags=["Metrics"],
+    dependencies=[Depends(current_active_superuser)],
+)
+
+
+@router.get(
+    "/cache",
+    name="metrics:cache",
+    response_class=PlainTextResponse,
+)
+async def get_cache_metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        cache_metrics.render(),
+        media_type="text/plain; version=0.0.4",
+    )
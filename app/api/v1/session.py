@@ -2,7 +2,7 @@ import logging
 
 from typing import Annotated, TYPE_CHECKING
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query
 from starlette import status
 
 from app.core.authentication.fastapi_users import current_active_user
@@ -14,8 +14,14 @@ from app.schemas.session import (
     SessionRead,
     SessionCreate,
     SessionFilters,
+    SessionFinish,
     SessionResult,
     SessionUpdate,
+    SessionNextCards,
+    SessionAnswer,
+    SessionAnswersBatch,
+    SessionProgress,
+    SessionQueue,
 )
 
 if TYPE_CHECKING:
@@ -115,6 +121,64 @@ async def get_next_card_id(
     )
 
 
+@router.get(
+    "/{session_id}/next-cards",
+    name="sessions:next_cards",
+    response_model=SessionNextCards,
+)
+@router_handler
+async def get_next_cards(
+    session_id: BaseIdType,
+    current_user: Annotated[
+        "User",
+        Depends(current_active_user),
+    ],
+    session_service: Annotated[
+        "SessionService",
+        Depends(get_session_service),
+    ],
+    window: Annotated[
+        int,
+        Query(ge=1, le=settings.session_state.max_prefetch_window),
+    ] = 1,
+) -> SessionNextCards:
+    return await session_service.get_next_cards(
+        current_user,
+        session_id,
+        window,
+    )
+
+
+@router.get(
+    "/{session_id}/queue",
+    name="sessions:queue",
+    response_model=SessionQueue,
+)
+@router_handler
+async def get_session_queue(
+    session_id: BaseIdType,
+    current_user: Annotated[
+        "User",
+        Depends(current_active_user),
+    ],
+    session_service: Annotated[
+        "SessionService",
+        Depends(get_session_service),
+    ],
+    offset: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[
+        int,
+        Query(ge=1, le=settings.session_state.max_queue_page_size),
+    ] = 100,
+) -> SessionQueue:
+    return await session_service.get_queue(
+        current_user,
+        session_id,
+        offset,
+        limit,
+    )
+
+
 # -------------------------------------- CREATE --------------------------------------
 @router.post(
     "",
@@ -132,14 +196,60 @@ async def create_session(
         "SessionService",
         Depends(get_session_service),
     ],
-    request: Request,
-):
-    auth = request.headers.get("authorization")
-    token = auth[7:]
+) -> SessionRead:
     return await session_service.create(
         current_user,
         session_create_data,
-        token,
+    )
+
+
+@router.post(
+    "/{session_id}/answers",
+    name="sessions:answer",
+    response_model=SessionProgress,
+)
+@router_handler
+async def answer_session_card(
+    session_id: BaseIdType,
+    answer: SessionAnswer,
+    current_user: Annotated[
+        "User",
+        Depends(current_active_user),
+    ],
+    session_service: Annotated[
+        "SessionService",
+        Depends(get_session_service),
+    ],
+) -> SessionProgress:
+    return await session_service.answer(
+        current_user,
+        session_id,
+        answer,
+    )
+
+
+@router.post(
+    "/{session_id}/answers/batch",
+    name="sessions:answers_batch",
+    response_model=SessionProgress,
+)
+@router_handler
+async def answer_session_cards_batch(
+    session_id: BaseIdType,
+    answers_batch: SessionAnswersBatch,
+    current_user: Annotated[
+        "User",
+        Depends(current_active_user),
+    ],
+    session_service: Annotated[
+        "SessionService",
+        Depends(get_session_service),
+    ],
+) -> SessionProgress:
+    return await session_service.answer_batch(
+        current_user,
+        session_id,
+        answers_batch,
     )
 
 
@@ -209,8 +319,10 @@ async def finish_session(
         "SessionService",
         Depends(get_session_service),
     ],
+    session_finish_data: SessionFinish | None = None,
 ) -> SessionResult:
     return await session_service.finish(
         current_user,
         session_id,
+        session_finish_data,
     )
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+from fastapi_users import exceptions
+from fastapi_users.authentication.strategy import DatabaseStrategy
+from sqlalchemy.orm import make_transient_to_detached
+
+from app.core.config import settings
+from app.models import User
+from app.schemas.user import AccessTokenSnapshot, UserSnapshot
+from app.utils.cache import Cache, CacheUnavailable, get_access_token_key
+from app.utils.mappers.cache_to_model import access_token_cache_adapter
+
+if TYPE_CHECKING:
+    from fastapi_users import BaseUserManager
+    from fastapi_users.authentication.strategy import AccessTokenDatabase
+    from app.core.custom_types import BaseIdType
+    from app.models import AccessToken
+
+# per-user namespace of the token lookups, bumped when the user changes
+AUTH_ENTITY = "auth"
+
+
+# DatabaseStrategy with the token -> user lookup cached, so an authenticated
+# request skips the access_tokens and users queries. Entries are dropped on
+# logout and go stale on a bump of the user's AUTH_ENTITY generation, see
+# UserManager.
+class CachedDatabaseStrategy(DatabaseStrategy):
+    def __init__(
+        self,
+        database: "AccessTokenDatabase[AccessToken]",
+        cache: Cache,
+        lifetime_seconds: int | None = None,
+    ):
+        super().__init__(database, lifetime_seconds)
+        self.cache = cache
+        self.ttl = settings.cache.access_token_ttl
+
+    async def read_token(
+        self,
+        token: str | None,
+        user_manager: "BaseUserManager[User, BaseIdType]",
+    ) -> User | None:
+        if token is None or not self.ttl:
+            return await super().read_token(token, user_manager)
+
+        key = get_access_token_key(token)
+        now = datetime.now(timezone.utc)
+        try:
+            cached = await self.cache.get(key, access_token_cache_adapter)
+            if cached is not None and cached.expires_at > now:
+                generation = await self.cache.generation(cached.user.id, AUTH_ENTITY)
+                if cached.generation == generation:
+                    return _detached_user(cached.user)
+        except CacheUnavailable:
+            pass
+
+        max_age = None
+        if self.lifetime_seconds:
+            max_age = now - timedelta(seconds=self.lifetime_seconds)
+        access_token = await self.database.get_by_token(token, max_age)
+        if access_token is None:
+            return None
+
+        # read before the user, so a bump while loading it wins
+        try:
+            generation = await self.cache.generation(access_token.user_id, AUTH_ENTITY)
+        except CacheUnavailable:
+            generation = None
+
+        try:
+            user = await user_manager.get(user_manager.parse_id(access_token.user_id))
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+
+        ttl = min(self.ttl, int((access_token.expires_at - now).total_seconds()))
+        if generation is not None and ttl > 0:
+            snapshot = AccessTokenSnapshot(
+                user=UserSnapshot.model_validate(user),
+                expires_at=access_token.expires_at,
+                generation=generation,
+            )
+            await self.cache.set(key, snapshot, ttl, access_token_cache_adapter)
+        return user
+
+    async def destroy_token(self, token: str, user: User) -> None:
+        await super().destroy_token(token, user)
+        await self.cache.delete(get_access_token_key(token))
+
+
+def _detached_user(snapshot: UserSnapshot) -> User:
+    # detached rather than transient: fastapi-users' PATCH /users/me adds the
+    # current user back to a session, which must UPDATE it, not INSERT it.
+    # hashed_password is left unloaded and is never read from current_user.
+    user = User(**snapshot.model_dump())
+    make_transient_to_detached(user)
+    return user
@@ -39,6 +39,15 @@ class RedisConfig(BaseModel):
     db: RedisDB = RedisDB()
     url_prefix: str = "redis"
 
+    # one shared pool; callers wait up to pool_timeout for a free connection
+    max_connections: int = 100
+    pool_timeout: float = 1.0
+    socket_connect_timeout: float = 1.0
+    # None keeps the pub/sub listener blocking on reads, cache commands are
+    # bounded by cache.command_timeout instead
+    socket_timeout: float | None = None
+    health_check_interval: int = 30
+
     @property
     def url(self) -> str:
         return f"{self.url_prefix}://{self.host}:{self.port}/{self.db.cache}"
@@ -46,9 +55,51 @@ class RedisConfig(BaseModel):
 
 class CacheConfig(BaseModel):
     prefix: str = "cache"
-    version: str = "v1"
+    version: str = "v2"
 
     default_ttl: int = 60
+    # must outlive every entry ttl, see app.utils.cache.Cache.bump
+    generation_ttl: int = 60 * 60 * 24 * 7
+
+    # in-process tier in front of redis, kept coherent over pub/sub
+    local_enabled: bool = True
+    local_max_bytes: int = 32 * 1024 * 1024
+    local_ttl: float = 5.0
+    invalidation_channel: str = "invalidate"
+
+    # single-flight fills: one filler per key holds the lock, the rest poll
+    fill_lock_ttl_ms: int = 3000
+    fill_wait_timeout: float = 3.0
+    fill_poll_interval: float = 0.05
+    # probabilistic early recomputation (XFetch)
+    xfetch_enabled: bool = False
+    xfetch_beta: float = 1.0
+
+    # "json" or "msgpack"; payloads above the threshold are zstd-compressed
+    # when zstandard is installed (0 disables compression)
+    codec: str = "json"
+    compression_threshold: int = 4096
+    compression_level: int = 3
+
+    # every redis command of the cache is bounded by command_timeout; after
+    # breaker_threshold failures in a row redis is bypassed for breaker_cooldown
+    # seconds and cached calls read the database directly
+    command_timeout: float = 0.1
+    breaker_threshold: int = 5
+    breaker_cooldown: float = 10.0
+
+    # fills are written by a bounded background writer, dropped when it is full
+    writer_queue_size: int = 1000
+    writer_concurrency: int = 4
+
+    # not-found lookups and empty lists are kept briefly as negative entries,
+    # invalidated by the same generation bumps (0 disables)
+    negative_ttl: int = 15
+    negative_errors: tuple[str, ...] = ("NOT_FOUND",)
+
+    # list entries stay readable this long past their ttl while a single
+    # background refresh per key replaces them (0 disables)
+    list_stale_ttl: int = 240
 
     roadmap_list_ttl: int = 60
     roadmap_detail_ttl: int = 60
@@ -59,6 +110,52 @@ class CacheConfig(BaseModel):
     card_list_ttl: int = 60
     card_detail_ttl: int = 60
 
+    user_list_ttl: int = 60
+
+    # token -> user lookups of the auth backend, never kept past the token's
+    # expiry (0 disables)
+    access_token_ttl: int = 300
+
+    # lists of the user's own roadmap tree prefilled after login
+    warmup_enabled: bool = True
+    warmup_max_roadmaps: int = 50
+
+
+class SessionStateConfig(BaseModel):
+    prefix: str = "session-state"
+    ttl: int = 60 * 60 * 24
+    max_prefetch_window: int = 20
+    max_answers_batch: int = 1000
+    max_queue_page_size: int = 500
+    # lifetime of the tombstone left by take() if its owner never drops it
+    taken_ttl: int = 60
+
+    flush_interval: float = 5.0
+    flush_batch_size: int = 500
+
+
+class SessionSweeperConfig(BaseModel):
+    enabled: bool = True
+    interval: float = 60.0
+    idle_timeout: int = 60 * 60 * 6
+    batch_size: int = 500
+    # card snapshots no session references are deleted after this long unused
+    snapshot_grace: int = 60 * 60
+
+
+class AnswerEventsConfig(BaseModel):
+    flush_interval_ms: int = 500
+    flush_batch_size: int = 1000
+    max_buffer_size: int = 50_000
+
+
+class SchedulerConfig(BaseModel):
+    default_ease: float = 2.5
+    min_ease: float = 1.3
+
+    due_session_size: int = 50
+    max_due_session_size: int = 500
+
 
 class RunConfig(BaseModel):
     host: str = "127.0.0.1"
@@ -75,6 +172,7 @@ class ApiV1Prefix(BaseModel):
     cards: str = "/cards"
     cards_resource: str = "/cards"
     sessions: str = "/sessions"
+    metrics: str = "/metrics"
 
 
 class ApiPrefix(BaseModel):
@@ -111,6 +209,10 @@ class Settings(BaseSettings):
     access_token: AccessToken
     redis: RedisConfig = RedisConfig()
     cache: CacheConfig = CacheConfig()
+    session_state: SessionStateConfig = SessionStateConfig()
+    session_sweeper: SessionSweeperConfig = SessionSweeperConfig()
+    scheduler: SchedulerConfig = SchedulerConfig()
+    answer_events: AnswerEventsConfig = AnswerEventsConfig()
 
 
 settings = Settings()
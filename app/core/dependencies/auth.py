@@ -2,15 +2,18 @@ from typing import Annotated, TYPE_CHECKING
 
 from fastapi import Depends
 from fastapi_users.authentication import AuthenticationBackend
-from fastapi_users.authentication.strategy import DatabaseStrategy
 
+from app.core.authentication.strategy import CachedDatabaseStrategy
 from app.core.authentication.transport import bearer_transport
 from app.core.config import settings
 from app.models.access_token import SQLAlchemyAccessTokenDatabase
 from app.models import AccessToken
+from app.utils.cache import Cache
+from .cache import get_redis
 from .db import get_db_session
 
 if TYPE_CHECKING:
+    from redis.asyncio import Redis
     from sqlalchemy.ext.asyncio import AsyncSession
     from fastapi_users.authentication.strategy import AccessTokenDatabase
 
@@ -29,9 +32,14 @@ async def get_database_strategy(
         "AccessTokenDatabase[AccessToken]",
         Depends(get_access_tokens_db),
     ],
-) -> DatabaseStrategy:
-    yield DatabaseStrategy(
+    redis: Annotated[
+        "Redis",
+        Depends(get_redis),
+    ],
+) -> CachedDatabaseStrategy:
+    yield CachedDatabaseStrategy(
         access_token_db,
+        Cache(redis),
         lifetime_seconds=settings.access_token.lifetime_seconds,
     )
 
@@ -99,6 +99,10 @@ async def get_session_service(
         "SessionRepository",
         Depends(get_session_repository),
     ],
+    card_repo: Annotated[
+        "CardRepository",
+        Depends(get_card_repository),
+    ],
     redis: Annotated[
         "Redis",
         Depends(get_redis),
@@ -106,5 +110,6 @@ async def get_session_service(
 ) -> SessionService:
     yield SessionService(
         repo,
+        card_repo,
         redis,
     )
@@ -15,6 +15,8 @@ card_repo_logger = logging.getLogger("CardRepo-Logger")
 session_manager_service_logger = logging.getLogger("SessionManagerService-Logger")
 session_manager_repository_logger = logging.getLogger("SessionManagerRepo-Logger")
 
-http_client_logger = logging.getLogger("HttpClient-Logger")
-
 user_manager_logger = logging.getLogger("UserManager-Logger")
+
+workers_logger = logging.getLogger("Workers-Logger")
+
+cache_logger = logging.getLogger("CACHE-LOGGER")
@@ -7,6 +7,8 @@ __all__ = (
     "Card",
     "AccessToken",
     "Session",
+    "CardSnapshot",
+    "AnswerEvent",
 )
 
 from .base import Base
@@ -17,3 +19,5 @@ from .roadmap import Roadmap
 from .block import Block
 from .card import Card
 from .session import Session
+from .card_snapshot import CardSnapshot
+from .answer_event import AnswerEvent
@@ -0,0 +1,56 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, Enum as SQLEnum, Index, UUID, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.custom_types import BaseIdType
+from .base import Base
+from .mixins import IdMixin, UserRelationMixin
+
+
+class AnswerEvent(IdMixin, UserRelationMixin, Base):
+    # append-only log: session_id/card_id carry no FKs so that buffered
+    # inserts never fail on rows deleted in the meantime
+
+    __table_args__ = (
+        Index(
+            "ix_answer_events_card_id_ts",
+            "card_id",
+            "ts",
+        ),
+    )
+
+    session_id: Mapped[BaseIdType] = mapped_column(
+        UUID,
+        nullable=False,
+    )
+    card_id: Mapped[BaseIdType] = mapped_column(
+        UUID,
+        nullable=False,
+    )
+    outcome: Mapped[str] = mapped_column(
+        SQLEnum(
+            "correct",
+            "incorrect",
+            "review",
+            name="answer_outcome",
+        ),
+        nullable=False,
+    )
+    latency_ms: Mapped[int | None] = mapped_column(
+        nullable=True,
+    )
+    ts: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=func.now(),
+        server_default=func.now(),
+    )
+
+    def __str__(self):
+        return (
+            f"{self.__class__.__name__}(session_id={self.session_id}, "
+            f"card_id={self.card_id}, outcome={self.outcome})"
+        )
+
+    def __repr__(self):
+        return str(self)
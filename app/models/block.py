@@ -1,6 +1,6 @@
 from typing import TYPE_CHECKING
 
-from sqlalchemy import String, Enum as SQLEnum, Float
+from sqlalchemy import String, Enum as SQLEnum, Float, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -18,6 +18,14 @@ if TYPE_CHECKING:
 class Block(IdMixin, TimestampMixin, RoadmapRelationMixin, UserRelationMixin, Base):
     # _roadmap_back_populates = "blocks"
 
+    __table_args__ = (
+        Index(
+            "ix_blocks_roadmap_id_order_index",
+            "roadmap_id",
+            "order_index",
+        ),
+    )
+
     title: Mapped[str] = mapped_column(
         String(30),
         nullable=False,
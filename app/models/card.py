@@ -1,6 +1,9 @@
-from sqlalchemy import String, Enum as SQLEnum
+from datetime import datetime
+
+from sqlalchemy import String, Enum as SQLEnum, Index, DateTime, Float, func
 from sqlalchemy.orm import Mapped, mapped_column
 
+from app.core.config import settings
 from .base import Base
 from .mixins import (
     BlockRelationMixin,
@@ -13,6 +16,18 @@ from .mixins import (
 class Card(IdMixin, TimestampMixin, BlockRelationMixin, UserRelationMixin, Base):
     # _block_back_populates = "cards"
 
+    __table_args__ = (
+        Index(
+            "ix_cards_block_id",
+            "block_id",
+        ),
+        Index(
+            "ix_cards_user_id_due_at",
+            "user_id",
+            "due_at",
+        ),
+    )
+
     term: Mapped[str] = mapped_column(
         String(50),
         nullable=False,
@@ -39,6 +54,25 @@ class Card(IdMixin, TimestampMixin, BlockRelationMixin, UserRelationMixin, Base)
         default="unknown",
     )
 
+    due_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=func.now(),
+        server_default=func.now(),
+    )
+    interval_days: Mapped[int] = mapped_column(
+        default=0,
+        server_default="0",
+    )
+    ease_factor: Mapped[float] = mapped_column(
+        Float,
+        default=settings.scheduler.default_ease,
+        server_default=str(settings.scheduler.default_ease),
+    )
+    repetitions: Mapped[int] = mapped_column(
+        default=0,
+        server_default="0",
+    )
+
     def __str__(self):
         return f"{self.__class__.__name__}(id={self.id}, term={self.term!r}), status={self.status}"
 
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from sqlalchemy import ARRAY, UUID, DateTime, Index, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.custom_types import BaseIdType
+from .base import Base
+from .mixins import IdMixin
+
+
+class CardSnapshot(IdMixin, Base):
+    # frozen, ordered list of card ids a session walks through; written once
+    # and shared by every session started on the same deck version.
+    # Snapshots no session references are deleted by the session sweeper
+    # once unused for a while
+
+    __table_args__ = (
+        Index(
+            "ix_card_snapshots_used_at",
+            "used_at",
+        ),
+    )
+
+    fingerprint: Mapped[str] = mapped_column(
+        String(64),
+        unique=True,
+        nullable=False,
+    )
+    card_ids: Mapped[list[BaseIdType]] = mapped_column(
+        ARRAY(UUID(as_uuid=True)),
+        nullable=False,
+    )
+    size: Mapped[int] = mapped_column(
+        nullable=False,
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=func.now(),
+        server_default=func.now(),
+    )
+    # last time a session was started on it
+    used_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=func.now(),
+        server_default=func.now(),
+    )
+
+    def __str__(self):
+        return (
+            f"{self.__class__.__name__}(id={self.id}, "
+            f"fingerprint={self.fingerprint!r}, size={self.size})"
+        )
+
+    def __repr__(self):
+        return str(self)
@@ -1,6 +1,14 @@
 from datetime import datetime
 
-from sqlalchemy import DateTime, Enum as SQLEnum, ARRAY, UUID
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Enum as SQLEnum,
+    ForeignKey,
+    UUID,
+    Index,
+    text,
+)
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import Base
@@ -26,10 +34,23 @@ class Session(
     # _block_back_populates = None
     # _block_id_nullable = True
 
+    __table_args__ = (
+        Index(
+            "ix_sessions_active_updated_at",
+            "updated_at",
+            postgresql_where=text("status = 'active'"),
+        ),
+        Index(
+            "ix_sessions_snapshot_id",
+            "snapshot_id",
+        ),
+    )
+
     mode: Mapped[str] = mapped_column(
         SQLEnum(
             "review",
             "exam",
+            "due",
             name="session_mode",
         ),
         nullable=False,
@@ -50,10 +71,21 @@ class Session(
         default="active",
     )
 
-    card_ids_queue: Mapped[list[BaseIdType] | None] = mapped_column(
-        ARRAY(UUID(as_uuid=True)),
+    # the queue is the snapshot permuted by shuffle_seed (snapshot order
+    # when the seed is null), see app.shared.queue
+    snapshot_id: Mapped[BaseIdType | None] = mapped_column(
+        ForeignKey("card_snapshots.id"),
         nullable=True,
-        default=list,
+    )
+
+    shuffle_seed: Mapped[int | None] = mapped_column(
+        BigInteger,
+        nullable=True,
+    )
+
+    total_cards: Mapped[int] = mapped_column(
+        default=0,
+        server_default=text("0"),
     )
 
     current_card_index: Mapped[int] = mapped_column(
@@ -5,6 +5,7 @@ __all__ = (
     "BlockRepository",
     "CardRepository",
     "SessionRepository",
+    "AnswerEventRepository",
 )
 
 from .base import BaseRepository
@@ -13,3 +14,4 @@ from .roadmap import RoadmapRepository
 from .block import BlockRepository
 from .card import CardRepository
 from .session import SessionRepository
+from .answer_event import AnswerEventRepository
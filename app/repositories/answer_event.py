@@ -0,0 +1,69 @@
+from typing import TYPE_CHECKING
+
+from sqlalchemy import select, insert
+
+from app.core.dependencies import transaction_manager
+from app.core.handlers import repository_handler
+from app.models import AnswerEvent
+from app.repositories import BaseRepository
+from app.shared.generate_id import generate_base_id
+
+if TYPE_CHECKING:
+    from app.core.custom_types import BaseIdType
+
+
+class AnswerEventRepository(BaseRepository):
+    @repository_handler
+    async def get_all(self) -> list[AnswerEvent]:
+        stmt = select(AnswerEvent)
+        result = await self.session.execute(stmt)
+        events = list(result.scalars().all())
+        return events
+
+    @repository_handler
+    async def get_by_filters(self, filters: dict) -> list[AnswerEvent]:
+        stmt = select(AnswerEvent)
+        for field_name, value in filters.items():
+            if value is not None:
+                column = getattr(AnswerEvent, field_name, None)
+                if column is not None:
+                    stmt = stmt.where(column == value)
+        result = await self.session.execute(stmt.order_by(AnswerEvent.ts))
+        events = list(result.scalars().all())
+        return events
+
+    @repository_handler
+    async def create_many(self, events_data: list[dict]) -> int:
+        if not events_data:
+            return 0
+
+        async with transaction_manager(self.session):
+            await self.session.execute(insert(AnswerEvent), events_data)
+            return len(events_data)
+
+    @repository_handler
+    async def get_by_id(self, event_id: "BaseIdType") -> AnswerEvent | None:
+        stmt = select(AnswerEvent).where(AnswerEvent.id == event_id)
+        result = await self.session.execute(stmt)
+        event = result.scalar_one_or_none()
+        return event
+
+    @repository_handler
+    async def create(self, event_data: dict) -> AnswerEvent | None:
+        event_data = {"id": generate_base_id(), **event_data}
+        if not await self.create_many([event_data]):
+            return None
+        return await self.get_by_id(event_data["id"])
+
+    # the log is append-only
+    @repository_handler
+    async def update(self, event_id: "BaseIdType", data: dict) -> AnswerEvent | None:
+        raise NotImplementedError(
+            "update() is not implemented for AnswerEventRepository"
+        )
+
+    @repository_handler
+    async def delete(self, event_id: "BaseIdType") -> bool:
+        raise NotImplementedError(
+            "delete() is not implemented for AnswerEventRepository"
+        )
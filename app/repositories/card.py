@@ -4,17 +4,76 @@ from sqlalchemy import (
     insert,
     update,
     delete,
+    func,
+    cast,
+    column,
+    literal,
+    null,
+    values,
+    ColumnElement,
+    Update,
+    Uuid,
+    Integer,
+    any_,
+    exists,
 )
 
 from app.core.dependencies import transaction_manager
 from app.core.handlers import repository_handler
 from app.repositories import BaseRepository
-from app.models import Card
+from app.models import Card, Block, CardSnapshot, Session
+from app.schemas.card import CardStatus
+from app.shared.scheduler import sm2_schedule_values
 
 if TYPE_CHECKING:
     from app.core.custom_types import BaseIdType
 
 
+def build_reviews_update(
+    cards_reviews: dict["BaseIdType", tuple[int, str | None]],
+    user_id: "BaseIdType | ColumnElement",
+    snapshot_id: "BaseIdType | ColumnElement",
+) -> Update:
+    # cards_reviews maps card id -> (SM-2 quality, new status or None); only
+    # cards of the session's snapshot are reviewed. Every VALUES cell is
+    # cast: postgres infers the column types of a VALUES list from its rows,
+    # not from the UPDATE that reads it
+    status_type = Card.status.type
+    reviews = values(
+        column("id", Uuid),
+        column("quality", Integer),
+        column("status", status_type),
+        name="reviews",
+    ).data(
+        [
+            (
+                card_id,
+                cast(literal(quality, Integer), Integer),
+                cast(
+                    literal(CardStatus(status).value) if status else null(),
+                    status_type,
+                ),
+            )
+            for card_id, (quality, status) in cards_reviews.items()
+        ]
+    )
+    return (
+        update(Card)
+        .where(
+            Card.id == reviews.c.id,
+            Card.user_id == user_id,
+            exists().where(
+                CardSnapshot.id == snapshot_id,
+                Card.id == any_(CardSnapshot.card_ids),
+            ),
+        )
+        .values(
+            status=func.coalesce(reviews.c.status, Card.status),
+            **sm2_schedule_values(reviews.c.quality),
+        )
+    )
+
+
 class CardRepository(BaseRepository):
     @repository_handler
     async def get_all(self) -> list[Card]:
@@ -48,6 +107,60 @@ class CardRepository(BaseRepository):
         cards = list(result.scalars().all())
         return cards
 
+    @repository_handler
+    async def get_queue_ids(
+        self,
+        roadmap_id: "BaseIdType",
+        block_id: "BaseIdType | None" = None,
+        user_id: "BaseIdType | None" = None,
+        status: str | None = None,
+    ) -> list["BaseIdType"]:
+        stmt = (
+            select(Card.id)
+            .join(Block, Block.id == Card.block_id)
+            .where(Block.roadmap_id == roadmap_id)
+        )
+        if block_id is not None:
+            stmt = stmt.where(Card.block_id == block_id)
+        if user_id is not None:
+            stmt = stmt.where(Card.user_id == user_id)
+        if status is not None:
+            stmt = stmt.where(Card.status == status)
+
+        stmt = stmt.order_by(Block.order_index, Card.created_at, Card.id)
+
+        result = await self.session.execute(stmt)
+        cards_ids = list(result.scalars().all())
+        return cards_ids
+
+    @repository_handler
+    async def get_due_ids(
+        self,
+        limit: int,
+        roadmap_id: "BaseIdType",
+        block_id: "BaseIdType | None" = None,
+        user_id: "BaseIdType | None" = None,
+    ) -> list["BaseIdType"]:
+        # walks ix_cards_user_id_due_at in order and stops after `limit` rows
+        stmt = (
+            select(Card.id)
+            .join(Block, Block.id == Card.block_id)
+            .where(
+                Block.roadmap_id == roadmap_id,
+                Card.due_at <= func.now(),
+            )
+            .order_by(Card.due_at)
+            .limit(limit)
+        )
+        if block_id is not None:
+            stmt = stmt.where(Card.block_id == block_id)
+        if user_id is not None:
+            stmt = stmt.where(Card.user_id == user_id)
+
+        result = await self.session.execute(stmt)
+        cards_ids = list(result.scalars().all())
+        return cards_ids
+
     @repository_handler
     async def create(self, card_data: dict) -> Card | None:
         async with transaction_manager(self.session):
@@ -82,3 +195,23 @@ class CardRepository(BaseRepository):
             result = await self.session.execute(stmt)
             card = result.scalar_one_or_none()
             return card
+
+    @repository_handler
+    async def apply_reviews(
+        self,
+        cards_reviews: dict["BaseIdType", tuple[int, str | None]],
+        user_id: "BaseIdType",
+        session_id: "BaseIdType",
+    ) -> int:
+        if not cards_reviews:
+            return 0
+
+        snapshot_id = (
+            select(Session.snapshot_id)
+            .where(Session.id == session_id)
+            .scalar_subquery()
+        )
+        async with transaction_manager(self.session):
+            stmt = build_reviews_update(cards_reviews, user_id, snapshot_id)
+            result = await self.session.execute(stmt)
+            return result.rowcount
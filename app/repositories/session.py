@@ -1,16 +1,32 @@
+from datetime import datetime
 from typing import TYPE_CHECKING
 from sqlalchemy import (
+    ARRAY,
+    Integer,
+    Numeric,
+    Uuid,
+    any_,
+    case,
+    cast,
     select,
     insert,
     update,
     delete,
+    exists,
     func,
+    literal,
+    true,
 )
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
 from app.core.dependencies import transaction_manager
 from app.core.handlers import repository_handler
+from app.models.card import Card
+from app.models.card_snapshot import CardSnapshot
 from app.models.session import Session
 from app.repositories import BaseRepository
+from app.repositories.card import build_reviews_update
+from app.shared.queue import queue_positions, snapshot_fingerprint
 from app.schemas.session import (
     SessionStatus,
 )
@@ -82,20 +98,280 @@ class SessionRepository(BaseRepository):
             return roadmap
 
     @repository_handler
-    async def finish_session(self, session_id: "BaseIdType") -> Session:
+    async def get_or_create_snapshot(
+        self,
+        cards_ids: list["BaseIdType"],
+    ) -> "BaseIdType":
+        fingerprint = snapshot_fingerprint(cards_ids)
+        # touches used_at of an existing snapshot, which keeps it away from
+        # delete_unused_snapshots until the new session references it
+        stmt = (
+            pg_insert(CardSnapshot)
+            .values(
+                fingerprint=fingerprint,
+                card_ids=cards_ids,
+                size=len(cards_ids),
+            )
+            .on_conflict_do_update(
+                index_elements=[CardSnapshot.fingerprint],
+                set_={"used_at": func.now()},
+            )
+            .returning(CardSnapshot.id)
+        )
+
         async with transaction_manager(self.session):
-            stmt = (
+            result = await self.session.execute(stmt)
+            snapshot_id = result.scalar_one()
+            return snapshot_id
+
+    @repository_handler
+    async def get_snapshot_cards_ids(
+        self,
+        snapshot_id: "BaseIdType",
+        positions: list[int],
+    ) -> list["BaseIdType"]:
+        # picks single elements out of the array without shipping it whole
+        if not positions:
+            return []
+
+        wanted = (
+            func.unnest(
+                literal([position + 1 for position in positions], ARRAY(Integer))
+            )
+            .table_valued("position", with_ordinality="ordinality")
+            .render_derived()
+        )
+        stmt = (
+            select(CardSnapshot.card_ids[wanted.c.position])
+            .select_from(CardSnapshot)
+            .join(wanted, true())
+            .where(CardSnapshot.id == snapshot_id)
+            .order_by(wanted.c.ordinality)
+        )
+        result = await self.session.execute(stmt)
+        cards_ids = list(result.scalars().all())
+        return cards_ids
+
+    @repository_handler
+    async def advance_cursor(
+        self,
+        session_id: "BaseIdType",
+        user_id: "BaseIdType | None" = None,
+        window: int = 1,
+    ) -> tuple[int, list["BaseIdType"]] | None:
+        stmt = (
+            update(Session)
+            .where(
+                Session.id == session_id,
+                Session.status == SessionStatus.ACTIVE,
+                Session.current_card_index < Session.total_cards,
+            )
+            .values(current_card_index=Session.current_card_index + 1)
+            .returning(
+                Session.current_card_index,
+                Session.snapshot_id,
+                Session.shuffle_seed,
+                Session.total_cards,
+            )
+        )
+        if user_id is not None:
+            stmt = stmt.where(Session.user_id == user_id)
+
+        async with transaction_manager(self.session):
+            result = await self.session.execute(stmt)
+            row = result.one_or_none()
+        if row is None:
+            return None
+
+        # RETURNING sees the incremented index
+        card_index = row.current_card_index - 1
+        positions = queue_positions(
+            row.shuffle_seed,
+            row.total_cards,
+            card_index,
+            window,
+        )
+        cards_ids = await self.get_snapshot_cards_ids(row.snapshot_id, positions)
+        return card_index, cards_ids
+
+    @repository_handler
+    async def apply_answers(
+        self,
+        session_id: "BaseIdType",
+        progress_deltas: dict[str, int],
+        user_id: "BaseIdType | None" = None,
+        cards_reviews: dict["BaseIdType", tuple[int, str | None]] | None = None,
+    ) -> Session | None:
+        values = {
+            field: getattr(Session, field) + delta
+            for field, delta in progress_deltas.items()
+            if field != "current_card_index"
+        }
+        if progress_deltas.get("current_card_index"):
+            values["current_card_index"] = func.least(
+                Session.current_card_index + progress_deltas["current_card_index"],
+                Session.total_cards,
+            )
+
+        session_update = (
+            update(Session)
+            .where(
+                Session.id == session_id,
+                Session.status == SessionStatus.ACTIVE,
+            )
+            .values(**values)
+            .returning(*Session.__table__.c)
+        )
+        if user_id is not None:
+            session_update = session_update.where(Session.user_id == user_id)
+        session_update = session_update.cte("session_update")
+
+        stmt = select(session_update)
+        if cards_reviews:
+            cards_update = build_reviews_update(
+                cards_reviews,
+                session_update.c.user_id,
+                session_update.c.snapshot_id,
+            ).cte("cards_update")
+            stmt = stmt.add_cte(cards_update)
+
+        async with transaction_manager(self.session):
+            result = await self.session.execute(select(Session).from_statement(stmt))
+            session = result.scalar_one_or_none()
+            return session
+
+    @repository_handler
+    async def update_progress_many(
+        self,
+        progress_rows: list[dict],
+        status: SessionStatus = SessionStatus.ACTIVE,
+    ) -> None:
+        if not progress_rows:
+            return
+
+        # by primary key and only for sessions in `status`; a flush racing
+        # finish or abandon must not overwrite the final counters
+        async with transaction_manager(self.session):
+            await self.session.execute(
                 update(Session)
+                .where(Session.status == status)
+                .execution_options(synchronize_session=None),
+                progress_rows,
+            )
+
+    @repository_handler
+    async def finish_session(
+        self,
+        session_id: "BaseIdType",
+        user_id: "BaseIdType | None" = None,
+        progress: dict[str, int] | None = None,
+        cards_ids: list["BaseIdType"] | None = None,
+        card_status: str | None = None,
+    ) -> dict | None:
+        # completes an active session, applies the card status transition and
+        # returns the SessionResult fields in a single statement
+        session_update = (
+            update(Session)
+            .where(
+                Session.id == session_id,
+                Session.status == SessionStatus.ACTIVE,
+            )
+            .values(
+                **(progress or {}),
+                status=SessionStatus.COMPLETED,
+                completed_at=func.now(),
+            )
+            .returning(*Session.__table__.c)
+        )
+        if user_id is not None:
+            session_update = session_update.where(Session.user_id == user_id)
+        session_update = session_update.cte("session_update")
+
+        finished = session_update.c
+        stmt = select(
+            finished.id,
+            finished.user_id,
+            finished.roadmap_id,
+            finished.block_id,
+            finished.mode,
+            finished.total_cards,
+            finished.correct_answers,
+            finished.incorrect_answers,
+            finished.review_answers,
+            case(
+                (finished.review_answers == 0, 0.0),
+                else_=(
+                    cast(finished.correct_answers, Numeric)
+                    * 100
+                    / finished.review_answers
+                ),
+            ).label("accuracy_percentage"),
+            finished.completed_at,
+        )
+        if cards_ids and card_status is not None:
+            cards_update = (
+                update(Card)
                 .where(
-                    Session.id == session_id,
-                    Session.status == SessionStatus.ACTIVE,
+                    Card.id == any_(literal(cards_ids, ARRAY(Uuid))),
+                    Card.user_id == finished.user_id,
                 )
-                .values(status=SessionStatus.COMPLETED, completed_at=func.now())
-                .returning(Session)
+                .values(status=card_status)
+                .cte("cards_update")
             )
+            stmt = stmt.add_cte(cards_update)
+
+        async with transaction_manager(self.session):
             result = await self.session.execute(stmt)
-            session = result.scalar_one_or_none()
-            return session
+            row = result.mappings().one_or_none()
+            return dict(row) if row else None
+
+    @repository_handler
+    async def abandon_stale_sessions(
+        self,
+        idle_before: datetime,
+        limit: int,
+    ) -> list["BaseIdType"]:
+        stale_sessions = (
+            select(Session.id)
+            .where(
+                Session.status == SessionStatus.ACTIVE,
+                Session.updated_at < idle_before,
+            )
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        async with transaction_manager(self.session):
+            stmt = (
+                update(Session)
+                .where(Session.id.in_(stale_sessions.scalar_subquery()))
+                .values(status=SessionStatus.ABANDONED, completed_at=func.now())
+                .returning(Session.id)
+            )
+            result = await self.session.execute(stmt)
+            sessions_ids = list(result.scalars().all())
+            return sessions_ids
+
+    @repository_handler
+    async def delete_unused_snapshots(
+        self,
+        used_before: datetime,
+        limit: int,
+    ) -> int:
+        unused_snapshots = (
+            select(CardSnapshot.id)
+            .where(
+                CardSnapshot.used_at < used_before,
+                ~exists().where(Session.snapshot_id == CardSnapshot.id),
+            )
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        async with transaction_manager(self.session):
+            stmt = delete(CardSnapshot).where(
+                CardSnapshot.id.in_(unused_snapshots.scalar_subquery())
+            )
+            result = await self.session.execute(stmt)
+            return result.rowcount
 
     @repository_handler
     async def abandon_session(self, session_id: "BaseIdType") -> bool:
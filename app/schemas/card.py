@@ -38,6 +38,10 @@ class CardRead(BaseCard):
     example: str | None = None
     comment: str | None = None
     status: CardStatus
+    due_at: datetime
+    interval_days: int
+    ease_factor: float
+    repetitions: int
     created_at: datetime
     updated_at: datetime
 
@@ -1,9 +1,11 @@
 from datetime import datetime
 from enum import Enum
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 
+from app.core.config import settings
 from app.core.custom_types import BaseIdType
+from app.schemas.card import CardRead, CardStatus
 
 
 class BaseSession(BaseModel):
@@ -13,6 +15,7 @@ class BaseSession(BaseModel):
 class SessionMode(str, Enum):
     REVIEW = "review"
     EXAM = "exam"
+    DUE = "due"
 
 
 class SessionStatus(str, Enum):
@@ -26,6 +29,11 @@ class SessionCreate(BaseSession):
     roadmap_id: BaseIdType
     block_id: BaseIdType | None = None
     mix: bool | None = False
+    limit: int | None = Field(
+        default=None,
+        ge=1,
+        le=settings.scheduler.max_due_session_size,
+    )
 
 
 class SessionUpdate(BaseModel):
@@ -36,6 +44,40 @@ class SessionUpdate(BaseModel):
     review_answers: int | None = None
 
 
+class AnswerOutcome(str, Enum):
+    CORRECT = "correct"
+    INCORRECT = "incorrect"
+    REVIEW = "review"
+
+
+class SessionAnswer(BaseModel):
+    card_id: BaseIdType
+    outcome: AnswerOutcome
+    card_status: CardStatus | None = None
+    advance: bool = True
+    latency_ms: int | None = Field(default=None, ge=0)
+    answered_at: datetime | None = None
+
+
+class SessionAnswersBatch(BaseModel):
+    answers: list[SessionAnswer] = Field(
+        min_length=1,
+        max_length=settings.session_state.max_answers_batch,
+    )
+
+
+class SessionProgress(BaseModel):
+    id: BaseIdType
+    status: SessionStatus
+    current_card_index: int
+
+    correct_answers: int
+    incorrect_answers: int
+    review_answers: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class SessionRead(BaseSession):
     id: BaseIdType
     user_id: BaseIdType
@@ -45,7 +87,7 @@ class SessionRead(BaseSession):
     mode: SessionMode
 
     status: SessionStatus
-    card_ids_queue: list[BaseIdType] = []
+    total_cards: int = 0
     current_card_index: int
 
     correct_answers: int
@@ -67,6 +109,14 @@ class SessionFilters(BaseModel):
     status: SessionStatus | None = None
 
 
+class SessionFinish(BaseModel):
+    card_ids: list[BaseIdType] = Field(
+        default_factory=list,
+        max_length=settings.session_state.max_answers_batch,
+    )
+    card_status: CardStatus = CardStatus.KNOWN
+
+
 class SessionResult(BaseModel):
     id: BaseIdType
     user_id: BaseIdType
@@ -79,3 +129,14 @@ class SessionResult(BaseModel):
     review_answers: int
     accuracy_percentage: float
     completed_at: datetime
+
+
+class SessionNextCards(BaseModel):
+    card_index: int
+    cards: list[CardRead]
+
+
+class SessionQueue(BaseModel):
+    total_cards: int
+    offset: int
+    cards_ids: list[BaseIdType]
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from fastapi_users import schemas
 from pydantic import BaseModel, EmailStr, ConfigDict
 
@@ -8,6 +10,19 @@ class UserRead(schemas.BaseUser[BaseIdType]):
     username: str | None = None
 
 
+class UserSnapshot(UserRead):
+    created_at: datetime
+    updated_at: datetime
+
+
+class AccessTokenSnapshot(BaseModel):
+    # what the token lookup cache keeps per token; `generation` is the user's
+    # "auth" cache generation when it was loaded
+    user: UserSnapshot
+    expires_at: datetime
+    generation: int
+
+
 class UserCreate(schemas.BaseUserCreate):
     username: str | None = None
 
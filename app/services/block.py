@@ -1,7 +1,5 @@
-import json
 from typing import TYPE_CHECKING
 
-from app.core.config import settings
 from app.core.handlers import service_handler
 from app.core.loggers import block_service_logger as logger
 from app.shared.access import (
@@ -9,8 +7,18 @@ from app.shared.access import (
     get_accessed_filters,
 )
 from app.shared.generate_id import generate_base_id
-from app.utils.cache import get_cache_key, is_single_parent_filter
-from app.utils.mappers.cache_to_model import block_cache_to_models
+from app.schemas.block import BlockFilters
+from app.utils.cache import (
+    Cache,
+    cached,
+    is_single_parent_filter,
+    remove_item,
+    upsert_item,
+)
+from app.utils.mappers.cache_to_model import (
+    block_cache_adapter,
+    blocks_cache_adapter,
+)
 from app.utils.mappers.orm_to_models import block_orm_to_model
 
 if TYPE_CHECKING:
@@ -22,14 +30,19 @@ if TYPE_CHECKING:
         BlockCreate,
         BlockRead,
         BlockUpdate,
-        BlockFilters,
     )
 
 
+def _is_roadmap_list(current_user: "User", filters: "BlockFilters") -> bool:
+    filters_dict = filters.model_dump(exclude_none=True, exclude_unset=True)
+    return is_single_parent_filter(filters_dict, "roadmap_id")
+
+
 class BlockService:
     def __init__(self, repo: "BlockRepository", redis: "Redis"):
         self.repo = repo
         self.redis = redis
+        self.cache = Cache(redis)
 
     @service_handler
     async def get_all(self) -> list["BlockRead"]:
@@ -41,63 +54,66 @@ class BlockService:
         validated_blocks = [block_orm_to_model(db_block) for db_block in db_blocks]
         return validated_blocks
 
-    @service_handler
-    async def get_by_filters(
-        self, current_user: "User", filters: "BlockFilters"
+    @cached(
+        "blocks",
+        "list",
+        ttl="block_list_ttl",
+        adapter=blocks_cache_adapter,
+        stale_ttl="list_stale_ttl",
+        when=_is_roadmap_list,
+    )
+    async def _get_by_filters(
+        self,
+        current_user: "User",
+        filters: "BlockFilters",
     ) -> list["BlockRead"]:
-        filters_dict = filters.model_dump(exclude_none=True, exclude_unset=True)
-
-        if is_single_parent_filter(filters_dict, "roadmap_id"):
-            key = get_cache_key(
-                "blocks",
-                settings.cache.version,
-                "user",
-                str(current_user.id),
-                "roadmap",
-                str(filters_dict["roadmap_id"]),
-                "list",
-            )
-            cached = await self.redis.get(key)
-            if cached:
-                return block_cache_to_models(cached)
+        filters_dict = filters.model_dump(
+            exclude_none=True,
+            exclude_unset=True,
+        )
+        accessed_filters = get_accessed_filters(
+            current_user,
+            filters_dict,
+        )
 
-        accessed_filters = get_accessed_filters(current_user, filters_dict)
         db_blocks = await self.repo.get_by_filters(accessed_filters)
         if not db_blocks:
             logger.warning("Blocks with filters(%r) not found", filters)
             return []
 
         validated_blocks = [block_orm_to_model(db_block) for db_block in db_blocks]
-
-        if is_single_parent_filter(filters_dict, "roadmap_id"):
-            cache_data = json.dumps(
-                [u.model_dump(mode="json") for u in validated_blocks], default=str
-            )
-            await self.redis.set(key, cache_data, ex=settings.cache.block_list_ttl)
-
         return validated_blocks
 
     @service_handler
-    async def get_by_id(
-        self, current_user: "User", block_id: "BaseIdType"
-    ) -> "BlockRead":
-        key = get_cache_key(
-            "blocks",
-            settings.cache.version,
-            "user",
-            str(current_user.id),
-            "block",
-            str(block_id),
-            "detail",
-        )
-        cached = await self.redis.get(key)
-        if cached:
-            cached_block = block_cache_to_models(cached)
-            return cached_block[0]
+    async def get_by_filters(
+        self,
+        current_user: "User",
+        filters: "BlockFilters",
+    ) -> list["BlockRead"]:
+        return await self._get_by_filters(current_user, filters)
 
+    @service_handler
+    async def get_by_filters_json(
+        self,
+        current_user: "User",
+        filters: "BlockFilters",
+    ) -> bytes:
+        return await self._get_by_filters.json(current_user, filters)
+
+    @cached(
+        "blocks",
+        "detail",
+        ttl="block_detail_ttl",
+        adapter=block_cache_adapter,
+    )
+    async def _get_by_id(
+        self,
+        current_user: "User",
+        block_id: "BaseIdType",
+    ) -> "BlockRead":
         db_block = await self.repo.get_by_id(block_id)
         if not db_block:
-            logger.error("Block(%r) not found", block_id)
+            logger.error("Block(id=%r) not found", block_id)
             raise ValueError("NOT_FOUND")
 
         validated_block = block_orm_to_model(db_block)
@@ -105,14 +121,24 @@ class BlockService:
             current_user,
             validated_block.model_dump(),
         )
-
-        await self.redis.set(
-            key,
-            json.dumps([validated_block.model_dump(mode="json")]),
-            ex=settings.cache.block_detail_ttl,
-        )
         return validated_block
 
+    @service_handler
+    async def get_by_id(
+        self,
+        current_user: "User",
+        block_id: "BaseIdType",
+    ) -> "BlockRead":
+        return await self._get_by_id(current_user, block_id)
+
+    @service_handler
+    async def get_by_id_json(
+        self,
+        current_user: "User",
+        block_id: "BaseIdType",
+    ) -> bytes:
+        return await self._get_by_id.json(current_user, block_id)
+
     @service_handler
     async def create(
         self, current_user: "User", block_create_data: "BlockCreate"
@@ -121,6 +147,9 @@ class BlockService:
         block_dict["id"] = generate_base_id()
         block_dict["user_id"] = current_user.id
 
+        list_key, detail_key = await self._cache_keys(
+            current_user, block_dict["roadmap_id"], block_dict["id"]
+        )
         created_block = await self.repo.create(block_dict)
         if not created_block:
             logger.error(
@@ -132,25 +161,12 @@ class BlockService:
 
         validated_created_block = block_orm_to_model(created_block)
 
-        await self.redis.delete(
-            get_cache_key(
-                "blocks",
-                settings.cache.version,
-                "user",
-                str(current_user.id),
-                "roadmap",
-                str(block_dict["roadmap_id"]),
-                "list",
-            ),
-            get_cache_key(
-                "blocks",
-                settings.cache.version,
-                "user",
-                str(current_user.id),
-                "block",
-                str(block_dict["id"]),
-                "detail",
-            ),
+        await self.cache.bump([current_user.id], "blocks")
+        await self._write_through(
+            current_user,
+            list_key,
+            detail_key,
+            validated_created_block,
         )
 
         return validated_created_block
@@ -159,30 +175,25 @@ class BlockService:
     async def delete(self, current_user: "User", block_id: "BaseIdType") -> None:
         existed_block = await self.get_by_id(current_user, block_id)
 
+        list_key, _ = await self._cache_keys(
+            current_user, existed_block.roadmap_id, block_id
+        )
         success = await self.repo.delete(block_id)
         if not success:
             logger.error("Deletion for Block(%r) FAILED", block_id)
             raise ValueError("OPERATION_FAILED")
 
-        await self.redis.delete(
-            get_cache_key(
-                "blocks",
-                settings.cache.version,
-                "user",
-                str(current_user.id),
-                "roadmap",
-                str(existed_block.roadmap_id),
-                "list",
-            ),
-            get_cache_key(
-                "blocks",
-                settings.cache.version,
-                "user",
-                str(current_user.id),
-                "block",
-                str(block_id),
-                "detail",
-            ),
+        # cards go with the block (ON DELETE CASCADE)
+        await self.cache.bump(
+            [current_user.id, existed_block.user_id],
+            "blocks",
+            "cards",
+        )
+        await self._get_by_filters.patch(
+            list_key,
+            remove_item(block_id),
+            current_user,
+            BlockFilters(roadmap_id=existed_block.roadmap_id),
         )
 
     @service_handler
@@ -192,9 +203,12 @@ class BlockService:
         block_id: "BaseIdType",
         block_update_data: "BlockUpdate",
     ) -> "BlockRead":
-        await self.get_by_id(current_user, block_id)
+        existed_block = await self.get_by_id(current_user, block_id)
 
         block_dict = block_update_data.model_dump(exclude_none=True, exclude_unset=True)
+        list_key, detail_key = await self._cache_keys(
+            current_user, existed_block.roadmap_id, block_id
+        )
         updated_block = await self.repo.update(block_id, block_dict)
         if not updated_block:
             logger.error("Failed to update Block(id=%r)", block_id)
@@ -202,25 +216,44 @@ class BlockService:
 
         validated_updated_block = block_orm_to_model(updated_block)
 
-        await self.redis.delete(
-            get_cache_key(
-                "blocks",
-                settings.cache.version,
-                "user",
-                str(current_user.id),
-                "roadmap",
-                str(validated_updated_block.roadmap_id),
-                "list",
-            ),
-            get_cache_key(
-                "blocks",
-                settings.cache.version,
-                "user",
-                str(current_user.id),
-                "block",
-                str(block_id),
-                "detail",
-            ),
+        await self.cache.bump(
+            [current_user.id, validated_updated_block.user_id],
+            "blocks",
+        )
+        # a block moved to another roadmap keeps only the invalidation
+        await self._write_through(
+            current_user,
+            list_key,
+            detail_key,
+            validated_updated_block,
         )
 
         return validated_updated_block
+
+    async def _cache_keys(
+        self,
+        current_user: "User",
+        roadmap_id: "BaseIdType",
+        block_id: "BaseIdType",
+    ) -> tuple[str | None, str | None]:
+        # the writer's list and detail entries, taken before the write
+        list_key = await self._get_by_filters.key(
+            current_user, BlockFilters(roadmap_id=roadmap_id)
+        )
+        detail_key = await self._get_by_id.key(current_user, block_id)
+        return list_key, detail_key
+
+    async def _write_through(
+        self,
+        current_user: "User",
+        list_key: str | None,
+        detail_key: str | None,
+        block: "BlockRead",
+    ) -> None:
+        await self._get_by_id.put(detail_key, block, current_user, block.id)
+        await self._get_by_filters.patch(
+            list_key,
+            upsert_item(block),
+            current_user,
+            BlockFilters(roadmap_id=block.roadmap_id),
+        )
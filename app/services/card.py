@@ -1,13 +1,21 @@
-import json
 from typing import TYPE_CHECKING
 
-from app.core.config import settings
 from app.core.handlers import service_handler
 from app.core.loggers import card_service_logger as logger
 from app.shared.access import get_accessed_filters, user_can_read_entity
 from app.shared.generate_id import generate_base_id
-from app.utils.cache import is_single_parent_filter, get_cache_key
-from app.utils.mappers.cache_to_model import card_cache_to_models
+from app.schemas.card import CardFilters
+from app.utils.cache import (
+    Cache,
+    cached,
+    is_single_parent_filter,
+    remove_item,
+    upsert_item,
+)
+from app.utils.mappers.cache_to_model import (
+    card_cache_adapter,
+    cards_cache_adapter,
+)
 from app.utils.mappers.orm_to_models import card_orm_to_model
 
 if TYPE_CHECKING:
@@ -19,14 +27,19 @@ if TYPE_CHECKING:
         CardRead,
         CardCreate,
         CardUpdate,
-        CardFilters,
     )
 
 
+def _is_block_list(current_user: "User", filters: "CardFilters") -> bool:
+    filters_dict = filters.model_dump(exclude_none=True, exclude_unset=True)
+    return is_single_parent_filter(filters_dict, "block_id")
+
+
 class CardService:
     def __init__(self, repo: "CardRepository", redis: "Redis"):
         self.repo = repo
         self.redis = redis
+        self.cache = Cache(redis)
 
     @service_handler
     async def get_all(self) -> list["CardRead"]:
@@ -38,74 +51,66 @@ class CardService:
         validated_cards = [card_orm_to_model(db_card) for db_card in db_cards]
         return validated_cards
 
-    @service_handler
-    async def get_by_filters(
-        self, current_user: "User", filters: "CardFilters"
+    @cached(
+        "cards",
+        "list",
+        ttl="card_list_ttl",
+        adapter=cards_cache_adapter,
+        stale_ttl="list_stale_ttl",
+        when=_is_block_list,
+    )
+    async def _get_by_filters(
+        self,
+        current_user: "User",
+        filters: "CardFilters",
     ) -> list["CardRead"]:
         filters_dict = filters.model_dump(
             exclude_none=True,
             exclude_unset=True,
         )
-
-        if is_single_parent_filter(filters_dict, "block_id"):
-            key = get_cache_key(
-                "cards",
-                settings.cache.version,
-                "user",
-                str(current_user.id),
-                "block",
-                str(filters_dict["block_id"]),
-                "list",
-            )
-            cached = await self.redis.get(key)
-            if cached:
-                return card_cache_to_models(cached)
-
         accessed_filters = get_accessed_filters(
             current_user,
             filters_dict,
         )
+
         db_cards = await self.repo.get_by_filters(accessed_filters)
         if not db_cards:
             logger.warning("Cards with filters(%r) not found", filters)
             return []
 
         validated_cards = [card_orm_to_model(db_card) for db_card in db_cards]
-
-        if is_single_parent_filter(filters_dict, "block_id"):
-            cache_data = json.dumps(
-                [u.model_dump(mode="json") for u in validated_cards],
-                default=str,
-            )
-            await self.redis.set(
-                key,
-                cache_data,
-                ex=settings.cache.card_list_ttl,
-            )
-
         return validated_cards
 
     @service_handler
-    async def get_by_id(
-        self, current_user: "User", card_id: "BaseIdType"
-    ) -> "CardRead":
-        key = get_cache_key(
-            "cards",
-            settings.cache.version,
-            "user",
-            str(current_user.id),
-            "card",
-            str(card_id),
-            "detail",
-        )
-        cached = await self.redis.get(key)
-        if cached:
-            result_card = card_cache_to_models(cached)
-            return result_card[0]
+    async def get_by_filters(
+        self,
+        current_user: "User",
+        filters: "CardFilters",
+    ) -> list["CardRead"]:
+        return await self._get_by_filters(current_user, filters)
 
+    @service_handler
+    async def get_by_filters_json(
+        self,
+        current_user: "User",
+        filters: "CardFilters",
+    ) -> bytes:
+        return await self._get_by_filters.json(current_user, filters)
+
+    @cached(
+        "cards",
+        "detail",
+        ttl="card_detail_ttl",
+        adapter=card_cache_adapter,
+    )
+    async def _get_by_id(
+        self,
+        current_user: "User",
+        card_id: "BaseIdType",
+    ) -> "CardRead":
         db_card = await self.repo.get_by_id(card_id)
         if not db_card:
-            logger.error("Card(%r) not found", card_id)
+            logger.error("Card(id=%r) not found", card_id)
             raise ValueError("NOT_FOUND")
 
         validated_card = card_orm_to_model(db_card)
@@ -113,14 +118,24 @@ class CardService:
             current_user,
             validated_card.model_dump(),
         )
-
-        await self.redis.set(
-            key,
-            json.dumps([validated_card.model_dump(mode="json")]),
-            ex=settings.cache.card_detail_ttl,
-        )
         return validated_card
 
+    @service_handler
+    async def get_by_id(
+        self,
+        current_user: "User",
+        card_id: "BaseIdType",
+    ) -> "CardRead":
+        return await self._get_by_id(current_user, card_id)
+
+    @service_handler
+    async def get_by_id_json(
+        self,
+        current_user: "User",
+        card_id: "BaseIdType",
+    ) -> bytes:
+        return await self._get_by_id.json(current_user, card_id)
+
     @service_handler
     async def create(
         self, current_user: "User", card_create_data: "CardCreate"
@@ -129,6 +144,9 @@ class CardService:
         card_dict["id"] = generate_base_id()
         card_dict["user_id"] = current_user.id
 
+        list_key, detail_key = await self._cache_keys(
+            current_user, card_dict["block_id"], card_dict["id"]
+        )
         created_card = await self.repo.create(card_dict)
         if not created_card:
             logger.error(
@@ -140,25 +158,12 @@ class CardService:
 
         validated_created_card = card_orm_to_model(created_card)
 
-        await self.redis.delete(
-            get_cache_key(
-                "cards",
-                settings.cache.version,
-                "user",
-                str(current_user.id),
-                "block",
-                str(card_dict["block_id"]),
-                "list",
-            ),
-            get_cache_key(
-                "cards",
-                settings.cache.version,
-                "user",
-                str(current_user.id),
-                "card",
-                str(card_dict["id"]),
-                "detail",
-            ),
+        await self.cache.bump([current_user.id], "cards")
+        await self._write_through(
+            current_user,
+            list_key,
+            detail_key,
+            validated_created_card,
         )
 
         return validated_created_card
@@ -167,30 +172,23 @@ class CardService:
     async def delete(self, current_user: "User", card_id: "BaseIdType") -> None:
         existed_card = await self.get_by_id(current_user, card_id)
 
+        list_key, _ = await self._cache_keys(
+            current_user, existed_card.block_id, card_id
+        )
         success = await self.repo.delete(card_id)
         if not success:
             logger.error("Deletion for Card(%r) FAILED", card_id)
             raise ValueError("OPERATION_FAILED")
 
-        await self.redis.delete(
-            get_cache_key(
-                "cards",
-                settings.cache.version,
-                "user",
-                str(current_user.id),
-                "block",
-                str(existed_card.block_id),
-                "list",
-            ),
-            get_cache_key(
-                "cards",
-                settings.cache.version,
-                "user",
-                str(current_user.id),
-                "card",
-                str(card_id),
-                "detail",
-            ),
+        await self.cache.bump(
+            [current_user.id, existed_card.user_id],
+            "cards",
+        )
+        await self._get_by_filters.patch(
+            list_key,
+            remove_item(card_id),
+            current_user,
+            CardFilters(block_id=existed_card.block_id),
         )
 
     @service_handler
@@ -200,12 +198,15 @@ class CardService:
         card_id: "BaseIdType",
         card_update_data: "CardUpdate",
     ) -> "CardRead":
-        await self.get_by_id(current_user, card_id)
+        existed_card = await self.get_by_id(current_user, card_id)
 
         card_dict = card_update_data.model_dump(
             exclude_none=True,
             exclude_unset=True,
         )
+        list_key, detail_key = await self._cache_keys(
+            current_user, existed_card.block_id, card_id
+        )
         updated_card = await self.repo.update(
             card_id,
             card_dict,
@@ -216,25 +217,43 @@ class CardService:
 
         validated_updated_card = card_orm_to_model(updated_card)
 
-        await self.redis.delete(
-            get_cache_key(
-                "cards",
-                settings.cache.version,
-                "user",
-                str(current_user.id),
-                "block",
-                str(validated_updated_card.block_id),
-                "list",
-            ),
-            get_cache_key(
-                "cards",
-                settings.cache.version,
-                "user",
-                str(current_user.id),
-                "card",
-                str(card_id),
-                "detail",
-            ),
+        await self.cache.bump(
+            [current_user.id, validated_updated_card.user_id],
+            "cards",
+        )
+        await self._write_through(
+            current_user,
+            list_key,
+            detail_key,
+            validated_updated_card,
         )
 
         return validated_updated_card
+
+    async def _cache_keys(
+        self,
+        current_user: "User",
+        block_id: "BaseIdType",
+        card_id: "BaseIdType",
+    ) -> tuple[str | None, str | None]:
+        # the writer's list and detail entries, taken before the write
+        list_key = await self._get_by_filters.key(
+            current_user, CardFilters(block_id=block_id)
+        )
+        detail_key = await self._get_by_id.key(current_user, card_id)
+        return list_key, detail_key
+
+    async def _write_through(
+        self,
+        current_user: "User",
+        list_key: str | None,
+        detail_key: str | None,
+        card: "CardRead",
+    ) -> None:
+        await self._get_by_id.put(detail_key, card, current_user, card.id)
+        await self._get_by_filters.patch(
+            list_key,
+            upsert_item(card),
+            current_user,
+            CardFilters(block_id=card.block_id),
+        )
@@ -1,16 +1,16 @@
-import json
 from typing import TYPE_CHECKING
 
-from app.core.config import settings
 from app.core.handlers import service_handler
 from app.core.loggers import roadmap_service_logger as logger
 from app.shared.generate_id import generate_base_id
 from app.shared.access import get_accessed_filters, user_can_read_entity
 from app.utils.mappers.orm_to_models import roadmap_orm_to_model
 from app.utils.mappers.cache_to_model import (
-    roadmap_cache_to_models,
+    roadmap_cache_adapter,
+    roadmaps_cache_adapter,
 )
-from app.utils.cache import get_cache_key
+from app.schemas.roadmap import RoadmapFilters
+from app.utils.cache import Cache, cached, remove_item, upsert_item
 
 if TYPE_CHECKING:
     from redis.asyncio import Redis
@@ -21,10 +21,13 @@ if TYPE_CHECKING:
         RoadmapRead,
         RoadmapCreate,
         RoadmapUpdate,
-        RoadmapFilters,
     )
 
 
+def _is_unfiltered(current_user: "User", filters: "RoadmapFilters") -> bool:
+    return not filters.model_dump(exclude_none=True, exclude_unset=True)
+
+
 class RoadmapService:
     def __init__(
         self,
@@ -33,6 +36,7 @@ class RoadmapService:
     ):
         self.repo = repo
         self.redis = redis
+        self.cache = Cache(redis)
 
     @service_handler
     async def get_all(self) -> list["RoadmapRead"]:
@@ -47,8 +51,15 @@ class RoadmapService:
 
         return validated_roadmaps
 
-    @service_handler
-    async def get_by_filters(
+    @cached(
+        "roadmaps",
+        "list",
+        ttl="roadmap_list_ttl",
+        adapter=roadmaps_cache_adapter,
+        stale_ttl="list_stale_ttl",
+        when=_is_unfiltered,
+    )
+    async def _get_by_filters(
         self,
         current_user: "User",
         filters: "RoadmapFilters",
@@ -57,18 +68,6 @@ class RoadmapService:
             exclude_none=True,
             exclude_unset=True,
         )
-
-        if not filters_dict:
-            key = get_cache_key(
-                "roadmaps",
-                "user",
-                str(current_user.id),
-                "list",
-            )
-            cached = await self.redis.get(key)
-            if cached:
-                return roadmap_cache_to_models(cached)
-
         accessed_filters = get_accessed_filters(
             current_user,
             filters_dict,
@@ -82,38 +81,35 @@ class RoadmapService:
         validated_roadmaps = [
             roadmap_orm_to_model(db_roadmap) for db_roadmap in db_roadmaps
         ]
-
-        if not filters_dict:
-            cache_data = json.dumps(
-                [u.model_dump(mode="json") for u in validated_roadmaps], default=str
-            )
-            await self.redis.set(
-                key,
-                cache_data,
-                ex=settings.cache.roadmap_list_ttl,
-            )
-
         return validated_roadmaps
 
     @service_handler
-    async def get_by_id(
+    async def get_by_filters(
+        self,
+        current_user: "User",
+        filters: "RoadmapFilters",
+    ) -> list["RoadmapRead"]:
+        return await self._get_by_filters(current_user, filters)
+
+    @service_handler
+    async def get_by_filters_json(
+        self,
+        current_user: "User",
+        filters: "RoadmapFilters",
+    ) -> bytes:
+        return await self._get_by_filters.json(current_user, filters)
+
+    @cached(
+        "roadmaps",
+        "detail",
+        ttl="roadmap_detail_ttl",
+        adapter=roadmap_cache_adapter,
+    )
+    async def _get_by_id(
         self,
         current_user: "User",
         roadmap_id: "BaseIdType",
     ) -> "RoadmapRead":
-        key = get_cache_key(
-            "roadmaps",
-            "user",
-            str(current_user.id),
-            "roadmap",
-            str(roadmap_id),
-            "detail",
-        )
-        cached = await self.redis.get(key)
-        if cached:
-            result_roadmap = roadmap_cache_to_models(cached)
-            return result_roadmap[0]
-
         db_roadmap = await self.repo.get_by_id(roadmap_id)
         if not db_roadmap:
             logger.error("Roadmap(id=%r) not found", roadmap_id)
@@ -124,14 +120,23 @@ class RoadmapService:
             current_user,
             validated_roadmap.model_dump(),
         )
+        return validated_roadmap
 
-        await self.redis.set(
-            key,
-            json.dumps([validated_roadmap.model_dump(mode="json")]),
-            ex=settings.cache.roadmap_detail_ttl,
-        )
+    @service_handler
+    async def get_by_id(
+        self,
+        current_user: "User",
+        roadmap_id: "BaseIdType",
+    ) -> "RoadmapRead":
+        return await self._get_by_id(current_user, roadmap_id)
 
-        return validated_roadmap
+    @service_handler
+    async def get_by_id_json(
+        self,
+        current_user: "User",
+        roadmap_id: "BaseIdType",
+    ) -> bytes:
+        return await self._get_by_id.json(current_user, roadmap_id)
 
     @service_handler
     async def create(
@@ -146,6 +151,7 @@ class RoadmapService:
         roadmap_dict["id"] = generate_base_id()
         roadmap_dict["user_id"] = current_user.id
 
+        list_key, detail_key = await self._cache_keys(current_user, roadmap_dict["id"])
         created_roadmap = await self.repo.create(roadmap_dict)
         if not created_roadmap:
             logger.error(
@@ -157,9 +163,12 @@ class RoadmapService:
 
         validated_created_roadmap = roadmap_orm_to_model(created_roadmap)
 
-        await self.redis.delete(
-            get_cache_key("roadmaps", "user", str(current_user.id), "list"),
-            get_cache_key("roadmaps", "user", str(current_user.id), "detail"),
+        await self.cache.bump([current_user.id], "roadmaps")
+        await self._write_through(
+            current_user,
+            list_key,
+            detail_key,
+            validated_created_roadmap,
         )
 
         return validated_created_roadmap
@@ -172,26 +181,24 @@ class RoadmapService:
     ) -> None:
         existed_roadmap = await self.get_by_id(current_user, roadmap_id)
 
+        list_key, _ = await self._cache_keys(current_user, roadmap_id)
         success = await self.repo.delete(roadmap_id)
         if not success:
             logger.error("Failed to delete Roadmap(id=%r)", roadmap_id)
             raise ValueError("OPERATION_FAILED")
 
-        await self.redis.delete(
-            get_cache_key(
-                "roadmaps",
-                "user",
-                str(current_user.id),
-                "list",
-            ),
-            get_cache_key(
-                "roadmaps",
-                "user",
-                str(current_user.id),
-                "roadmap",
-                str(existed_roadmap.id),
-                "detail",
-            ),
+        # blocks and cards go with the roadmap (ON DELETE CASCADE)
+        await self.cache.bump(
+            [current_user.id, existed_roadmap.user_id],
+            "roadmaps",
+            "blocks",
+            "cards",
+        )
+        await self._get_by_filters.patch(
+            list_key,
+            remove_item(roadmap_id),
+            current_user,
+            RoadmapFilters(),
         )
 
     @service_handler
@@ -208,6 +215,7 @@ class RoadmapService:
             exclude_unset=True,
         )
 
+        list_key, detail_key = await self._cache_keys(current_user, roadmap_id)
         updated_roadmap = await self.repo.update(roadmap_id, roadmap_dict)
         if not updated_roadmap:
             logger.error("Failed to update Roadmap(id=%r)", roadmap_id)
@@ -215,21 +223,40 @@ class RoadmapService:
 
         validated_updated_roadmap = roadmap_orm_to_model(updated_roadmap)
 
-        await self.redis.delete(
-            get_cache_key(
-                "roadmaps",
-                "user",
-                str(current_user.id),
-                "list",
-            ),
-            get_cache_key(
-                "roadmaps",
-                "user",
-                str(current_user.id),
-                "roadmap",
-                str(updated_roadmap.id),
-                "detail",
-            ),
+        await self.cache.bump(
+            [current_user.id, validated_updated_roadmap.user_id],
+            "roadmaps",
+        )
+        await self._write_through(
+            current_user,
+            list_key,
+            detail_key,
+            validated_updated_roadmap,
         )
 
         return validated_updated_roadmap
+
+    async def _cache_keys(
+        self,
+        current_user: "User",
+        roadmap_id: "BaseIdType",
+    ) -> tuple[str | None, str | None]:
+        # the writer's list and detail entries, taken before the write
+        list_key = await self._get_by_filters.key(current_user, RoadmapFilters())
+        detail_key = await self._get_by_id.key(current_user, roadmap_id)
+        return list_key, detail_key
+
+    async def _write_through(
+        self,
+        current_user: "User",
+        list_key: str | None,
+        detail_key: str | None,
+        roadmap: "RoadmapRead",
+    ) -> None:
+        await self._get_by_id.put(detail_key, roadmap, current_user, roadmap.id)
+        await self._get_by_filters.patch(
+            list_key,
+            upsert_item(roadmap),
+            current_user,
+            RoadmapFilters(),
+        )
@@ -1,40 +1,83 @@
-import random
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import TYPE_CHECKING
 
+from app.core.config import settings
 from app.core.handlers import service_handler
 from app.core.loggers import session_manager_service_logger as logger
-from app.external.requests import (
-    get_cards_by_filters,
-    get_blocks_by_filters,
-    get_block_by_id,
-)
 from app.shared.access import get_accessed_filters, user_can_read_entity
 from app.shared.generate_id import generate_base_id
-from app.utils.mappers.orm_to_models import session_orm_to_model
-from app.schemas.session import SessionMode, SessionStatus, SessionResult
+from app.shared.queue import materialize_queue, new_shuffle_seed, queue_positions
+from app.shared.scheduler import ANSWER_QUALITY
+from app.utils.cache import Cache
+from app.utils.mappers.orm_to_models import session_orm_to_model, card_orm_to_model
+from app.utils.session_state import SessionStateStore
+from app.workers.answer_events import answer_events
+from app.schemas.card import CardStatus
+from app.schemas.session import (
+    AnswerOutcome,
+    SessionMode,
+    SessionStatus,
+    SessionResult,
+    SessionNextCards,
+    SessionProgress,
+    SessionQueue,
+)
 
 if TYPE_CHECKING:
     from redis.asyncio import Redis
     from app.core.custom_types import BaseIdType
-    from app.repositories import SessionRepository
+    from app.repositories import (
+        SessionRepository,
+        CardRepository,
+    )
     from app.schemas.session import (
+        SessionAnswer,
+        SessionAnswersBatch,
         SessionRead,
         SessionCreate,
         SessionFilters,
+        SessionFinish,
         SessionUpdate,
     )
     from app.models import User
 
 
+ANSWER_COUNTERS = {
+    AnswerOutcome.CORRECT: "correct_answers",
+    AnswerOutcome.INCORRECT: "incorrect_answers",
+    AnswerOutcome.REVIEW: "review_answers",
+}
+
+
 class SessionService:
     def __init__(
         self,
         repo: "SessionRepository",
+        card_repo: "CardRepository",
         redis: "Redis",
     ):
         self.repo = repo
+        self.card_repo = card_repo
         self.redis = redis
+        self.cache = Cache(redis)
+        self.state = SessionStateStore(redis)
+
+    async def _with_live_progress(
+        self,
+        sessions: list["SessionRead"],
+    ) -> list["SessionRead"]:
+        active_ids = [
+            session.id for session in sessions if session.status is SessionStatus.ACTIVE
+        ]
+        progress = await self.state.get_progress_many(active_ids)
+        return [
+            (
+                session.model_copy(update=progress[str(session.id)])
+                if str(session.id) in progress
+                else session
+            )
+            for session in sessions
+        ]
 
     @service_handler
     async def get_all(self) -> list["SessionRead"]:
@@ -44,10 +87,10 @@ class SessionService:
             return []
 
         validated_sessions = [
-            await session_orm_to_model(db_session) for db_session in db_sessions
+            session_orm_to_model(db_session) for db_session in db_sessions
         ]
 
-        return validated_sessions
+        return await self._with_live_progress(validated_sessions)
 
     @service_handler
     async def get_by_filters(
@@ -56,7 +99,7 @@ class SessionService:
         filters: "SessionFilters",
     ) -> list["SessionRead"]:
         filters_dict = filters.model_dump()
-        accessed_filters = await get_accessed_filters(
+        accessed_filters = get_accessed_filters(
             current_user,
             filters_dict,
         )
@@ -70,10 +113,10 @@ class SessionService:
             return []
 
         validated_sessions = [
-            await session_orm_to_model(db_session) for db_session in db_sessions
+            session_orm_to_model(db_session) for db_session in db_sessions
         ]
 
-        return validated_sessions
+        return await self._with_live_progress(validated_sessions)
 
     @service_handler
     async def get_by_id(
@@ -86,10 +129,62 @@ class SessionService:
             logger.error("Session(id=%r) not found", session_id)
             raise ValueError("NOT_FOUND")
 
-        validated_session = await session_orm_to_model(db_session)
-        await user_can_read_entity(current_user, validated_session.model_dump())
+        validated_session = session_orm_to_model(db_session)
+        user_can_read_entity(current_user, validated_session.model_dump())
 
-        return validated_session
+        [live_session] = await self._with_live_progress([validated_session])
+        return live_session
+
+    async def _advance(
+        self,
+        current_user: "User",
+        session_id: "BaseIdType",
+        window: int,
+    ) -> tuple[int, list["BaseIdType"]]:
+        owner_id = None if current_user.is_superuser else current_user.id
+
+        advanced = await self.state.advance(session_id, owner_id, window)
+        if advanced is None and await self._restore_state(session_id):
+            advanced = await self.state.advance(session_id, owner_id, window)
+        if advanced is None:
+            advanced = await self.repo.advance_cursor(session_id, owner_id, window)
+        if advanced is None:
+            session = await self.get_by_id(current_user, session_id)
+            logger.warning(
+                "Next card access failed for Session(id=%r): status=%r, index=%r",
+                session_id,
+                session.status,
+                session.current_card_index,
+            )
+            raise ValueError("Next card id not found or invalid session state")
+
+        return advanced
+
+    async def _restore_state(
+        self,
+        session_id: "BaseIdType",
+        progress: dict[str, int] | None = None,
+    ) -> bool:
+        # re-seeds the live state of an active session from its row, after the
+        # state expired or update() dropped it; `progress` overrides the row's
+        db_session = await self.repo.get_by_id(session_id)
+        if not db_session:
+            return False
+
+        validated_session = session_orm_to_model(db_session)
+        if validated_session.status is not SessionStatus.ACTIVE:
+            return False
+        if progress:
+            validated_session = validated_session.model_copy(update=progress)
+
+        cards_ids = []
+        if db_session.snapshot_id is not None:
+            cards_ids = await self.repo.get_snapshot_cards_ids(
+                db_session.snapshot_id,
+                queue_positions(db_session.shuffle_seed, db_session.total_cards),
+            )
+        await self.state.restore(validated_session, cards_ids)
+        return True
 
     @service_handler
     async def get_next_card_id(
@@ -97,73 +192,233 @@ class SessionService:
         current_user: "User",
         session_id: "BaseIdType",
     ) -> "BaseIdType":
-        session = await self.get_by_id(current_user, session_id)
+        _, [next_card_id] = await self._advance(current_user, session_id, 1)
+        return next_card_id
+
+    @service_handler
+    async def get_next_cards(
+        self,
+        current_user: "User",
+        session_id: "BaseIdType",
+        window: int,
+    ) -> SessionNextCards:
+        card_index, cards_ids = await self._advance(current_user, session_id, window)
+
+        db_cards = await self.card_repo.get_by_filters({"id": cards_ids})
+        cards_by_id = {db_card.id: db_card for db_card in db_cards}
+
+        return SessionNextCards(
+            card_index=card_index,
+            cards=[
+                card_orm_to_model(cards_by_id[card_id])
+                for card_id in cards_ids
+                if card_id in cards_by_id
+            ],
+        )
+
+    @service_handler
+    async def get_queue(
+        self,
+        current_user: "User",
+        session_id: "BaseIdType",
+        offset: int,
+        limit: int,
+    ) -> SessionQueue:
+        db_session = await self.repo.get_by_id(session_id)
+        if not db_session:
+            logger.error("Session(id=%r) not found", session_id)
+            raise ValueError("NOT_FOUND")
+
+        validated_session = session_orm_to_model(db_session)
+        user_can_read_entity(current_user, validated_session.model_dump())
+
+        cards_ids = []
+        if db_session.snapshot_id is not None:
+            positions = queue_positions(
+                db_session.shuffle_seed,
+                db_session.total_cards,
+                offset,
+                limit,
+            )
+            cards_ids = await self.repo.get_snapshot_cards_ids(
+                db_session.snapshot_id,
+                positions,
+            )
+
+        return SessionQueue(
+            total_cards=db_session.total_cards,
+            offset=offset,
+            cards_ids=cards_ids,
+        )
+
+    @staticmethod
+    def _record_answers(
+        session_id: "BaseIdType",
+        user_id: "BaseIdType",
+        answers: list["SessionAnswer"],
+    ) -> None:
+        answered_at = datetime.now(timezone.utc)
+        answer_events.add(
+            [
+                {
+                    "id": generate_base_id(),
+                    "session_id": session_id,
+                    "card_id": answer.card_id,
+                    "user_id": user_id,
+                    "outcome": answer.outcome.value,
+                    "latency_ms": answer.latency_ms,
+                    "ts": answer.answered_at or answered_at,
+                }
+                for answer in answers
+            ]
+        )
+
+    async def _apply_answers(
+        self,
+        current_user: "User",
+        session_id: "BaseIdType",
+        answers: list["SessionAnswer"],
+    ) -> SessionProgress:
+        owner_id = None if current_user.is_superuser else current_user.id
+
+        progress_deltas = {}
+        cards_reviews = {}
+        for answer in answers:
+            counter = ANSWER_COUNTERS[answer.outcome]
+            progress_deltas[counter] = progress_deltas.get(counter, 0) + 1
+            if answer.advance:
+                progress_deltas["current_card_index"] = (
+                    progress_deltas.get("current_card_index", 0) + 1
+                )
+            cards_reviews[answer.card_id] = (
+                ANSWER_QUALITY[answer.outcome],
+                answer.card_status,
+            )
+
+        applied = await self.state.apply(session_id, owner_id, progress_deltas)
+        if applied is not None:
+            session_owner_id, progress, applied_deltas = applied
+            try:
+                await self.card_repo.apply_reviews(
+                    cards_reviews,
+                    session_owner_id,
+                    session_id,
+                )
+            except Exception:
+                # counted only together with the card updates, so a retry of
+                # the answers does not count them twice
+                await self._revert_answers(session_id, applied_deltas)
+                raise
+            await self.cache.bump([session_owner_id], "cards")
+            self._record_answers(session_id, session_owner_id, answers)
+            return SessionProgress(
+                id=session_id,
+                status=SessionStatus.ACTIVE,
+                **progress,
+            )
 
+        updated_session = await self.repo.apply_answers(
+            session_id,
+            progress_deltas,
+            user_id=owner_id,
+            cards_reviews=cards_reviews,
+        )
+        if not updated_session:
+            session = await self.get_by_id(current_user, session_id)
+            logger.error(
+                "Answers for Session(id=%r, status=%r) not applied",
+                session_id,
+                session.status,
+            )
+            raise ValueError("SESSION_NOT_ACTIVE")
+
+        await self.cache.bump([updated_session.user_id], "cards")
+        self._record_answers(session_id, updated_session.user_id, answers)
+        return SessionProgress.model_validate(updated_session)
+
+    async def _revert_answers(
+        self,
+        session_id: "BaseIdType",
+        applied_deltas: dict[str, int],
+    ) -> None:
         try:
-            next_card_id = session.card_ids_queue[session.current_card_index]
-        except (IndexError, TypeError, AttributeError) as e:
-            logger.warning(
-                "Next card access failed for session %r: queue=%r, index=%r, error=%r",
+            await self.state.apply(
                 session_id,
-                getattr(session, "card_ids_queue", None),
-                getattr(session, "current_card_index", None),
-                e,
+                None,
+                {field: -delta for field, delta in applied_deltas.items()},
+            )
+        except ValueError:
+            # taken by a finish or the sweeper in the meantime
+            logger.error(
+                "Answers for Session(id=%r) counted without their cards", session_id
             )
-            raise ValueError("Next card id not found or invalid session state") from e
 
-        await self.repo.update(
-            session.id,
-            {"current_card_index": session.current_card_index + 1},
-        )
+    @service_handler
+    async def answer(
+        self,
+        current_user: "User",
+        session_id: "BaseIdType",
+        answer: "SessionAnswer",
+    ) -> SessionProgress:
+        return await self._apply_answers(current_user, session_id, [answer])
 
-        return next_card_id
+    @service_handler
+    async def answer_batch(
+        self,
+        current_user: "User",
+        session_id: "BaseIdType",
+        answers_batch: "SessionAnswersBatch",
+    ) -> SessionProgress:
+        return await self._apply_answers(
+            current_user,
+            session_id,
+            answers_batch.answers,
+        )
 
     @service_handler
     async def create(
         self,
         current_user: "User",
         session_create_data: "SessionCreate",
-        token: str,
     ) -> "SessionRead":
         filters = session_create_data.model_dump(
-            exclude={"mode", "mix"}, exclude_none=True
+            include={"roadmap_id", "block_id"},
+            exclude_none=True,
         )
-        if session_create_data.mode is SessionMode.REVIEW:
-            filters["status"] = "review"
-
-        accessed_filters = await get_accessed_filters(
+        accessed_filters = get_accessed_filters(
             current_user,
             filters,
         )
 
-        if not accessed_filters.get("block_id", None):
-            blocks_filters = filters.copy()
-            blocks_filters.pop("status", None)
-            blocks_ids = [
-                block.get("id")
-                for block in await get_blocks_by_filters(token, blocks_filters)
-            ]
+        if session_create_data.mode is SessionMode.DUE:
+            cards_ids = await self.card_repo.get_due_ids(
+                limit=session_create_data.limit or settings.scheduler.due_session_size,
+                roadmap_id=accessed_filters["roadmap_id"],
+                block_id=accessed_filters.get("block_id"),
+                user_id=accessed_filters.get("user_id"),
+            )
         else:
-            blocks_ids = [accessed_filters.get("block_id")]
-
-        cards_ids_queue = []
-        for block_id in blocks_ids:
-            accessed_filters["block_id"] = block_id
-            cards_ids_for_block = [
-                card.get("id")
-                for card in await get_cards_by_filters(
-                    token,
-                    accessed_filters,
-                )
-            ]
-            cards_ids_queue += cards_ids_for_block
+            cards_ids = await self.card_repo.get_queue_ids(
+                roadmap_id=accessed_filters["roadmap_id"],
+                block_id=accessed_filters.get("block_id"),
+                user_id=accessed_filters.get("user_id"),
+                status=(
+                    CardStatus.REVIEW
+                    if session_create_data.mode is SessionMode.REVIEW
+                    else None
+                ),
+            )
 
-        session_dict = session_create_data.model_dump(exclude={"mix"})
+        shuffle_seed = new_shuffle_seed() if session_create_data.mix else None
+
+        session_dict = session_create_data.model_dump(exclude={"mix", "limit"})
         session_dict["user_id"] = current_user.id
-        session_dict["id"] = await generate_base_id()
-        if session_create_data.mix:
-            random.shuffle(cards_ids_queue)
-        session_dict["card_ids_queue"] = cards_ids_queue
+        session_dict["id"] = generate_base_id()
+        session_dict["snapshot_id"] = (
+            await self.repo.get_or_create_snapshot(cards_ids) if cards_ids else None
+        )
+        session_dict["shuffle_seed"] = shuffle_seed
+        session_dict["total_cards"] = len(cards_ids)
 
         created_session = await self.repo.create(session_dict)
         if not created_session:
@@ -174,7 +429,11 @@ class SessionService:
             )
             raise ValueError("OPERATION_FAILED")
 
-        validated_created_session = await session_orm_to_model(created_session)
+        validated_created_session = session_orm_to_model(created_session)
+        await self.state.seed(
+            validated_created_session,
+            materialize_queue(cards_ids, shuffle_seed),
+        )
 
         return validated_created_session
 
@@ -187,6 +446,7 @@ class SessionService:
         await self.get_by_id(current_user, session_id)
 
         success = await self.repo.delete(session_id)
+        await self.state.drop(session_id)
         if success:
             logger.info("Session(id=%r) was deleted successfully", session_id)
         else:
@@ -201,15 +461,31 @@ class SessionService:
         session_update_data: "SessionUpdate",
     ) -> "SessionRead":
         await self.get_by_id(current_user, session_id)
+        owner_id = None if current_user.is_superuser else current_user.id
+
+        # taken like in finish(): answers applied meanwhile are rejected
+        # rather than lost with the dropped state
+        progress = await self.state.take(session_id, owner_id)
+        session_dict = {
+            **(progress or {}),
+            **session_update_data.model_dump(exclude_unset=True),
+        }
 
-        session_dict = session_update_data.model_dump(exclude_unset=True)
+        try:
+            updated_session = await self.repo.update(session_id, session_dict)
+            if not updated_session:
+                logger.error("Failed to update Session(id=%r)", session_id)
+                raise ValueError("OPERATION_FAILED")
+        except Exception:
+            await self.state.drop(session_id)
+            if progress is not None:
+                await self._restore_state(session_id, progress)
+            raise
 
-        updated_session = await self.repo.update(session_id, session_dict)
-        if not updated_session:
-            logger.error("Failed to update Session(id=%r)", session_id)
-            raise ValueError("OPERATION_FAILED")
+        # the next card flip restores the state from the updated row
+        await self.state.drop(session_id)
 
-        validated_updated_session = await session_orm_to_model(updated_session)
+        validated_updated_session = session_orm_to_model(updated_session)
 
         return validated_updated_session
 
@@ -218,41 +494,45 @@ class SessionService:
         self,
         current_user: "User",
         session_id: "BaseIdType",
+        session_finish_data: "SessionFinish | None" = None,
     ) -> SessionResult:
-        await self.get_by_id(current_user, session_id)
+        owner_id = None if current_user.is_superuser else current_user.id
 
-        update_data = {
-            "status": SessionStatus.COMPLETED,
-            "completed_at": datetime.now(),
-        }
-
-        updated_session = await self.repo.update(session_id, update_data)
-        if not updated_session:
-            logger.error("Failed to update Session(id=%r)", session_id)
-            raise ValueError("OPERATION_FAILED")
-
-        session = await session_orm_to_model(updated_session)
-
-        reviewed_answers = session.review_answers
-        cards_len = len(session.card_ids_queue)
-        accuracy = (
-            (session.correct_answers / reviewed_answers * 100)
-            if reviewed_answers != 0
-            else 0.0
-        )
+        # taken before the row is completed: answers applied after the take
+        # are rejected rather than lost with the dropped state
+        progress = await self.state.take(session_id, owner_id)
+        try:
+            finished_session = await self.repo.finish_session(
+                session_id,
+                user_id=owner_id,
+                progress=progress,
+                cards_ids=(
+                    session_finish_data.card_ids if session_finish_data else None
+                ),
+                card_status=(
+                    session_finish_data.card_status.value
+                    if session_finish_data
+                    else None
+                ),
+            )
+        except Exception:
+            # the session stays active, hand the taken progress back
+            await self.state.drop(session_id)
+            if progress is not None:
+                await self._restore_state(session_id, progress)
+            raise
+
+        await self.state.drop(session_id)
+        if not finished_session:
+            session = await self.get_by_id(current_user, session_id)
+            logger.error(
+                "Session(id=%r, status=%r) not finished",
+                session_id,
+                session.status,
+            )
+            raise ValueError("SESSION_NOT_ACTIVE")
 
-        result = SessionResult(
-            **session.model_dump(
-                exclude={
-                    "card_ids_queue",
-                    "current_card_index",
-                    "status",
-                    "created_at",
-                    "updated_at",
-                }
-            ),
-            total_cards=cards_len,
-            accuracy_percentage=accuracy,
-        )
+        if session_finish_data and session_finish_data.card_ids:
+            await self.cache.bump([finished_session["user_id"]], "cards")
 
-        return result
+        return SessionResult.model_validate(finished_session)
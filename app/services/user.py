@@ -1,16 +1,14 @@
-import json
-import logging
 from typing import TYPE_CHECKING
 
-from redis.asyncio import Redis
-
 from app.core.handlers import service_handler
 from app.core.loggers import user_service_logger as logger
 from app.shared.access import get_accessed_filters
-from app.utils.mappers.cache_to_model import users_cache_to_model
+from app.utils.cache import Cache, cached
+from app.utils.mappers.cache_to_model import users_cache_adapter
 from app.utils.mappers.orm_to_models import user_orm_to_model
 
 if TYPE_CHECKING:
+    from redis.asyncio import Redis
     from app.repositories import UserRepository
     from app.schemas.user import UserRead, UserFilters
     from app.models import User
@@ -24,28 +22,27 @@ class UserService:
     ):
         self.repo = repo
         self.redis = redis
-        self.ttl = 60
-
-    @service_handler
-    async def get_all(self) -> list["UserRead"]:
-        cache_key = "users:all"
-        cached = await self.redis.get(cache_key)
-        if cached:
-            logging.info("Hit cache for key: %r", cache_key)
-            return await users_cache_to_model(cached)
+        self.cache = Cache(redis)
 
+    # shared by all users and never bumped, entries only age out
+    @cached(
+        "users",
+        "list",
+        ttl="user_list_ttl",
+        adapter=users_cache_adapter,
+        user=None,
+    )
+    async def _get_all(self) -> list["UserRead"]:
         db_users = await self.repo.get_all()
         if len(db_users) == 0:
             logger.warning("Users not found in DB")
             return []
 
-        validated_users = [await user_orm_to_model(user) for user in db_users]
-        await self.redis.set(
-            cache_key,
-            json.dumps([u.model_dump_json() for u in validated_users]),
-            ex=self.ttl,
-        )
-        return validated_users
+        return [user_orm_to_model(user) for user in db_users]
+
+    @service_handler
+    async def get_all(self) -> list["UserRead"]:
+        return await self._get_all()
 
     @service_handler
     async def get_by_filters(
@@ -54,7 +51,7 @@ class UserService:
         filters: "UserFilters",
     ) -> list["UserRead"]:
         filters_dict = filters.model_dump()
-        accessed_filters = await get_accessed_filters(
+        accessed_filters = get_accessed_filters(
             current_user,
             filters_dict,
         )
@@ -64,6 +61,6 @@ class UserService:
             logger.warning("Users with filters(%r) not found", filters)
             return []
 
-        validated_users = [await user_orm_to_model(user) for user in db_users]
+        validated_users = [user_orm_to_model(user) for user in db_users]
 
         return validated_users
@@ -1,14 +1,17 @@
 from datetime import datetime, timezone
-from typing import Optional, TYPE_CHECKING
+from typing import Any, Optional, TYPE_CHECKING
 
 from fastapi_users import BaseUserManager
 from sqlalchemy import delete, and_, select, asc
 
+from app.core.authentication.strategy import AUTH_ENTITY
 from app.core.config import settings
 from app.core.loggers import user_manager_logger as logger
 from app.core.custom_types import BaseIdType
 from app.models import User, db_helper, AccessToken
 from app.models.mixins import IdMixin
+from app.utils.cache import Cache
+from app.workers.cache_warmup import schedule_cache_warmup
 
 if TYPE_CHECKING:
     from fastapi import Request, Response
@@ -43,6 +46,55 @@ class UserManager(IdMixin, BaseUserManager[User, BaseIdType]):
             user.id,
             result,
         )
+        if result["old"]:
+            # pruned tokens must stop authenticating from the cache too
+            await self._evict_access_tokens(user, request)
+
+        if request is not None:
+            schedule_cache_warmup(request.app.state.redis, user)
+
+    async def on_after_update(
+        self,
+        user: User,
+        update_dict: dict[str, Any],
+        request: Optional["Request"] = None,
+    ) -> None:
+        if "password" in update_dict:
+            logger.info("User %r has changed their password.", user.id)
+        await self._evict_access_tokens(user, request)
+
+    async def on_after_reset_password(
+        self,
+        user: User,
+        request: Optional["Request"] = None,
+    ) -> None:
+        logger.info("User %r has reset their password.", user.id)
+        await self._evict_access_tokens(user, request)
+
+    async def on_after_verify(
+        self,
+        user: User,
+        request: Optional["Request"] = None,
+    ) -> None:
+        await self._evict_access_tokens(user, request)
+
+    async def on_after_delete(
+        self,
+        user: User,
+        request: Optional["Request"] = None,
+    ) -> None:
+        await self._evict_access_tokens(user, request)
+
+    async def _evict_access_tokens(
+        self,
+        user: User,
+        request: Optional["Request"],
+    ) -> None:
+        # the cached token lookups of the user go stale, see
+        # app.core.authentication.strategy; without a request there is no
+        # redis, e.g. in app.actions
+        if request is not None:
+            await Cache(request.app.state.redis).bump([user.id], AUTH_ENTITY)
 
     async def on_after_register(
         self,
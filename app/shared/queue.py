@@ -0,0 +1,63 @@
+import hashlib
+import random
+from functools import lru_cache
+from typing import Iterator
+
+from app.core.custom_types import BaseIdType
+
+
+def snapshot_fingerprint(cards_ids: list[BaseIdType]) -> str:
+    # must match the backfill in the card snapshots migration
+    joined = ",".join(str(card_id) for card_id in cards_ids)
+    return hashlib.sha256(joined.encode()).hexdigest()
+
+
+def new_shuffle_seed() -> int:
+    return random.getrandbits(63)
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _splitmix64(state: int) -> Iterator[int]:
+    while True:
+        state = (state + 0x9E3779B97F4A7C15) & _MASK64
+        value = state
+        value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+        value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+        yield value ^ (value >> 31)
+
+
+@lru_cache(maxsize=128)
+def _permutation(seed: int, size: int) -> tuple[int, ...]:
+    # Fisher-Yates over splitmix64. Stored seeds must map to the same queue
+    # forever, so this is spelled out instead of relying on random.shuffle,
+    # whose output may change between Python versions. Do not change it.
+    positions = list(range(size))
+    numbers = _splitmix64(seed)
+    for i in range(size - 1, 0, -1):
+        j = next(numbers) % (i + 1)
+        positions[i], positions[j] = positions[j], positions[i]
+    return tuple(positions)
+
+
+def queue_positions(
+    seed: int | None,
+    size: int,
+    start: int = 0,
+    count: int | None = None,
+) -> list[int]:
+    # 0-based snapshot positions of queue slots [start, start + count)
+    stop = size if count is None else min(start + count, size)
+    if start >= stop:
+        return []
+    if seed is None:
+        return list(range(start, stop))
+    return list(_permutation(seed, size)[start:stop])
+
+
+def materialize_queue(
+    cards_ids: list[BaseIdType],
+    seed: int | None,
+) -> list[BaseIdType]:
+    return [cards_ids[position] for position in queue_positions(seed, len(cards_ids))]
@@ -0,0 +1,46 @@
+from sqlalchemy import ColumnElement, Integer, case, cast, func, literal
+
+from app.core.config import settings
+from app.models import Card
+from app.schemas.session import AnswerOutcome
+
+# SM-2 grades (0..5) for the session answer outcomes
+ANSWER_QUALITY = {
+    AnswerOutcome.CORRECT: 4,
+    AnswerOutcome.REVIEW: 3,
+    AnswerOutcome.INCORRECT: 1,
+}
+
+
+def sm2_schedule_values(quality: int | ColumnElement) -> dict[str, ColumnElement]:
+    # SET expressions for an UPDATE on cards; every expression reads the
+    # pre-update row, as SM-2 expects
+    if isinstance(quality, int):
+        quality = literal(quality, Integer)
+    else:
+        quality = cast(quality, Integer)
+
+    passed = quality >= 3
+    penalty = 5 - quality
+
+    repetitions = case(
+        (passed, Card.repetitions + 1),
+        else_=0,
+    )
+    interval_days = case(
+        (~passed, 1),
+        (Card.repetitions == 0, 1),
+        (Card.repetitions == 1, 6),
+        else_=cast(func.round(Card.interval_days * Card.ease_factor), Integer),
+    )
+    ease_factor = func.greatest(
+        settings.scheduler.min_ease,
+        Card.ease_factor + 0.1 - penalty * (0.08 + penalty * 0.02),
+    )
+
+    return {
+        "repetitions": repetitions,
+        "interval_days": interval_days,
+        "ease_factor": ease_factor,
+        "due_at": func.now() + func.make_interval(0, 0, 0, interval_days),
+    }
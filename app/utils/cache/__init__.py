@@ -0,0 +1,42 @@
+__all__ = (
+    "Cache",
+    "CacheMetrics",
+    "CacheUnavailable",
+    "CacheWriter",
+    "LocalCache",
+    "cache_metrics",
+    "cache_writer",
+    "local_cache",
+    "redis_breaker",
+    "CachedMethod",
+    "CircuitBreaker",
+    "cached",
+    "get_access_token_key",
+    "get_args_digest",
+    "get_cache_key",
+    "get_generation_key",
+    "get_invalidation_channel",
+    "get_key_namespace",
+    "is_next_generation",
+    "is_single_parent_filter",
+    "remove_item",
+    "upsert_item",
+)
+
+from .breaker import CacheUnavailable, CircuitBreaker, redis_breaker
+from .client import Cache
+from .decorators import CachedMethod, cached
+from .keys import (
+    get_access_token_key,
+    get_args_digest,
+    get_cache_key,
+    get_generation_key,
+    get_invalidation_channel,
+    get_key_namespace,
+    is_next_generation,
+    is_single_parent_filter,
+)
+from .local import LocalCache, local_cache
+from .metrics import CacheMetrics, cache_metrics
+from .patches import remove_item, upsert_item
+from .writer import CacheWriter, cache_writer
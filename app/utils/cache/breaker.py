@@ -0,0 +1,64 @@
+import time
+
+from app.core.config import settings
+from app.core.loggers import cache_logger as logger
+from .metrics import cache_metrics
+
+
+class CacheUnavailable(Exception):
+    pass
+
+
+# Consecutive-failure circuit breaker in front of the cache's redis commands.
+# While open nothing is sent to redis and cached calls go straight to the
+# database. Once the cool-down is over a single command goes through as a
+# probe: success closes the circuit, failure opens it for another cool-down.
+class CircuitBreaker:
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+
+    @property
+    def open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.cooldown:
+            return False
+        # half-open: the others keep bypassing until the probe is back
+        self.opened_at = now
+        return True
+
+    def success(self) -> None:
+        if self.opened_at is not None:
+            logger.info("Redis answers again, cache circuit closed")
+        self.failures = 0
+        self.opened_at = None
+
+    def failure(self) -> None:
+        self.failures += 1
+        if self.failures < self.threshold:
+            return
+        if self.opened_at is None:
+            logger.warning(
+                "Cache circuit opened after %d redis failures, bypassing redis for %.1fs",
+                self.failures,
+                self.cooldown,
+            )
+        self.opened_at = time.monotonic()
+
+
+redis_breaker = CircuitBreaker(
+    settings.cache.breaker_threshold,
+    settings.cache.breaker_cooldown,
+)
+cache_metrics.register_gauge(
+    "cache_circuit_open",
+    "1 while the cache bypasses redis after consecutive failures.",
+    lambda: int(redis_breaker.open),
+)
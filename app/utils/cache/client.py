@@ -0,0 +1,616 @@
+import asyncio
+import math
+import random
+import time
+import uuid
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Iterable, TypeVar
+
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.loggers import cache_logger as logger
+from .breaker import CacheUnavailable, CircuitBreaker, redis_breaker
+from .codecs import (
+    decode_entry,
+    encode_entry,
+    encode_miss,
+    entry_delta_ms,
+    entry_error,
+    entry_json,
+    entry_matches,
+    entry_stale_at_ms,
+)
+from .keys import (
+    get_cache_key,
+    get_generation_key,
+    get_invalidation_channel,
+    get_key_namespace,
+    is_next_generation,
+)
+from .local import LocalCache, local_cache
+from .metrics import CacheMetrics, cache_metrics
+from .writer import CacheWriter, cache_writer
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+    from app.core.custom_types import BaseIdType
+
+# KEYS: lock; ARGV: token of the holder
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# KEYS: source entry, target entry; ARGV: expected source, target, ttl
+COPY_PATCHED_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+if redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3], 'NX') then
+    return 1
+end
+return 0
+"""
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# fills in flight in this process, by key
+_fills: dict[str, asyncio.Task] = {}
+# background refreshes of stale entries, by key
+_refreshes: dict[str, asyncio.Task] = {}
+
+
+# Entry point for service-level caching: redis behind an optional in-process
+# tier. Keys embed the per-user generation of an entity namespace, so a write
+# invalidates a whole namespace with one INCR. Values are encoded with the
+# configured codec and decoded with the TypeAdapter of the cached type; both
+# tiers hold the encoded entry. Redis commands are bounded by command_timeout
+# behind a circuit breaker; while redis is unavailable reads fall through to
+# the fill and writes are skipped.
+class Cache:
+    def __init__(
+        self,
+        redis: "Redis",
+        local: LocalCache | None = local_cache,
+        metrics: CacheMetrics = cache_metrics,
+        writer: CacheWriter | None = cache_writer,
+        breaker: CircuitBreaker = redis_breaker,
+    ):
+        self.redis = redis
+        self.local = local
+        self.metrics = metrics
+        self.writer = writer
+        self.breaker = breaker
+        self.cfg = settings.cache
+        self._release_lock = redis.register_script(RELEASE_LOCK_SCRIPT)
+        self._copy_patched = redis.register_script(COPY_PATCHED_SCRIPT)
+
+    async def key(
+        self,
+        user_id: "BaseIdType | str",
+        entity: str,
+        *args: str,
+        tags: Iterable[str] = (),
+    ) -> str:
+        # a bump of the entity or of any tag moves the entry to a new key;
+        # raises CacheUnavailable when a generation cannot be read
+        generations = [
+            str(await self.generation(user_id, tag)) for tag in (entity, *tags)
+        ]
+        return get_cache_key(user_id, entity, ".".join(generations), *args)
+
+    async def generation(self, user_id: "BaseIdType | str", entity: str) -> int:
+        generation_key = get_generation_key(user_id, entity)
+        generation = self._local_get(generation_key)
+        if generation is None:
+            local = self.local
+            invalidations = local.invalidations if local is not None else 0
+            generation = int(
+                await self._command("get", self.redis.get, generation_key) or 0
+            )
+            # the number read may predate a bump that landed meanwhile;
+            # keeping it would hide this process's own writes
+            if local is not None and local.invalidations == invalidations:
+                self._local_set(generation_key, generation)
+        return generation
+
+    async def get(self, key: str, adapter: TypeAdapter[T]) -> T | None:
+        # raises the stored error of a negative entry
+        raw = await self._get_raw(key, adapter)
+        return self._decode(raw, adapter) if raw is not None else None
+
+    async def set(
+        self,
+        key: str,
+        value: T,
+        ttl: int,
+        adapter: TypeAdapter[T],
+        delta_ms: int = 0,
+        stale_ttl: int = 0,
+    ) -> bytes:
+        # with stale_ttl the entry lives that much longer, served as stale
+        raw = encode_entry(value, adapter, delta_ms, _stale_at_ms(ttl, stale_ttl))
+        await self._store(key, raw, ttl + stale_ttl)
+        return raw
+
+    # Write-through after a write bumped the generation: `previous_key` is the
+    # entry read before the write, `key` the same entry after the bump. Both
+    # only write when the bump was the sole one in between, anything else
+    # leaves the plain invalidation in place. Failures are logged, not raised.
+    async def put_next(
+        self,
+        previous_key: str,
+        key: str,
+        value: T,
+        ttl: int,
+        adapter: TypeAdapter[T],
+        stale_ttl: int = 0,
+    ) -> bool:
+        ttl = self.ttl_for(value, ttl)
+        if not ttl or not is_next_generation(previous_key, key):
+            return False
+        try:
+            await self.set(
+                key, value, ttl, adapter, stale_ttl=stale_ttl if value else 0
+            )
+        except Exception as e:
+            logger.warning("Cache write-through of %s failed: %r", key, e)
+            return False
+        return True
+
+    async def patch_next(
+        self,
+        previous_key: str,
+        key: str,
+        patch: Callable[[T], T],
+        ttl: int,
+        adapter: TypeAdapter[T],
+        stale_ttl: int = 0,
+    ) -> bool:
+        # carries the previous entry over with `patch` applied; the script
+        # writes only if it is unchanged and the new one was not filled yet
+        if not is_next_generation(previous_key, key):
+            return False
+        try:
+            raw = await self._command("get", self.redis.get, previous_key)
+            if raw is None or not entry_matches(raw, adapter) or entry_error(raw):
+                return False
+
+            value = patch(decode_entry(raw, adapter))
+            ttl = self.ttl_for(value, ttl)
+            if not ttl:
+                return False
+            stale_ttl = stale_ttl if value else 0
+            patched_raw = encode_entry(
+                value, adapter, stale_at_ms=_stale_at_ms(ttl, stale_ttl)
+            )
+            copied = await self._command(
+                "evalsha",
+                self._copy_patched,
+                keys=[previous_key, key],
+                args=[raw, patched_raw, ttl + stale_ttl],
+            )
+        except Exception as e:
+            logger.warning("Cache patch of %s failed: %r", key, e)
+            return False
+
+        if not copied:
+            return False
+        self.metrics.set(get_key_namespace(key), len(patched_raw))
+        self._local_set(key, patched_raw, ttl)
+        return True
+
+    def ttl_for(self, value: Any, ttl: int) -> int:
+        # empty values are negative entries; 0 means not to store the value
+        if value:
+            return ttl
+        return min(ttl, self.cfg.negative_ttl)
+
+    async def set_many(
+        self,
+        entries: Iterable[tuple[str, Any, int, TypeAdapter, int]],
+    ) -> int:
+        # (key, value, ttl, adapter, stale_ttl) entries written in one round trip
+        encoded = [
+            (
+                key,
+                encode_entry(value, adapter, stale_at_ms=_stale_at_ms(ttl, stale_ttl)),
+                ttl + stale_ttl,
+            )
+            for key, value, ttl, adapter, stale_ttl in entries
+        ]
+        if not encoded:
+            return 0
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, raw, ttl in encoded:
+                pipe.set(key, raw, ex=ttl)
+            await self._command("pipeline", pipe.execute)
+
+        for key, raw, ttl in encoded:
+            self.metrics.set(get_key_namespace(key), len(raw))
+            self._local_set(key, raw, ttl)
+        return len(encoded)
+
+    async def get_or_fill(
+        self,
+        key: str,
+        fill: Callable[[], Awaitable[T | None]],
+        ttl: int,
+        adapter: TypeAdapter[T],
+        stale_ttl: int = 0,
+        refill: Callable[[], Awaitable[T | None]] | None = None,
+    ) -> T | None:
+        # `fill` returns the value to cache, None leaves the key empty. Past
+        # ttl and within stale_ttl the entry is still returned and `refill`
+        # (`fill` by default) replaces it in the background.
+        raw, value = await self._single_flight(
+            key, fill, ttl, adapter, stale_ttl, refill
+        )
+        if value is None and raw is not None:
+            value = self._decode(raw, adapter)
+        return value
+
+    async def get_or_fill_json(
+        self,
+        key: str,
+        fill: Callable[[], Awaitable[T | None]],
+        ttl: int,
+        adapter: TypeAdapter[T],
+        stale_ttl: int = 0,
+        refill: Callable[[], Awaitable[T | None]] | None = None,
+    ) -> bytes | None:
+        # same as get_or_fill, but hands back the JSON the entry was stored as,
+        # ready to be sent without validating and serializing it again
+        raw, _ = await self._single_flight(key, fill, ttl, adapter, stale_ttl, refill)
+        if raw is None:
+            return None
+        self._raise_error(raw)
+        return entry_json(raw, adapter)
+
+    async def delete(self, *keys: str) -> None:
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.delete(*keys)
+                pipe.publish(get_invalidation_channel(), "\n".join(keys))
+                await self._command("pipeline", pipe.execute)
+        except CacheUnavailable as e:
+            logger.error("Cache delete of %s skipped: %s", keys, e)
+        for key in keys:
+            self.metrics.invalidation(get_key_namespace(key))
+        self.invalidate_local(keys)
+
+    async def bump(
+        self,
+        users_ids: Iterable["BaseIdType | str"],
+        *entities: str,
+    ) -> None:
+        # a generation that expires restarts from 0; that is safe only because
+        # generation_ttl is far longer than any entry ttl. A bump lost while
+        # redis is unavailable leaves the entries readable until their ttl.
+        generation_keys = [
+            get_generation_key(user_id, entity)
+            for user_id in {str(user_id) for user_id in users_ids}
+            for entity in entities
+        ]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for generation_key in generation_keys:
+                pipe.incr(generation_key)
+                pipe.expire(generation_key, self.cfg.generation_ttl)
+            pipe.publish(get_invalidation_channel(), "\n".join(generation_keys))
+            try:
+                await self._command("pipeline", pipe.execute)
+            except CacheUnavailable as e:
+                logger.error("Cache bump of %s skipped: %s", generation_keys, e)
+        for entity in entities:
+            self.metrics.invalidation(entity)
+        self.invalidate_local(generation_keys)
+
+    def invalidate_local(self, keys: Iterable[str]) -> None:
+        if self.local is not None:
+            self.local.delete(*keys)
+
+    async def _get_raw(self, key: str, adapter: TypeAdapter) -> bytes | None:
+        namespace = get_key_namespace(key)
+        raw = self._local_get(key)
+        if raw is not None and entry_matches(raw, adapter):
+            self.metrics.hit(namespace, "local", len(raw))
+            return raw
+
+        try:
+            raw = await self._command("get", self.redis.get, key)
+        except CacheUnavailable:
+            raw = None
+        if raw is None or not entry_matches(raw, adapter):
+            self.metrics.miss(namespace)
+            return None
+
+        self.metrics.hit(namespace, "redis", len(raw))
+        self._local_set(key, raw)
+        return raw
+
+    async def _single_flight(
+        self,
+        key: str,
+        fill: Callable[[], Awaitable[T | None]],
+        ttl: int,
+        adapter: TypeAdapter[T],
+        stale_ttl: int = 0,
+        refill: Callable[[], Awaitable[T | None]] | None = None,
+    ) -> tuple[bytes | None, T | None]:
+        # the stored entry, plus the value itself when this call filled it
+        raw = self._local_get(key)
+        if raw is not None and entry_matches(raw, adapter):
+            self.metrics.hit(get_key_namespace(key), "local", len(raw))
+            self._revalidate_stale(key, raw, refill or fill, ttl, adapter, stale_ttl)
+            return raw, None
+
+        task = _fills.get(key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._get_or_fill(key, fill, ttl, adapter, stale_ttl, refill)
+            )
+            _fills[key] = task
+            task.add_done_callback(lambda _: _fills.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _get_or_fill(
+        self,
+        key: str,
+        fill: Callable[[], Awaitable[T | None]],
+        ttl: int,
+        adapter: TypeAdapter[T],
+        stale_ttl: int = 0,
+        refill: Callable[[], Awaitable[T | None]] | None = None,
+    ) -> tuple[bytes | None, T | None]:
+        try:
+            return await self._get_or_fill_locked(
+                key, fill, ttl, adapter, stale_ttl, refill
+            )
+        except CacheUnavailable:
+            # still single-flight within the process, and kept in the local tier
+            return await self._fill(key, fill, ttl, adapter, stale_ttl)
+
+    async def _get_or_fill_locked(
+        self,
+        key: str,
+        fill: Callable[[], Awaitable[T | None]],
+        ttl: int,
+        adapter: TypeAdapter[T],
+        stale_ttl: int = 0,
+        refill: Callable[[], Awaitable[T | None]] | None = None,
+    ) -> tuple[bytes | None, T | None]:
+        lock_key = f"{key}:lock"
+        deadline = time.monotonic() + self.cfg.fill_wait_timeout
+        while True:
+            raw, expires_early = await self._read(key)
+            if raw is not None and not entry_matches(raw, adapter):
+                raw = None
+            if raw is not None and not expires_early:
+                self.metrics.hit(get_key_namespace(key), "redis", len(raw))
+                self._local_set(key, raw)
+                self._revalidate_stale(
+                    key, raw, refill or fill, ttl, adapter, stale_ttl
+                )
+                return raw, None
+
+            token = await self._acquire_lock(lock_key)
+            if token:
+                return await self._fill(
+                    key, fill, ttl, adapter, stale_ttl, (lock_key, token)
+                )
+
+            if raw is not None:
+                # another worker recomputes it early, the entry is still valid
+                self.metrics.hit(get_key_namespace(key), "redis", len(raw))
+                return raw, None
+            if time.monotonic() >= deadline:
+                logger.warning("Cache fill wait timed out: %s", key)
+                return await self._fill(key, fill, ttl, adapter, stale_ttl)
+            await asyncio.sleep(self.cfg.fill_poll_interval)
+
+    async def _read(self, key: str) -> tuple[bytes | None, bool]:
+        if not self.cfg.xfetch_enabled:
+            return await self._command("get", self.redis.get, key), False
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.pttl(key)
+            raw, ttl_ms = await self._command("pipeline", pipe.execute)
+        if raw is None:
+            return None, False
+
+        # XFetch: recompute before expiry with a probability that grows as
+        # the entry ages, scaled by how long the last fill took
+        delta_ms = entry_delta_ms(raw)
+        gap_ms = -delta_ms * self.cfg.xfetch_beta * math.log(1.0 - random.random())
+        return raw, ttl_ms > 0 and gap_ms >= ttl_ms
+
+    async def _fill(
+        self,
+        key: str,
+        fill: Callable[[], Awaitable[T | None]],
+        ttl: int,
+        adapter: TypeAdapter[T],
+        stale_ttl: int = 0,
+        lock: tuple[str, str] | None = None,
+    ) -> tuple[bytes | None, T | None]:
+        # the fill lock, if held, is released once the entry is in redis
+        handed_over = False
+        try:
+            self.metrics.miss(get_key_namespace(key))
+            started = time.monotonic()
+            try:
+                value = await fill()
+            except ValueError as e:
+                if self.cfg.negative_ttl and str(e) in self.cfg.negative_errors:
+                    handed_over = await self._store_later(
+                        key,
+                        encode_miss(str(e), adapter),
+                        min(ttl, self.cfg.negative_ttl),
+                        lock,
+                    )
+                raise
+            if value is None:
+                return None, None
+
+            ttl = self.ttl_for(value, ttl)
+            if not ttl:
+                return None, value
+            if not value:
+                # negative entries are not worth serving stale
+                stale_ttl = 0
+
+            delta_ms = int((time.monotonic() - started) * 1000)
+            raw = encode_entry(value, adapter, delta_ms, _stale_at_ms(ttl, stale_ttl))
+            handed_over = await self._store_later(key, raw, ttl + stale_ttl, lock)
+            return raw, value
+        finally:
+            if lock is not None and not handed_over:
+                await self._release(*lock)
+
+    def _revalidate_stale(
+        self,
+        key: str,
+        raw: bytes,
+        fill: Callable[[], Awaitable[T | None]],
+        ttl: int,
+        adapter: TypeAdapter[T],
+        stale_ttl: int,
+    ) -> None:
+        stale_at_ms = entry_stale_at_ms(raw)
+        if not stale_at_ms or time.time() * 1000 < stale_at_ms:
+            return
+        if key in _refreshes:
+            return
+
+        task = asyncio.ensure_future(self._refresh(key, fill, ttl, adapter, stale_ttl))
+        _refreshes[key] = task
+        task.add_done_callback(lambda _: _refreshes.pop(key, None))
+
+    async def _refresh(
+        self,
+        key: str,
+        fill: Callable[[], Awaitable[T | None]],
+        ttl: int,
+        adapter: TypeAdapter[T],
+        stale_ttl: int,
+    ) -> None:
+        # the fill lock makes it one refresh per key across workers too
+        lock_key = f"{key}:lock"
+        try:
+            token = await self._acquire_lock(lock_key)
+            if token:
+                await self._fill(key, fill, ttl, adapter, stale_ttl, (lock_key, token))
+        except Exception as e:
+            logger.warning("Cache refresh of %s failed: %r", key, e)
+
+    async def _acquire_lock(self, lock_key: str) -> str | None:
+        token = uuid.uuid4().hex
+        locked = await self._command(
+            "set",
+            self.redis.set,
+            lock_key,
+            token,
+            nx=True,
+            px=self.cfg.fill_lock_ttl_ms,
+        )
+        return token if locked else None
+
+    async def _release(self, lock_key: str, token: str) -> None:
+        # a lock that cannot be released expires with fill_lock_ttl_ms
+        try:
+            await self._command(
+                "evalsha", self._release_lock, keys=[lock_key], args=[token]
+            )
+        except CacheUnavailable:
+            pass
+
+    async def _store(self, key: str, raw: bytes, ttl: int) -> None:
+        self._local_set(key, raw, ttl)
+        await self._store_remote(key, raw, ttl)
+
+    async def _store_remote(self, key: str, raw: bytes, ttl: int) -> None:
+        # a write lost while redis is unavailable is filled again later
+        try:
+            await self._command("set", self.redis.set, key, raw, ex=ttl)
+        except CacheUnavailable:
+            return
+        self.metrics.set(get_key_namespace(key), len(raw))
+
+    async def _store_later(
+        self,
+        key: str,
+        raw: bytes,
+        ttl: int,
+        lock: tuple[str, str] | None,
+    ) -> bool:
+        # True when the background writer took over the write and the lock
+        if self.writer is None or not self.writer.running:
+            await self._store(key, raw, ttl)
+            return False
+
+        self._local_set(key, raw, ttl)
+
+        async def write() -> None:
+            try:
+                await self._store_remote(key, raw, ttl)
+            finally:
+                if lock is not None:
+                    await self._release(*lock)
+
+        if self.writer.submit(write):
+            return True
+        self.metrics.dropped_write(get_key_namespace(key))
+        return False
+
+    async def _command(
+        self,
+        command: str,
+        call: Callable[..., Awaitable[R]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> R:
+        # every redis round trip of the cache goes through here
+        if not self.breaker.allow():
+            self.metrics.redis_error(command, "open")
+            raise CacheUnavailable(f"{command}: circuit open")
+        try:
+            with self.metrics.timed(command):
+                result = await asyncio.wait_for(
+                    call(*args, **kwargs), self.cfg.command_timeout
+                )
+        except (asyncio.TimeoutError, RedisError, OSError) as e:
+            timed_out = isinstance(e, asyncio.TimeoutError)
+            self.metrics.redis_error(command, "timeout" if timed_out else "error")
+            self.breaker.failure()
+            raise CacheUnavailable(f"{command}: {e!r}") from e
+        self.breaker.success()
+        return result
+
+    def _decode(self, raw: bytes, adapter: TypeAdapter[T]) -> T:
+        self._raise_error(raw)
+        return decode_entry(raw, adapter)
+
+    @staticmethod
+    def _raise_error(raw: bytes) -> None:
+        error = entry_error(raw)
+        if error is not None:
+            raise ValueError(error)
+
+    def _local_get(self, key: str) -> Any | None:
+        if self.local is None:
+            return None
+        return self.local.get(key)
+
+    def _local_set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        if self.local is not None:
+            self.local.set(key, value, ttl)
+
+
+def _stale_at_ms(ttl: int, stale_ttl: int) -> int:
+    return int(time.time() * 1000) + ttl * 1000 if stale_ttl else 0
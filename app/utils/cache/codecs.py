@@ -0,0 +1,151 @@
+import hashlib
+import json
+from functools import cache
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Pydantic-core serializes straight to JSON bytes and validates them back in
+# one pass, which is what orjson would buy us without the intermediate dicts.
+class JsonCodec:
+    name = b"j"
+
+    def encode(self, value: Any, adapter: TypeAdapter) -> bytes:
+        return adapter.dump_json(value)
+
+    def decode(self, data: bytes, adapter: TypeAdapter) -> Any:
+        return adapter.validate_json(data)
+
+
+class MsgpackCodec:
+    name = b"m"
+
+    def encode(self, value: Any, adapter: TypeAdapter) -> bytes:
+        return msgpack.packb(adapter.dump_python(value, mode="json"))
+
+    def decode(self, data: bytes, adapter: TypeAdapter) -> Any:
+        return adapter.validate_python(msgpack.unpackb(data))
+
+
+CODECS = {
+    "json": JsonCodec(),
+    "msgpack": MsgpackCodec(),
+}
+CODECS_BY_NAME = {codec.name: codec for codec in CODECS.values()}
+MISS = b"!"
+
+if settings.cache.codec not in CODECS:
+    raise RuntimeError(f"Unknown cache codec {settings.cache.codec!r}")
+if settings.cache.codec == "msgpack" and msgpack is None:
+    raise RuntimeError("The msgpack cache codec requires the 'msgpack' package")
+
+_compressor = (
+    zstandard.ZstdCompressor(level=settings.cache.compression_level)
+    if zstandard is not None
+    else None
+)
+_decompressor = zstandard.ZstdDecompressor() if zstandard is not None else None
+
+
+@cache
+def schema_version(adapter: TypeAdapter) -> bytes:
+    # 8 hex chars of the JSON schema hash: any model change yields a new one
+    schema = json.dumps(adapter.json_schema(), sort_keys=True).encode()
+    return hashlib.blake2b(schema, digest_size=4).hexdigest().encode()
+
+
+# Entry layout: <codec><compression><schema version><delta_ms>[:<stale_at>]|<body>,
+# e.g. b"jz1a2b3c4d12|...". The header names its own codec, so entries written
+# before a codec switch stay readable; entries of another schema version are
+# treated as missing. stale_at (epoch ms) marks entries served
+# stale-while-revalidate past that moment.
+# Negative entries use the MISS codec byte and carry the error message.
+def encode_entry(
+    value: Any,
+    adapter: TypeAdapter,
+    delta_ms: int = 0,
+    stale_at_ms: int = 0,
+) -> bytes:
+    codec = CODECS[settings.cache.codec]
+    body = codec.encode(value, adapter)
+
+    compression = b"-"
+    threshold = settings.cache.compression_threshold
+    if _compressor is not None and threshold and len(body) >= threshold:
+        body = _compressor.compress(body)
+        compression = b"z"
+
+    timings = b"%d:%d" % (delta_ms, stale_at_ms) if stale_at_ms else b"%d" % delta_ms
+    return b"%s%s%s%s|%s" % (
+        codec.name,
+        compression,
+        schema_version(adapter),
+        timings,
+        body,
+    )
+
+
+def encode_miss(error: str, adapter: TypeAdapter) -> bytes:
+    # negative entry: the error the lookup failed with instead of a body
+    return b"%s-%s0|%s" % (MISS, schema_version(adapter), error.encode())
+
+
+def entry_error(raw: bytes) -> str | None:
+    if raw[:1] != MISS:
+        return None
+    return raw.partition(b"|")[2].decode()
+
+
+def entry_delta_ms(raw: bytes) -> int:
+    return _entry_timings(raw)[0]
+
+
+def entry_stale_at_ms(raw: bytes) -> int:
+    # 0 for entries that never go stale before they expire
+    return _entry_timings(raw)[1]
+
+
+def _entry_timings(raw: bytes) -> tuple[int, int]:
+    header, _, _ = raw.partition(b"|")
+    delta_ms, _, stale_at_ms = header[10:].partition(b":")
+    return int(delta_ms), int(stale_at_ms or 0)
+
+
+def entry_matches(raw: bytes, adapter: TypeAdapter) -> bool:
+    return raw[2:10] == schema_version(adapter)
+
+
+def _entry_body(raw: bytes) -> tuple[bytes, bytes]:
+    header, _, body = raw.partition(b"|")
+    if header[1:2] == b"z":
+        if _decompressor is None:
+            raise RuntimeError("Cache entry is zstd-compressed, install 'zstandard'")
+        body = _decompressor.decompress(body)
+    return header[:1], body
+
+
+def decode_entry(raw: bytes, adapter: TypeAdapter) -> Any:
+    codec_name, body = _entry_body(raw)
+    return CODECS_BY_NAME[codec_name].decode(body, adapter)
+
+
+def entry_json(raw: bytes, adapter: TypeAdapter) -> bytes:
+    # the body as JSON bytes, transcoding only entries of a non-JSON codec
+    codec_name, body = _entry_body(raw)
+    codec = CODECS_BY_NAME[codec_name]
+    if isinstance(codec, JsonCodec):
+        return body
+    return adapter.dump_json(codec.decode(body, adapter))
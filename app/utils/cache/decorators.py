@@ -0,0 +1,257 @@
+import copy
+import inspect
+from typing import TYPE_CHECKING, Any, Callable, Generic, TypeVar, get_type_hints
+
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.core.loggers import cache_logger as logger
+from app.models import db_helper
+from .breaker import CacheUnavailable
+from .keys import get_args_digest
+
+if TYPE_CHECKING:
+    from .client import Cache
+
+T = TypeVar("T")
+
+
+# Caches an async service method in `self.cache` (an app.utils.cache.Cache).
+#
+#   @cached("roadmaps", "list", ttl="roadmap_list_ttl", adapter=...)
+#   async def _get_by_filters(self, current_user, filters) -> list[RoadmapRead]:
+#
+# The key is scoped to the user passed as `user` (None shares one entry
+# between all users) and to the generations of `entity` and `tags`, so
+# Cache.bump of any of them invalidates it. The remaining arguments are
+# hashed canonically. `ttl` is a CacheConfig field or seconds, `adapter`
+# defaults to one built from the return annotation. `when` gets the call
+# arguments and returns False to bypass the cache. Empty results and
+# NOT_FOUND errors are kept as negative entries, see Cache.ttl_for.
+# `stale_ttl` (a CacheConfig field or seconds) serves expired entries that
+# long while the method reruns in the background. Fills and refills run on
+# their own DB session: the instance is copied with `repo` rebuilt on it.
+#
+# `await self._get_by_filters.json(...)` returns the cached JSON bytes as
+# they are stored, without building models.
+def cached(
+    entity: str,
+    *scope: str,
+    ttl: str | int | None = None,
+    adapter: TypeAdapter | None = None,
+    tags: tuple[str, ...] = (),
+    user: str | None = "current_user",
+    when: Callable[..., bool] | None = None,
+    stale_ttl: str | int = 0,
+) -> Callable[[Callable[..., Any]], "CachedMethod"]:
+    def decorator(func: Callable[..., Any]) -> CachedMethod:
+        return CachedMethod(
+            func,
+            entity=entity,
+            scope=scope,
+            ttl=ttl,
+            adapter=adapter,
+            tags=tags,
+            user=user,
+            when=when,
+            stale_ttl=stale_ttl,
+        )
+
+    return decorator
+
+
+class CachedMethod(Generic[T]):
+    def __init__(
+        self,
+        func: Callable[..., Any],
+        entity: str,
+        scope: tuple[str, ...],
+        ttl: str | int | None,
+        adapter: TypeAdapter[T] | None,
+        tags: tuple[str, ...],
+        user: str | None,
+        when: Callable[..., bool] | None,
+        stale_ttl: str | int,
+    ):
+        self.func = func
+        self.entity = entity
+        self.scope = scope
+        self.ttl = ttl
+        self.tags = tags
+        self.user = user
+        self.when = when
+        self.stale_ttl = stale_ttl
+        self.signature = inspect.signature(func)
+        self.name = f"{func.__module__}.{func.__qualname__}"
+        self._adapter = adapter
+
+    def __get__(self, instance: Any, owner: type | None = None) -> Any:
+        if instance is None:
+            return self
+        return BoundCachedMethod(self, instance)
+
+    @property
+    def adapter(self) -> TypeAdapter[T]:
+        if self._adapter is None:
+            try:
+                return_type = get_type_hints(self.func)["return"]
+            except (KeyError, NameError) as e:
+                raise TypeError(
+                    f"{self.name} needs a resolvable return annotation or an adapter"
+                ) from e
+            self._adapter = TypeAdapter(return_type)
+        return self._adapter
+
+    def get_ttl(self) -> int:
+        if self.ttl is None:
+            return settings.cache.default_ttl
+        return _setting(self.ttl)
+
+    def get_stale_ttl(self) -> int:
+        return _setting(self.stale_ttl)
+
+    async def key(self, cache: "Cache", *args, **kwargs) -> str | None:
+        # the key a call with these arguments reads, e.g. to prefill it;
+        # None while redis is unavailable
+        try:
+            return await self.get_key(cache, None, args, kwargs)
+        except CacheUnavailable:
+            return None
+
+    async def put(
+        self,
+        cache: "Cache",
+        previous_key: str | None,
+        value: T,
+        *args,
+        **kwargs,
+    ) -> bool:
+        # write-through of a call's result, see Cache.put_next
+        key = await self.key(cache, *args, **kwargs)
+        if previous_key is None or key is None:
+            return False
+        return await cache.put_next(
+            previous_key,
+            key,
+            value,
+            self.get_ttl(),
+            self.adapter,
+            self.get_stale_ttl(),
+        )
+
+    async def patch(
+        self,
+        cache: "Cache",
+        previous_key: str | None,
+        patch: Callable[[T], T],
+        *args,
+        **kwargs,
+    ) -> bool:
+        # write-through of an edit to a call's cached result, see Cache.patch_next
+        key = await self.key(cache, *args, **kwargs)
+        if previous_key is None or key is None:
+            return False
+        return await cache.patch_next(
+            previous_key,
+            key,
+            patch,
+            self.get_ttl(),
+            self.adapter,
+            self.get_stale_ttl(),
+        )
+
+    async def get_key(self, cache: "Cache", instance: Any, args, kwargs) -> str:
+        bound = self.signature.bind(instance, *args, **kwargs)
+        bound.apply_defaults()
+        arguments = dict(bound.arguments)
+        arguments.pop(next(iter(self.signature.parameters)))
+
+        user_id = "all"
+        if self.user is not None:
+            user_id = str(arguments.pop(self.user).id)
+
+        return await cache.key(
+            user_id,
+            self.entity,
+            *self.scope,
+            get_args_digest(self.name, arguments),
+            tags=self.tags,
+        )
+
+    async def call(self, instance: Any, args, kwargs, raw: bool) -> Any:
+        cache: "Cache" = instance.cache
+        key = None
+        if self.when is None or self.when(*args, **kwargs):
+            key = await self.key(cache, *args, **kwargs)
+        if key is None:
+            # bypassed by `when`, or redis is unavailable
+            value = await self.func(instance, *args, **kwargs)
+            return self.adapter.dump_json(value) if raw else value
+
+        loaded = []
+
+        async def refill() -> T | None:
+            async with db_helper.session_factory() as session:
+                detached = copy.copy(instance)
+                detached.repo = type(instance.repo)(session)
+                return await self.func(detached, *args, **kwargs)
+
+        async def fill() -> T | None:
+            # single-flight: concurrent callers wait on this fill, which must
+            # not depend on the first caller's request and its DB session
+            value = await refill()
+            loaded.append(value)
+            return value
+
+        get_or_fill = cache.get_or_fill_json if raw else cache.get_or_fill
+        result = await get_or_fill(
+            key,
+            fill,
+            self.get_ttl(),
+            self.adapter,
+            self.get_stale_ttl(),
+            refill,
+        )
+        if result is not None:
+            return result
+
+        # nothing stored: negative entries are disabled and the result was empty
+        if not loaded:
+            logger.debug("Empty result for %r, loading uncached", key)
+            loaded.append(await self.func(instance, *args, **kwargs))
+        return self.adapter.dump_json(loaded[0]) if raw else loaded[0]
+
+
+def _setting(value: str | int) -> int:
+    return getattr(settings.cache, value) if isinstance(value, str) else value
+
+
+class BoundCachedMethod:
+    def __init__(self, method: CachedMethod, instance: Any):
+        self.method = method
+        self.instance = instance
+
+    async def __call__(self, *args, **kwargs) -> Any:
+        return await self.method.call(self.instance, args, kwargs, raw=False)
+
+    async def json(self, *args, **kwargs) -> bytes:
+        return await self.method.call(self.instance, args, kwargs, raw=True)
+
+    async def key(self, *args, **kwargs) -> str:
+        return await self.method.key(self.instance.cache, *args, **kwargs)
+
+    async def put(self, previous_key: str, value: Any, *args, **kwargs) -> bool:
+        return await self.method.put(
+            self.instance.cache, previous_key, value, *args, **kwargs
+        )
+
+    async def patch(
+        self,
+        previous_key: str,
+        patch: Callable[[Any], Any],
+        *args,
+        **kwargs,
+    ) -> bool:
+        return await self.method.patch(
+            self.instance.cache, previous_key, patch, *args, **kwargs
+        )
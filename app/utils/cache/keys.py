@@ -0,0 +1,88 @@
+import hashlib
+import json
+from enum import Enum
+from typing import TYPE_CHECKING, Any
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from app.core.custom_types import BaseIdType
+
+
+def get_generation_key(user_id: "BaseIdType | str", entity: str) -> str:
+    cfg = settings.cache
+    return ":".join((cfg.prefix, cfg.version, "generation", entity, str(user_id)))
+
+
+def get_cache_key(
+    user_id: "BaseIdType | str",
+    entity: str,
+    generation: int | str,
+    *args: str,
+) -> str:
+    cfg = settings.cache
+    return ":".join(
+        (cfg.prefix, cfg.version, entity, str(user_id), f"g{generation}", *args)
+    )
+
+
+def get_access_token_key(token: str) -> str:
+    # hashed, a key listing must not hand out bearer tokens
+    cfg = settings.cache
+    return ":".join((cfg.prefix, cfg.version, "tokens", get_args_digest(token)))
+
+
+def get_invalidation_channel() -> str:
+    cfg = settings.cache
+    return ":".join((cfg.prefix, cfg.version, cfg.invalidation_channel))
+
+
+def is_single_parent_filter(filters: dict, parent: str) -> bool:
+    return set(filters.keys()) == {parent}
+
+
+def get_key_namespace(key: str) -> str:
+    # entity segment of entry and generation keys, see the builders above
+    parts = key.split(":")
+    if len(parts) > 3 and parts[2] == "generation":
+        return parts[3]
+    return parts[2] if len(parts) > 2 else "unknown"
+
+
+def is_next_generation(previous_key: str, key: str) -> bool:
+    # same entry one generation later, see get_cache_key for the layout
+    previous, current = previous_key.split(":"), key.split(":")
+    if len(previous) != len(current) or len(previous) < 5:
+        return False
+    if previous[:4] != current[:4] or previous[5:] != current[5:]:
+        return False
+
+    previous_generations = previous[4][1:].split(".")
+    generations = current[4][1:].split(".")
+    return (
+        int(generations[0]) == int(previous_generations[0]) + 1
+        and generations[1:] == previous_generations[1:]
+    )
+
+
+def get_args_digest(*values: Any) -> str:
+    # stable across processes, unlike hash() which is salted per interpreter
+    payload = json.dumps(
+        values,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=_canonical,
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+
+def _canonical(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", exclude_none=True, exclude_unset=True)
+    if isinstance(value, (set, frozenset)):
+        return sorted(value, key=str)
+    if isinstance(value, Enum):
+        return value.value
+    return str(value)
@@ -0,0 +1,78 @@
+import time
+from collections import OrderedDict
+from typing import Any
+
+from app.core.config import settings
+
+
+def _sizeof(value: Any) -> int:
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return 64
+
+
+# Per-process LRU bounded by the total payload size. Entries also carry a
+# short ttl so a missed invalidation message can only serve stale data for
+# that long. `invalidations` counts delete() and clear() calls, so a reader
+# can tell that a value it loaded may have been invalidated meanwhile.
+class LocalCache:
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[str, tuple[float, Any, int]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._pop(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        size = _sizeof(value)
+        self._pop(key)
+        if size > self.max_bytes:
+            return
+
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (time.monotonic() + ttl, value, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def delete(self, *keys: str) -> None:
+        self.invalidations += 1
+        for key in keys:
+            self._pop(key)
+
+    def clear(self) -> None:
+        self.invalidations += 1
+        self._entries.clear()
+        self.size = 0
+
+    def _pop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[2]
+
+
+local_cache = (
+    LocalCache(
+        max_bytes=settings.cache.local_max_bytes,
+        ttl=settings.cache.local_ttl,
+    )
+    if settings.cache.local_enabled
+    else None
+)
@@ -0,0 +1,160 @@
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+# seconds; redis round trips on a healthy network sit in the first buckets
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+# Per-process counters of the service cache, labelled by namespace (the
+# entity part of the key: roadmaps, blocks, cards, users). Rendered in the
+# Prometheus text format by the metrics endpoint.
+class CacheMetrics:
+    def __init__(self):
+        self.hits: dict[tuple[str, str], int] = defaultdict(int)
+        self.misses: dict[str, int] = defaultdict(int)
+        self.sets: dict[str, int] = defaultdict(int)
+        self.invalidations: dict[str, int] = defaultdict(int)
+        self.bytes_read: dict[str, int] = defaultdict(int)
+        self.bytes_written: dict[str, int] = defaultdict(int)
+        self.latency: dict[str, Histogram] = defaultdict(Histogram)
+        self.dropped_writes: dict[str, int] = defaultdict(int)
+        self.redis_errors: dict[tuple[str, str], int] = defaultdict(int)
+        self.gauges: dict[str, tuple[str, Callable[[], float]]] = {}
+
+    def hit(self, namespace: str, tier: str, size: int) -> None:
+        self.hits[namespace, tier] += 1
+        self.bytes_read[namespace] += size
+
+    def miss(self, namespace: str) -> None:
+        self.misses[namespace] += 1
+
+    def set(self, namespace: str, size: int) -> None:
+        self.sets[namespace] += 1
+        self.bytes_written[namespace] += size
+
+    def invalidation(self, namespace: str, count: int = 1) -> None:
+        self.invalidations[namespace] += count
+
+    def dropped_write(self, namespace: str) -> None:
+        self.dropped_writes[namespace] += 1
+
+    def redis_error(self, command: str, reason: str) -> None:
+        self.redis_errors[command, reason] += 1
+
+    def register_gauge(
+        self,
+        name: str,
+        help_text: str,
+        read: Callable[[], float],
+    ) -> None:
+        # sampled when rendered
+        self.gauges[name] = (help_text, read)
+
+    @contextmanager
+    def timed(self, command: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.latency[command].observe(time.perf_counter() - started)
+
+    def render(self) -> str:
+        lines = []
+
+        def counter(name: str, help_text: str, samples: dict, label: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in sorted(samples.items()):
+                lines.append(f"{name}{{{label.format(*_as_tuple(labels))}}} {value}")
+
+        counter(
+            "cache_hits_total",
+            "Cache hits by namespace and tier.",
+            self.hits,
+            'namespace="{}",tier="{}"',
+        )
+        counter(
+            "cache_misses_total",
+            "Cache misses that ran a fill.",
+            self.misses,
+            'namespace="{}"',
+        )
+        counter("cache_sets_total", "Entries written.", self.sets, 'namespace="{}"')
+        counter(
+            "cache_invalidations_total",
+            "Generation bumps and key deletions.",
+            self.invalidations,
+            'namespace="{}"',
+        )
+        counter(
+            "cache_read_bytes_total",
+            "Encoded bytes served from the cache.",
+            self.bytes_read,
+            'namespace="{}"',
+        )
+        counter(
+            "cache_written_bytes_total",
+            "Encoded bytes written to the cache.",
+            self.bytes_written,
+            'namespace="{}"',
+        )
+
+        counter(
+            "cache_dropped_writes_total",
+            "Background cache writes dropped on a full queue.",
+            self.dropped_writes,
+            'namespace="{}"',
+        )
+        counter(
+            "cache_redis_errors_total",
+            "Redis commands of the cache that failed, timed out or were skipped "
+            "by the open circuit.",
+            self.redis_errors,
+            'command="{}",reason="{}"',
+        )
+
+        for name, (help_text, read) in sorted(self.gauges.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {read()}")
+
+        name = "cache_redis_command_seconds"
+        lines.append(f"# HELP {name} Latency of redis commands issued by the cache.")
+        lines.append(f"# TYPE {name} histogram")
+        for command, histogram in sorted(self.latency.items()):
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{command="{command}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(
+                f'{name}_bucket{{command="{command}",le="+Inf"}} {histogram.count}'
+            )
+            lines.append(f'{name}_sum{{command="{command}"}} {histogram.sum}')
+            lines.append(f'{name}_count{{command="{command}"}} {histogram.count}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _as_tuple(labels: str | tuple) -> tuple:
+    return labels if isinstance(labels, tuple) else (labels,)
+
+
+cache_metrics = CacheMetrics()
@@ -0,0 +1,23 @@
+from typing import TYPE_CHECKING, Any, Callable
+
+if TYPE_CHECKING:
+    from app.core.custom_types import BaseIdType
+
+# In-place edits of cached lists of *Read models, see Cache.patch_next.
+
+
+def upsert_item(item: Any) -> Callable[[list], list]:
+    def patch(items: list) -> list:
+        patched = [item if existing.id == item.id else existing for existing in items]
+        if not any(existing.id == item.id for existing in items):
+            patched.append(item)
+        return patched
+
+    return patch
+
+
+def remove_item(item_id: "BaseIdType") -> Callable[[list], list]:
+    def patch(items: list) -> list:
+        return [existing for existing in items if existing.id != item_id]
+
+    return patch
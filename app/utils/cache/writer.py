@@ -0,0 +1,64 @@
+import asyncio
+from typing import Awaitable, Callable
+
+from app.core.config import settings
+from app.core.loggers import cache_logger as logger
+from .metrics import cache_metrics
+
+
+# Bounded queue of cache writes run by a few background consumers, so a miss
+# answers as soon as its value is loaded. A full queue drops the write: the
+# entry is simply filled again by a later miss. Until run() is started (e.g.
+# outside the app lifespan) `running` is False and callers write inline.
+class CacheWriter:
+    def __init__(self, max_size: int, concurrency: int):
+        self.queue: asyncio.Queue[Callable[[], Awaitable[None]]] = asyncio.Queue(
+            max_size
+        )
+        self.concurrency = concurrency
+        self.running = False
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+    def submit(self, write: Callable[[], Awaitable[None]]) -> bool:
+        try:
+            self.queue.put_nowait(write)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def run(self) -> None:
+        self.running = True
+        try:
+            await asyncio.gather(*(self._consume() for _ in range(self.concurrency)))
+        finally:
+            self.running = False
+
+    async def drain(self) -> None:
+        while not self.queue.empty():
+            await self._write(self.queue.get_nowait())
+
+    async def _consume(self) -> None:
+        while True:
+            await self._write(await self.queue.get())
+
+    async def _write(self, write: Callable[[], Awaitable[None]]) -> None:
+        try:
+            await write()
+        except Exception as e:
+            logger.warning("Background cache write failed: %r", e)
+        finally:
+            self.queue.task_done()
+
+
+cache_writer = CacheWriter(
+    settings.cache.writer_queue_size,
+    settings.cache.writer_concurrency,
+)
+cache_metrics.register_gauge(
+    "cache_writer_queue_depth",
+    "Cache writes waiting for the background writer.",
+    lambda: cache_writer.depth,
+)
@@ -1,31 +1,20 @@
-import json
+from pydantic import TypeAdapter
 
 from app.schemas.block import BlockRead
-from app.schemas.user import UserRead
+from app.schemas.user import AccessTokenSnapshot, UserRead
 from app.schemas.roadmap import RoadmapRead
 from app.schemas.card import CardRead
 
 
-def users_cache_to_model(cache: str) -> list[UserRead]:
-    return [UserRead.model_validate_json(u) for u in json.loads(cache)]
+# validate whole cached payloads in one pass, see app.utils.cache.codecs
+users_cache_adapter = TypeAdapter(list[UserRead])
+access_token_cache_adapter = TypeAdapter(AccessTokenSnapshot)
 
+roadmap_cache_adapter = TypeAdapter(RoadmapRead)
+roadmaps_cache_adapter = TypeAdapter(list[RoadmapRead])
 
-def roadmap_cache_to_models(
-    cached: str,
-) -> list[RoadmapRead]:
-    data_list = json.loads(cached)
-    return [RoadmapRead.model_validate(data) for data in data_list]
+block_cache_adapter = TypeAdapter(BlockRead)
+blocks_cache_adapter = TypeAdapter(list[BlockRead])
 
-
-def block_cache_to_models(
-    cached: str,
-) -> list[BlockRead]:
-    data_list = json.loads(cached)
-    return [BlockRead.model_validate(data) for data in data_list]
-
-
-def card_cache_to_models(
-    cached: str,
-) -> list[CardRead]:
-    data_list = json.loads(cached)
-    return [CardRead.model_validate(data) for data in data_list]
+card_cache_adapter = TypeAdapter(CardRead)
+cards_cache_adapter = TypeAdapter(list[CardRead])
@@ -0,0 +1,328 @@
+from typing import TYPE_CHECKING
+
+from app.core.config import settings
+from app.core.custom_types import BaseIdType
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+    from app.schemas.session import SessionRead
+
+PROGRESS_FIELDS = (
+    "current_card_index",
+    "correct_answers",
+    "incorrect_answers",
+    "review_answers",
+)
+
+# KEYS: state hash, queue list, dirty set
+# ARGV: owner id ("" skips the check), session id, ttl, window
+ADVANCE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+if ARGV[1] ~= '' and redis.call('HGET', KEYS[1], 'user_id') ~= ARGV[1] then
+    return {'forbidden'}
+end
+if redis.call('HEXISTS', KEYS[1], 'taken') == 1 then
+    return {'taken'}
+end
+local index = tonumber(redis.call('HGET', KEYS[1], 'current_card_index'))
+local window = tonumber(ARGV[4])
+local cards_ids = redis.call('LRANGE', KEYS[2], index, index + window - 1)
+if #cards_ids == 0 then
+    return {'exhausted', index}
+end
+redis.call('HINCRBY', KEYS[1], 'current_card_index', 1)
+redis.call('SADD', KEYS[3], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return {'ok', index, cards_ids}
+"""
+
+# KEYS: state hash, queue list, dirty set
+# ARGV: owner id ("" skips the check), session id, ttl, then field/delta pairs
+APPLY_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+if ARGV[1] ~= '' and redis.call('HGET', KEYS[1], 'user_id') ~= ARGV[1] then
+    return {'forbidden'}
+end
+if redis.call('HEXISTS', KEYS[1], 'taken') == 1 then
+    return {'taken'}
+end
+local moved = 0
+for i = 4, #ARGV, 2 do
+    local field = ARGV[i]
+    local delta = tonumber(ARGV[i + 1])
+    if field == 'current_card_index' then
+        local index = tonumber(redis.call('HGET', KEYS[1], field))
+        local size = redis.call('LLEN', KEYS[2])
+        local next_index = math.max(math.min(index + delta, size), 0)
+        redis.call('HSET', KEYS[1], field, next_index)
+        moved = next_index - index
+    else
+        redis.call('HINCRBY', KEYS[1], field, delta)
+    end
+end
+redis.call('SADD', KEYS[3], ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return {
+    'ok',
+    redis.call('HGET', KEYS[1], 'user_id'),
+    redis.call(
+        'HMGET', KEYS[1],
+        'current_card_index', 'correct_answers', 'incorrect_answers', 'review_answers'
+    ),
+    moved
+}
+"""
+
+# KEYS: state hash, queue list, dirty set
+# ARGV: owner id ("" skips the check), session id, tombstone ttl
+TAKE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+local user_id = redis.call('HGET', KEYS[1], 'user_id')
+if ARGV[1] ~= '' and user_id ~= ARGV[1] then
+    return {'forbidden'}
+end
+if redis.call('HEXISTS', KEYS[1], 'taken') == 1 then
+    return {'taken'}
+end
+local progress = redis.call(
+    'HMGET', KEYS[1],
+    'current_card_index', 'correct_answers', 'incorrect_answers', 'review_answers'
+)
+redis.call('DEL', KEYS[1], KEYS[2])
+redis.call('HSET', KEYS[1], 'user_id', user_id, 'taken', 1)
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('SREM', KEYS[3], ARGV[2])
+return {'ok', progress}
+"""
+
+# KEYS: state hash, queue list
+# ARGV: ttl, number of field/value items, the field/value pairs, then card ids
+RESTORE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+local fields = tonumber(ARGV[2])
+redis.call('DEL', KEYS[2])
+for i = 3, 2 + fields, 2 do
+    redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+for i = 3 + fields, #ARGV do
+    redis.call('RPUSH', KEYS[2], ARGV[i])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return 1
+"""
+
+
+# Cursor and counters of active sessions. Progress lands here first and is
+# flushed to the `sessions` table by app.workers.session_state and by
+# SessionService on update/finish.
+class SessionStateStore:
+    def __init__(self, redis: "Redis"):
+        self.redis = redis
+        self.cfg = settings.session_state
+        self._advance = redis.register_script(ADVANCE_SCRIPT)
+        self._apply = redis.register_script(APPLY_SCRIPT)
+        self._restore = redis.register_script(RESTORE_SCRIPT)
+        self._take = redis.register_script(TAKE_SCRIPT)
+
+    def _key(self, session_id: BaseIdType | str, suffix: str) -> str:
+        return ":".join((self.cfg.prefix, str(session_id), suffix))
+
+    @property
+    def dirty_key(self) -> str:
+        return ":".join((self.cfg.prefix, "dirty"))
+
+    async def seed(
+        self,
+        session: "SessionRead",
+        cards_ids_queue: list[BaseIdType],
+    ) -> None:
+        state_key = self._key(session.id, "state")
+        queue_key = self._key(session.id, "queue")
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(state_key, queue_key)
+            pipe.hset(
+                state_key,
+                mapping={
+                    "user_id": str(session.user_id),
+                    **{field: getattr(session, field) for field in PROGRESS_FIELDS},
+                },
+            )
+            if cards_ids_queue:
+                pipe.rpush(queue_key, *map(str, cards_ids_queue))
+            pipe.expire(state_key, self.cfg.ttl)
+            pipe.expire(queue_key, self.cfg.ttl)
+            await pipe.execute()
+
+    async def restore(
+        self,
+        session: "SessionRead",
+        cards_ids_queue: list[BaseIdType],
+    ) -> bool:
+        # seed() for a state that expired or was dropped; never replaces a
+        # live one, so concurrent restores cannot rewind the cursor
+        fields = [
+            item
+            for field, value in (
+                ("user_id", str(session.user_id)),
+                *((field, getattr(session, field)) for field in PROGRESS_FIELDS),
+            )
+            for item in (field, value)
+        ]
+        restored = await self._restore(
+            keys=[self._key(session.id, "state"), self._key(session.id, "queue")],
+            args=[self.cfg.ttl, len(fields), *fields, *map(str, cards_ids_queue)],
+        )
+        return bool(restored)
+
+    async def advance(
+        self,
+        session_id: BaseIdType,
+        owner_id: BaseIdType | None,
+        window: int = 1,
+    ) -> tuple[int, list[BaseIdType]] | None:
+        # None means the session has no live state and must be seeded
+        result = await self._advance(
+            keys=[
+                self._key(session_id, "state"),
+                self._key(session_id, "queue"),
+                self.dirty_key,
+            ],
+            args=[
+                str(owner_id) if owner_id else "",
+                str(session_id),
+                self.cfg.ttl,
+                window,
+            ],
+        )
+        if not result:
+            return None
+
+        outcome = result[0]
+        if outcome == b"forbidden":
+            raise PermissionError("Forbidden")
+        if outcome in (b"exhausted", b"taken"):
+            raise ValueError("Next card id not found or invalid session state")
+
+        return int(result[1]), [BaseIdType(card_id.decode()) for card_id in result[2]]
+
+    async def apply(
+        self,
+        session_id: BaseIdType,
+        owner_id: BaseIdType | None,
+        progress_deltas: dict[str, int],
+    ) -> tuple[BaseIdType, dict[str, int], dict[str, int]] | None:
+        # returns the session owner, the progress after the deltas and the
+        # deltas as applied: the cursor stops at the end of the queue
+        result = await self._apply(
+            keys=[
+                self._key(session_id, "state"),
+                self._key(session_id, "queue"),
+                self.dirty_key,
+            ],
+            args=[
+                str(owner_id) if owner_id else "",
+                str(session_id),
+                self.cfg.ttl,
+                *(
+                    item
+                    for field, delta in progress_deltas.items()
+                    for item in (field, delta)
+                ),
+            ],
+        )
+        if not result:
+            return None
+        if result[0] == b"forbidden":
+            raise PermissionError("Forbidden")
+        if result[0] == b"taken":
+            raise ValueError("SESSION_NOT_ACTIVE")
+
+        progress = {
+            field: int(value) for field, value in zip(PROGRESS_FIELDS, result[2])
+        }
+        applied = dict(progress_deltas)
+        if "current_card_index" in applied:
+            applied["current_card_index"] = int(result[3])
+        return BaseIdType(result[1].decode()), progress, applied
+
+    async def take(
+        self,
+        session_id: BaseIdType,
+        owner_id: BaseIdType | None,
+    ) -> dict[str, int] | None:
+        # reads the progress and drops the state in one step, for writers of
+        # the final counters (finish, the sweeper). A tombstone is left in
+        # its place, which rejects answers and restores until drop()
+        result = await self._take(
+            keys=[
+                self._key(session_id, "state"),
+                self._key(session_id, "queue"),
+                self.dirty_key,
+            ],
+            args=[
+                str(owner_id) if owner_id else "",
+                str(session_id),
+                self.cfg.taken_ttl,
+            ],
+        )
+        if not result:
+            return None
+        if result[0] == b"forbidden":
+            raise PermissionError("Forbidden")
+        if result[0] == b"taken":
+            raise ValueError("SESSION_NOT_ACTIVE")
+
+        return {field: int(value) for field, value in zip(PROGRESS_FIELDS, result[1])}
+
+    async def get_progress(self, session_id: BaseIdType) -> dict[str, int] | None:
+        progress = await self.get_progress_many([session_id])
+        return progress.get(str(session_id))
+
+    async def get_progress_many(
+        self,
+        sessions_ids: list[BaseIdType | str],
+    ) -> dict[str, dict[str, int]]:
+        if not sessions_ids:
+            return {}
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for session_id in sessions_ids:
+                pipe.hmget(self._key(session_id, "state"), PROGRESS_FIELDS)
+            rows = await pipe.execute()
+
+        progress = {}
+        for session_id, values in zip(sessions_ids, rows):
+            if values and all(value is not None for value in values):
+                progress[str(session_id)] = {
+                    field: int(value) for field, value in zip(PROGRESS_FIELDS, values)
+                }
+        return progress
+
+    async def pop_dirty(self, count: int) -> list[str]:
+        sessions_ids = await self.redis.spop(self.dirty_key, count) or []
+        return [session_id.decode() for session_id in sessions_ids]
+
+    async def mark_dirty(self, sessions_ids: list[str]) -> None:
+        if sessions_ids:
+            await self.redis.sadd(self.dirty_key, *sessions_ids)
+
+    async def drop(self, session_id: BaseIdType) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(
+                self._key(session_id, "state"),
+                self._key(session_id, "queue"),
+            )
+            pipe.srem(self.dirty_key, str(session_id))
+            await pipe.execute()
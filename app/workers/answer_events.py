@@ -0,0 +1,81 @@
+import asyncio
+from collections import deque
+
+from app.core.config import settings
+from app.core.loggers import workers_logger as logger
+from app.models import db_helper
+from app.repositories import AnswerEventRepository
+
+
+class AnswerEventBuffer:
+    def __init__(
+        self,
+        flush_interval_ms: int,
+        flush_batch_size: int,
+        max_size: int,
+    ):
+        self.flush_interval = flush_interval_ms / 1000
+        self.flush_batch_size = flush_batch_size
+        self.events: deque[dict] = deque(maxlen=max_size)
+        self.dropped = 0
+        self._batch_ready = asyncio.Event()
+
+    def add(self, events: list[dict]) -> None:
+        overflow = len(self.events) + len(events) - self.events.maxlen
+        if overflow > 0:
+            self.dropped += overflow
+            logger.warning("Answer event buffer is full, dropped %d events", overflow)
+
+        self.events.extend(events)
+        if len(self.events) >= self.flush_batch_size:
+            self._batch_ready.set()
+
+    async def flush(self) -> int:
+        batch = []
+        while self.events and len(batch) < self.flush_batch_size:
+            batch.append(self.events.popleft())
+        if not batch:
+            return 0
+
+        try:
+            async with db_helper.session_factory() as session:
+                await AnswerEventRepository(session).create_many(batch)
+        except Exception:
+            # back in front, without evicting events added since the pop
+            requeued = min(len(batch), self.events.maxlen - len(self.events))
+            dropped = len(batch) - requeued
+            if dropped:
+                self.dropped += dropped
+                logger.warning(
+                    "Answer event buffer is full, dropped %d unwritten events",
+                    dropped,
+                )
+            if requeued:
+                self.events.extendleft(reversed(batch[dropped:]))
+            raise
+
+        return len(batch)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._batch_ready.wait(),
+                    timeout=self.flush_interval,
+                )
+            except TimeoutError:
+                pass
+            self._batch_ready.clear()
+
+            try:
+                while await self.flush() >= self.flush_batch_size:
+                    pass
+            except Exception as e:
+                logger.error("Answer events flush failed: %r", e, exc_info=True)
+
+
+answer_events = AnswerEventBuffer(
+    flush_interval_ms=settings.answer_events.flush_interval_ms,
+    flush_batch_size=settings.answer_events.flush_batch_size,
+    max_size=settings.answer_events.max_buffer_size,
+)
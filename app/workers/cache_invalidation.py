@@ -0,0 +1,30 @@
+import asyncio
+from typing import TYPE_CHECKING
+
+from app.core.loggers import workers_logger as logger
+from app.utils.cache import get_invalidation_channel, local_cache
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+
+async def run_cache_invalidation_listener(redis: "Redis") -> None:
+    # drops keys other workers invalidated from this process' local tier
+    if local_cache is None:
+        return
+
+    while True:
+        try:
+            async with redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(get_invalidation_channel())
+                # messages sent while unsubscribed are lost
+                local_cache.clear()
+                async for message in pubsub.listen():
+                    if message["type"] == "message" and message["data"]:
+                        local_cache.delete(*message["data"].decode().split("\n"))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Cache invalidation listener failed: %r", e, exc_info=True)
+            local_cache.clear()
+            await asyncio.sleep(1)
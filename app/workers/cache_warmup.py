@@ -0,0 +1,138 @@
+import asyncio
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any
+
+from app.core.config import settings
+from app.core.loggers import workers_logger as logger
+from app.models import db_helper
+from app.repositories import BlockRepository, CardRepository, RoadmapRepository
+from app.schemas.block import BlockFilters
+from app.schemas.card import CardFilters
+from app.schemas.roadmap import RoadmapFilters
+from app.services.block import BlockService
+from app.services.card import CardService
+from app.services.roadmap import RoadmapService
+from app.shared.access import get_accessed_filters
+from app.utils.cache import Cache
+from app.utils.mappers.orm_to_models import (
+    block_orm_to_model,
+    card_orm_to_model,
+    roadmap_orm_to_model,
+)
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+    from app.models import User
+    from app.utils.cache import CachedMethod
+
+_warmups: set[asyncio.Task] = set()
+
+
+def schedule_cache_warmup(redis: "Redis", user: "User") -> None:
+    if not settings.cache.warmup_enabled:
+        return
+
+    task = asyncio.create_task(warm_up_user_cache(redis, user))
+    _warmups.add(task)
+    task.add_done_callback(_warmups.discard)
+
+
+async def warm_up_user_cache(redis: "Redis", user: "User") -> int:
+    # the roadmap list, then block and card lists of the user's own roadmaps,
+    # loaded with three queries and written in one pipeline
+    cache = Cache(redis)
+    try:
+        generations = await _generations(cache, user)
+        async with db_helper.session_factory() as session:
+            db_roadmaps = await RoadmapRepository(session).get_by_filters(
+                get_accessed_filters(user, {})
+            )
+            roadmaps = [roadmap_orm_to_model(db_roadmap) for db_roadmap in db_roadmaps]
+            roadmaps_ids = [
+                roadmap.id for roadmap in roadmaps if roadmap.user_id == user.id
+            ][: settings.cache.warmup_max_roadmaps]
+
+            blocks = []
+            if roadmaps_ids:
+                db_blocks = await BlockRepository(session).get_by_filters(
+                    get_accessed_filters(user, {"roadmap_id": roadmaps_ids})
+                )
+                blocks = [block_orm_to_model(db_block) for db_block in db_blocks]
+            blocks_ids = [block.id for block in blocks]
+
+            cards = []
+            if blocks_ids:
+                db_cards = await CardRepository(session).get_by_filters(
+                    get_accessed_filters(user, {"block_id": blocks_ids})
+                )
+                cards = [card_orm_to_model(db_card) for db_card in db_cards]
+
+        blocks_by_roadmap = defaultdict(list)
+        for block in blocks:
+            blocks_by_roadmap[block.roadmap_id].append(block)
+        cards_by_block = defaultdict(list)
+        for card in cards:
+            cards_by_block[card.block_id].append(card)
+
+        if await _generations(cache, user) != generations:
+            # a write landed while loading, the lists may already be stale
+            return 0
+
+        entries = [
+            await _entry(
+                cache, RoadmapService._get_by_filters, user, RoadmapFilters(), roadmaps
+            )
+        ]
+        for roadmap_id in roadmaps_ids:
+            entries.append(
+                await _entry(
+                    cache,
+                    BlockService._get_by_filters,
+                    user,
+                    BlockFilters(roadmap_id=roadmap_id),
+                    blocks_by_roadmap[roadmap_id],
+                )
+            )
+        for block_id in blocks_ids:
+            entries.append(
+                await _entry(
+                    cache,
+                    CardService._get_by_filters,
+                    user,
+                    CardFilters(block_id=block_id),
+                    cards_by_block[block_id],
+                )
+            )
+
+        written = await cache.set_many(entry for entry in entries if entry)
+        logger.info("Warmed up %d cache entries for User(id=%r)", written, user.id)
+        return written
+    except Exception as e:
+        logger.error(
+            "Cache warm-up for User(id=%r) failed: %r", user.id, e, exc_info=True
+        )
+        return 0
+
+
+async def _entry(
+    cache: Cache,
+    method: "CachedMethod",
+    user: "User",
+    filters: Any,
+    value: list,
+) -> tuple | None:
+    # the entry `method` itself would store for these filters
+    ttl = cache.ttl_for(value, method.get_ttl())
+    if not ttl:
+        return None
+    key = await method.key(cache, user, filters)
+    if key is None:
+        return None
+    stale_ttl = method.get_stale_ttl() if value else 0
+    return key, value, ttl, method.adapter, stale_ttl
+
+
+async def _generations(cache: Cache, user: "User") -> list[str]:
+    return [
+        await cache.key(user.id, entity) for entity in ("roadmaps", "blocks", "cards")
+    ]
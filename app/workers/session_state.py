@@ -0,0 +1,48 @@
+import asyncio
+from typing import TYPE_CHECKING
+
+from app.core.config import settings
+from app.core.custom_types import BaseIdType
+from app.core.loggers import workers_logger as logger
+from app.models import db_helper
+from app.repositories import SessionRepository
+from app.utils.session_state import SessionStateStore
+
+if TYPE_CHECKING:
+    from redis.asyncio import Redis
+
+
+async def flush_session_states(redis: "Redis") -> int:
+    store = SessionStateStore(redis)
+    sessions_ids = await store.pop_dirty(settings.session_state.flush_batch_size)
+    if not sessions_ids:
+        return 0
+
+    try:
+        progress = await store.get_progress_many(sessions_ids)
+        progress_rows = [
+            {"id": BaseIdType(session_id), **session_progress}
+            for session_id, session_progress in progress.items()
+        ]
+        async with db_helper.session_factory() as session:
+            await SessionRepository(session).update_progress_many(progress_rows)
+    except Exception:
+        await store.mark_dirty(sessions_ids)
+        raise
+
+    return len(sessions_ids)
+
+
+async def run_session_state_flusher(redis: "Redis") -> None:
+    while True:
+        await asyncio.sleep(settings.session_state.flush_interval)
+        try:
+            while (
+                await flush_session_states(redis)
+                >= settings.session_state.flush_batch_size
+            ):
+                pass
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Session state flush failed: %r", e, exc_info=True)
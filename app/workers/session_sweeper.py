@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+from redis.asyncio import Redis
+
+from app.core.config import settings
+from app.core.loggers import workers_logger as logger
+from app.models import db_helper
+from app.repositories import SessionRepository
+from app.schemas.session import SessionStatus
+from app.utils.session_state import SessionStateStore
+
+if TYPE_CHECKING:
+    from app.core.custom_types import BaseIdType
+
+
+async def sweep_stale_sessions(redis: "Redis") -> list["BaseIdType"]:
+    cfg = settings.session_sweeper
+    idle_before = datetime.now(timezone.utc) - timedelta(seconds=cfg.idle_timeout)
+
+    store = SessionStateStore(redis)
+    async with db_helper.session_factory() as session:
+        repo = SessionRepository(session)
+        abandoned_ids = await repo.abandon_stale_sessions(idle_before, cfg.batch_size)
+
+        # answers may still land in the live state until it is taken; its
+        # progress goes into the abandoned rows
+        progress_rows = []
+        for session_id in abandoned_ids:
+            try:
+                progress = await store.take(session_id, None)
+            except ValueError:
+                # taken by a finish, which owns the final counters
+                continue
+            if progress is not None:
+                progress_rows.append({"id": session_id, **progress})
+
+        try:
+            await repo.update_progress_many(progress_rows, SessionStatus.ABANDONED)
+        finally:
+            for row in progress_rows:
+                await store.drop(row["id"])
+
+    return abandoned_ids
+
+
+async def delete_unused_snapshots() -> int:
+    cfg = settings.session_sweeper
+    used_before = datetime.now(timezone.utc) - timedelta(seconds=cfg.snapshot_grace)
+
+    async with db_helper.session_factory() as session:
+        return await SessionRepository(session).delete_unused_snapshots(
+            used_before,
+            cfg.batch_size,
+        )
+
+
+async def run_session_sweeper(redis: "Redis") -> None:
+    cfg = settings.session_sweeper
+    while True:
+        await asyncio.sleep(cfg.interval)
+        try:
+            abandoned = 0
+            while True:
+                abandoned_ids = await sweep_stale_sessions(redis)
+                abandoned += len(abandoned_ids)
+                if len(abandoned_ids) < cfg.batch_size:
+                    break
+            if abandoned:
+                logger.info("Abandoned %d stale sessions", abandoned)
+
+            deleted = 0
+            while True:
+                deleted_snapshots = await delete_unused_snapshots()
+                deleted += deleted_snapshots
+                if deleted_snapshots < cfg.batch_size:
+                    break
+            if deleted:
+                logger.info("Deleted %d unused card snapshots", deleted)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error("Session sweep failed: %r", e, exc_info=True)
+
+
+async def main() -> None:
+    redis = Redis.from_url(settings.redis.url)
+    try:
+        await run_session_sweeper(redis)
+    finally:
+        await redis.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,24 +1,76 @@
+import asyncio
 import logging
 from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
 
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.responses import RedirectResponse
-from redis.asyncio import Redis
+from redis.asyncio import BlockingConnectionPool, Redis
 
 from app.api import router as api_router
 from app.core.config import settings
+from app.core.loggers import workers_logger as logger
+from app.utils.cache import cache_writer
+from app.workers.answer_events import answer_events
+from app.workers.cache_invalidation import run_cache_invalidation_listener
+from app.workers.session_sweeper import run_session_sweeper
+from app.workers.session_state import (
+    flush_session_states,
+    run_session_state_flusher,
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    app.state.redis = Redis.from_url(
-        settings.redis.url,
-        decode_responses=True,
+    # bytes in, bytes out: cache entries are binary, see app.utils.cache.codecs
+    app.state.redis = Redis(
+        connection_pool=BlockingConnectionPool.from_url(
+            settings.redis.url,
+            max_connections=settings.redis.max_connections,
+            timeout=settings.redis.pool_timeout,
+            socket_connect_timeout=settings.redis.socket_connect_timeout,
+            socket_timeout=settings.redis.socket_timeout,
+            health_check_interval=settings.redis.health_check_interval,
+        )
     )
+    workers = [
+        asyncio.create_task(run_session_state_flusher(app.state.redis)),
+        asyncio.create_task(answer_events.run()),
+        asyncio.create_task(run_cache_invalidation_listener(app.state.redis)),
+        asyncio.create_task(cache_writer.run()),
+    ]
+    if settings.session_sweeper.enabled:
+        workers.append(asyncio.create_task(run_session_sweeper(app.state.redis)))
     yield
-    await app.state.redis.close()
+    for worker in workers:
+        worker.cancel()
+    await asyncio.gather(*workers, return_exceptions=True)
+    # every step runs even when an earlier one fails, e.g. with the database
+    # down
+    try:
+        await cache_writer.drain()
+        await _drain("answer events", answer_events.flush)
+        if answer_events.events:
+            logger.warning(
+                "Shutting down with %d unwritten answer events",
+                len(answer_events.events),
+            )
+        await _drain(
+            "session states",
+            lambda: flush_session_states(app.state.redis),
+        )
+    finally:
+        await app.state.redis.close(close_connection_pool=True)
+
+
+async def _drain(name: str, flush: Callable[[], Awaitable[int]]) -> None:
+    try:
+        while await flush():
+            pass
+    except Exception as e:
+        logger.error("Draining %s on shutdown failed: %r", name, e, exc_info=True)
 
 
 logging.basicConfig(
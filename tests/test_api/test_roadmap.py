@@ -0,0 +1,45 @@
+import pytest
+
+from app.repositories import RoadmapRepository
+
+pytestmark = pytest.mark.anyio
+
+ROADMAPS = "/api/v1/roadmaps"
+
+
+async def create_roadmap(client, title: str = "roadmap") -> dict:
+    response = await client.post(ROADMAPS, json={"title": title})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def fail_reads(monkeypatch):
+    async def fail(*args, **kwargs):
+        raise AssertionError("read from the database")
+
+    monkeypatch.setattr(RoadmapRepository, "get_by_id", fail)
+    monkeypatch.setattr(RoadmapRepository, "get_by_filters", fail)
+
+
+async def test_cached_roadmap_is_served_as_stored_json(client, monkeypatch):
+    roadmap = await create_roadmap(client)
+
+    first = await client.get(f"{ROADMAPS}/{roadmap['id']}")
+    fail_reads(monkeypatch)
+    second = await client.get(f"{ROADMAPS}/{roadmap['id']}")
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["content-type"] == "application/json"
+    assert second.content == first.content
+    assert second.json() == roadmap
+
+
+async def test_cached_roadmap_list_is_served_as_stored_json(client, monkeypatch):
+    roadmap = await create_roadmap(client)
+
+    first = await client.get(f"{ROADMAPS}/filters")
+    fail_reads(monkeypatch)
+    second = await client.get(f"{ROADMAPS}/filters")
+
+    assert second.content == first.content
+    assert [item["id"] for item in second.json()] == [roadmap["id"]]
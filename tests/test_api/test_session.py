@@ -0,0 +1,224 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.models import Block
+
+pytestmark = pytest.mark.anyio
+
+SESSIONS = "/api/v1/sessions"
+
+
+async def roadmap_id_of(db_session, card) -> str:
+    block = await db_session.get(Block, card.block_id)
+    return str(block.roadmap_id)
+
+
+async def test_create_session_builds_the_queue(db_session, client, make_cards):
+    cards = await make_cards(client.user, 3)
+
+    response = await client.post(
+        SESSIONS,
+        json={"mode": "exam", "roadmap_id": await roadmap_id_of(db_session, cards[0])},
+    )
+
+    assert response.status_code == 200, response.text
+    session = response.json()
+    assert (session["status"], session["total_cards"]) == ("active", 3)
+
+    response = await client.get(f"{SESSIONS}/{session['id']}/queue")
+    assert response.json()["cards_ids"] == [str(card.id) for card in cards]
+
+
+async def test_create_mixed_session_shuffles_the_same_cards(
+    db_session, client, make_cards
+):
+    cards = await make_cards(client.user, 5)
+
+    response = await client.post(
+        SESSIONS,
+        json={
+            "mode": "exam",
+            "roadmap_id": await roadmap_id_of(db_session, cards[0]),
+            "mix": True,
+        },
+    )
+    session_id = response.json()["id"]
+
+    first_page = await client.get(f"{SESSIONS}/{session_id}/queue?limit=2")
+    second_page = await client.get(f"{SESSIONS}/{session_id}/queue?offset=2")
+    cards_ids = first_page.json()["cards_ids"] + second_page.json()["cards_ids"]
+    assert sorted(cards_ids) == sorted(str(card.id) for card in cards)
+
+
+async def test_create_session_for_another_users_roadmap_is_empty(
+    db_session, client, make_user, make_cards
+):
+    other = await make_user()
+    cards = await make_cards(other, 2)
+
+    response = await client.post(
+        SESSIONS,
+        json={"mode": "exam", "roadmap_id": await roadmap_id_of(db_session, cards[0])},
+    )
+
+    assert response.json()["total_cards"] == 0
+
+
+async def start_session(db_session, client, cards) -> str:
+    response = await client.post(
+        SESSIONS,
+        json={"mode": "exam", "roadmap_id": await roadmap_id_of(db_session, cards[0])},
+    )
+    return response.json()["id"]
+
+
+async def test_next_cards_returns_the_window_and_advances(
+    db_session, client, make_cards
+):
+    cards = await make_cards(client.user, 3)
+    session_id = await start_session(db_session, client, cards)
+
+    response = await client.get(f"{SESSIONS}/{session_id}/next-cards?window=2")
+    assert response.status_code == 200, response.text
+    next_cards = response.json()
+    assert next_cards["card_index"] == 0
+    assert [card["id"] for card in next_cards["cards"]] == [
+        str(cards[0].id),
+        str(cards[1].id),
+    ]
+    assert next_cards["cards"][0]["term"] == "term 0"
+
+    response = await client.get(f"{SESSIONS}/{session_id}/next-cards?window=5")
+    next_cards = response.json()
+    assert next_cards["card_index"] == 1
+    assert [card["id"] for card in next_cards["cards"]] == [
+        str(cards[1].id),
+        str(cards[2].id),
+    ]
+
+
+async def test_next_card_past_the_end_is_rejected(db_session, client, make_cards):
+    cards = await make_cards(client.user, 1)
+    session_id = await start_session(db_session, client, cards)
+
+    response = await client.get(f"{SESSIONS}/{session_id}/next-card-id")
+    assert response.json() == str(cards[0].id)
+    response = await client.get(f"{SESSIONS}/{session_id}/next-card-id")
+    assert response.status_code == 400
+
+
+async def test_next_cards_of_another_users_session_is_forbidden(
+    db_session, client, make_user, make_cards, make_session
+):
+    other = await make_user()
+    cards = await make_cards(other, 2)
+    session = await make_session(other, cards)
+
+    response = await client.get(f"{SESSIONS}/{session.id}/next-cards")
+
+    assert response.status_code == 400
+
+
+async def test_answer_counts_and_updates_the_card(db_session, client, make_cards):
+    cards = await make_cards(client.user, 2)
+    session_id = await start_session(db_session, client, cards)
+
+    response = await client.post(
+        f"{SESSIONS}/{session_id}/answers",
+        json={
+            "card_id": str(cards[0].id),
+            "outcome": "correct",
+            "card_status": "known",
+        },
+    )
+
+    assert response.status_code == 200, response.text
+    progress = response.json()
+    assert (progress["current_card_index"], progress["correct_answers"]) == (1, 1)
+    await db_session.refresh(cards[0])
+    assert (cards[0].status, cards[0].repetitions) == ("known", 1)
+
+
+async def test_answer_to_a_finished_session_is_rejected(db_session, client, make_cards):
+    cards = await make_cards(client.user, 2)
+    session_id = await start_session(db_session, client, cards)
+    await client.patch(f"{SESSIONS}/{session_id}/finish")
+
+    response = await client.post(
+        f"{SESSIONS}/{session_id}/answers",
+        json={"card_id": str(cards[0].id), "outcome": "correct"},
+    )
+
+    assert response.status_code == 400
+
+
+async def test_answers_batch_applies_in_one_request(db_session, client, make_cards):
+    cards = await make_cards(client.user, 3)
+    session_id = await start_session(db_session, client, cards)
+
+    response = await client.post(
+        f"{SESSIONS}/{session_id}/answers/batch",
+        json={
+            "answers": [
+                {"card_id": str(cards[0].id), "outcome": "correct"},
+                {"card_id": str(cards[1].id), "outcome": "review", "advance": False},
+                {"card_id": str(cards[1].id), "outcome": "incorrect"},
+            ]
+        },
+    )
+
+    assert response.status_code == 200, response.text
+    progress = response.json()
+    assert progress["current_card_index"] == 2
+    assert (
+        progress["correct_answers"],
+        progress["review_answers"],
+        progress["incorrect_answers"],
+    ) == (1, 1, 1)
+
+
+async def test_answers_batch_never_moves_past_the_queue(db_session, client, make_cards):
+    cards = await make_cards(client.user, 1)
+    session_id = await start_session(db_session, client, cards)
+
+    response = await client.post(
+        f"{SESSIONS}/{session_id}/answers/batch",
+        json={"answers": [{"card_id": str(cards[0].id), "outcome": "correct"}] * 3},
+    )
+
+    assert response.json()["current_card_index"] == 1
+
+
+async def test_empty_answers_batch_is_invalid(db_session, client, make_cards):
+    cards = await make_cards(client.user, 1)
+    session_id = await start_session(db_session, client, cards)
+
+    response = await client.post(
+        f"{SESSIONS}/{session_id}/answers/batch", json={"answers": []}
+    )
+
+    assert response.status_code == 422
+
+
+async def test_due_session_takes_the_due_cards_up_to_the_limit(
+    db_session, client, make_cards
+):
+    cards = await make_cards(client.user, 3)
+    cards[2].due_at = datetime.now(timezone.utc) + timedelta(days=1)
+    await db_session.commit()
+
+    response = await client.post(
+        SESSIONS,
+        json={
+            "mode": "due",
+            "roadmap_id": await roadmap_id_of(db_session, cards[0]),
+            "limit": 1,
+        },
+    )
+
+    assert response.status_code == 200, response.text
+    session = response.json()
+    assert session["total_cards"] == 1
+    response = await client.get(f"{SESSIONS}/{session['id']}/queue")
+    assert response.json()["cards_ids"][0] in {str(cards[0].id), str(cards[1].id)}
@@ -0,0 +1,104 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi_users import exceptions
+
+from app.core.authentication.strategy import AUTH_ENTITY, CachedDatabaseStrategy
+from app.models import User
+from app.utils.cache import get_access_token_key
+
+pytestmark = pytest.mark.anyio
+
+
+class AccessTokenDatabase:
+    def __init__(self, user_id):
+        now = datetime.now(timezone.utc)
+        self.token = SimpleNamespace(
+            token="token", user_id=user_id, expires_at=now + timedelta(hours=1)
+        )
+        self.lookups = []
+        self.deleted = []
+
+    async def get_by_token(self, token, max_age=None):
+        self.lookups.append(token)
+        return self.token if token == self.token.token else None
+
+    async def delete(self, access_token):
+        self.deleted.append(access_token)
+
+
+class UserManager:
+    def __init__(self, user):
+        self.user = user
+        self.loads = []
+
+    def parse_id(self, value):
+        return value
+
+    async def get(self, user_id):
+        self.loads.append(user_id)
+        if user_id != self.user.id:
+            raise exceptions.UserNotExists()
+        return self.user
+
+
+@pytest.fixture
+def user():
+    now = datetime.now(timezone.utc)
+    return User(
+        id=uuid.uuid4(),
+        email="user@example.com",
+        hashed_password="hashed",
+        is_active=True,
+        is_superuser=False,
+        is_verified=True,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+@pytest.fixture
+def strategy(cache, user):
+    return CachedDatabaseStrategy(AccessTokenDatabase(user.id), cache, 3600)
+
+
+async def test_cached_tokens_skip_the_database(strategy, user):
+    user_manager = UserManager(user)
+
+    assert (await strategy.read_token("token", user_manager)) is user
+    cached = await strategy.read_token("token", user_manager)
+
+    assert (cached.id, cached.email) == (user.id, user.email)
+    assert strategy.database.lookups == ["token"]
+    assert user_manager.loads == [user.id]
+
+
+async def test_a_bumped_user_is_loaded_again(strategy, cache, user):
+    user_manager = UserManager(user)
+    await strategy.read_token("token", user_manager)
+
+    await cache.bump([user.id], AUTH_ENTITY)
+
+    assert (await strategy.read_token("token", user_manager)) is user
+    assert len(strategy.database.lookups) == 2
+
+
+async def test_unknown_tokens_and_users_are_not_cached(strategy, redis, user):
+    assert await strategy.read_token("other", UserManager(user)) is None
+    strategy.database.token.user_id = uuid.uuid4()
+    assert await strategy.read_token("token", UserManager(user)) is None
+
+    assert await redis.keys("*:tokens:*") == []
+
+
+async def test_destroyed_tokens_leave_the_cache(strategy, redis, user):
+    await strategy.read_token("token", UserManager(user))
+    key = get_access_token_key("token")
+    assert await redis.exists(key)
+
+    await strategy.destroy_token("token", user)
+
+    assert not await redis.exists(key)
+    assert strategy.database.deleted == [strategy.database.token]
@@ -0,0 +1,29 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.repositories import AnswerEventRepository
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_create_and_get_by_id(db_session, make_user):
+    user = await make_user()
+    repo = AnswerEventRepository(db_session)
+
+    event = await repo.create(
+        {
+            "session_id": uuid.uuid4(),
+            "card_id": uuid.uuid4(),
+            "user_id": user.id,
+            "outcome": "correct",
+            "latency_ms": 1200,
+            "ts": datetime.now(timezone.utc),
+        }
+    )
+
+    assert event is not None
+    assert (event.outcome, event.latency_ms) == ("correct", 1200)
+    assert (await repo.get_by_id(event.id)).id == event.id
+    assert await repo.get_by_id(uuid.uuid4()) is None
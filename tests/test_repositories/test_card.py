@@ -0,0 +1,153 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.models import Block, Card
+from app.repositories.card import CardRepository
+
+pytestmark = pytest.mark.anyio
+
+
+async def reload(db_session, card: Card) -> Card:
+    result = await db_session.execute(
+        select(Card).where(Card.id == card.id).execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
+async def test_apply_reviews_schedules_passed_and_failed_cards(
+    db_session, make_user, make_cards, make_session
+):
+    user = await make_user()
+    passed, failed = await make_cards(user, 2)
+    session = await make_session(user, [passed, failed])
+    failed.repetitions = 3
+    failed.interval_days = 15
+    failed.status = "known"
+    await db_session.commit()
+
+    repo = CardRepository(db_session)
+    updated = await repo.apply_reviews(
+        {passed.id: (4, "known"), failed.id: (1, None)},
+        user.id,
+        session.id,
+    )
+    assert updated == 2
+
+    now = datetime.now(timezone.utc)
+    passed = await reload(db_session, passed)
+    assert passed.status == "known"
+    assert passed.repetitions == 1
+    assert passed.interval_days == 1
+    assert passed.ease_factor == pytest.approx(2.5)
+    assert now < passed.due_at < now + timedelta(days=1, minutes=1)
+
+    failed = await reload(db_session, failed)
+    # no status in the review keeps the stored one
+    assert failed.status == "known"
+    assert failed.repetitions == 0
+    assert failed.interval_days == 1
+    assert failed.ease_factor == pytest.approx(1.96)
+
+
+async def test_apply_reviews_grows_the_interval(
+    db_session, make_user, make_cards, make_session
+):
+    user = await make_user()
+    second, later = await make_cards(user, 2)
+    session = await make_session(user, [second, later])
+    second.repetitions = 1
+    second.interval_days = 1
+    later.repetitions = 2
+    later.interval_days = 6
+    await db_session.commit()
+
+    await CardRepository(db_session).apply_reviews(
+        {second.id: (4, None), later.id: (3, "review")},
+        user.id,
+        session.id,
+    )
+
+    second = await reload(db_session, second)
+    assert (second.repetitions, second.interval_days) == (2, 6)
+    later = await reload(db_session, later)
+    assert later.status == "review"
+    assert (later.repetitions, later.interval_days) == (3, 15)
+    assert later.ease_factor == pytest.approx(2.36)
+
+
+async def test_apply_reviews_skips_cards_of_other_users(
+    db_session, make_user, make_cards, make_session
+):
+    owner, other = await make_user(), await make_user()
+    (card,) = await make_cards(owner, 1)
+    session = await make_session(owner, [card])
+
+    updated = await CardRepository(db_session).apply_reviews(
+        {card.id: (4, "known")},
+        other.id,
+        session.id,
+    )
+
+    assert updated == 0
+    card = await reload(db_session, card)
+    assert (card.status, card.repetitions) == ("unknown", 0)
+
+
+async def test_apply_reviews_skips_cards_outside_the_session(
+    db_session, make_user, make_cards, make_session
+):
+    user = await make_user()
+    (card,) = await make_cards(user, 1)
+    (other_card,) = await make_cards(user, 1)
+    session = await make_session(user, [card])
+
+    updated = await CardRepository(db_session).apply_reviews(
+        {card.id: (4, "known"), other_card.id: (4, "known")},
+        user.id,
+        session.id,
+    )
+
+    assert updated == 1
+    other_card = await reload(db_session, other_card)
+    assert (other_card.status, other_card.repetitions) == ("unknown", 0)
+
+
+async def test_get_queue_ids_orders_and_filters(db_session, make_user, make_cards):
+    user = await make_user()
+    first, second, third = await make_cards(user, 3)
+    second.status = "review"
+    await db_session.commit()
+    block = await db_session.get(Block, first.block_id)
+    repo = CardRepository(db_session)
+
+    assert await repo.get_queue_ids(block.roadmap_id) == [
+        first.id,
+        second.id,
+        third.id,
+    ]
+    assert await repo.get_queue_ids(block.roadmap_id, status="review") == [second.id]
+    assert await repo.get_queue_ids(block.roadmap_id, user_id=uuid.uuid4()) == []
+    assert await repo.get_queue_ids(block.roadmap_id, block_id=uuid.uuid4()) == []
+
+
+async def test_get_due_ids_returns_the_most_overdue_first(
+    db_session, make_user, make_cards
+):
+    user = await make_user()
+    overdue, due, later = await make_cards(user, 3)
+    now = datetime.now(timezone.utc)
+    overdue.due_at = now - timedelta(days=3)
+    due.due_at = now - timedelta(hours=1)
+    later.due_at = now + timedelta(days=1)
+    await db_session.commit()
+    block = await db_session.get(Block, overdue.block_id)
+    repo = CardRepository(db_session)
+
+    assert await repo.get_due_ids(10, block.roadmap_id, user_id=user.id) == [
+        overdue.id,
+        due.id,
+    ]
+    assert await repo.get_due_ids(1, block.roadmap_id) == [overdue.id]
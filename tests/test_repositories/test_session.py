@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, select, update
+
+from app.models import Block, Card, CardSnapshot, Session
+from app.repositories import SessionRepository
+
+pytestmark = pytest.mark.anyio
+
+
+async def make_session_row(db_session, user, cards, **fields) -> Session:
+    block = await db_session.get(Block, cards[0].block_id)
+    session = Session(
+        user_id=user.id,
+        roadmap_id=block.roadmap_id,
+        mode="exam",
+        total_cards=len(cards),
+        **fields,
+    )
+    db_session.add(session)
+    await db_session.commit()
+    return session
+
+
+async def reload(db_session, session_id) -> Session:
+    result = await db_session.execute(
+        select(Session)
+        .where(Session.id == session_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
+async def test_update_progress_many_skips_finished_sessions(
+    db_session, make_user, make_cards
+):
+    user = await make_user()
+    cards = await make_cards(user, 3)
+    active = await make_session_row(db_session, user, cards)
+    completed = await make_session_row(
+        db_session, user, cards, status="completed", current_card_index=3
+    )
+
+    await SessionRepository(db_session).update_progress_many(
+        [
+            {"id": active.id, "current_card_index": 2, "correct_answers": 2},
+            {"id": completed.id, "current_card_index": 1, "correct_answers": 1},
+        ]
+    )
+
+    active = await reload(db_session, active.id)
+    assert (active.current_card_index, active.correct_answers) == (2, 2)
+    completed = await reload(db_session, completed.id)
+    assert (completed.current_card_index, completed.correct_answers) == (3, 0)
+
+
+async def test_get_or_create_snapshot_reuses_and_touches(
+    db_session, make_user, make_cards
+):
+    user = await make_user()
+    cards_ids = [card.id for card in await make_cards(user, 3)]
+    repo = SessionRepository(db_session)
+
+    snapshot_id = await repo.get_or_create_snapshot(cards_ids)
+    await db_session.execute(
+        update(CardSnapshot).values(used_at=func.now() - timedelta(days=1))
+    )
+    await db_session.commit()
+
+    assert await repo.get_or_create_snapshot(cards_ids) == snapshot_id
+    assert await repo.get_or_create_snapshot(cards_ids[:2]) != snapshot_id
+    snapshot = await db_session.get(CardSnapshot, snapshot_id, populate_existing=True)
+    assert snapshot.used_at > datetime.now(timezone.utc) - timedelta(minutes=1)
+
+
+async def test_delete_unused_snapshots(db_session, make_user, make_cards):
+    user = await make_user()
+    cards = await make_cards(user, 3)
+    cards_ids = [card.id for card in cards]
+    repo = SessionRepository(db_session)
+    referenced_id = await repo.get_or_create_snapshot(cards_ids)
+    await make_session_row(db_session, user, cards, snapshot_id=referenced_id)
+    unused_id = await repo.get_or_create_snapshot(cards_ids[:1])
+    recent_id = await repo.get_or_create_snapshot(cards_ids[:2])
+    await db_session.execute(
+        update(CardSnapshot)
+        .where(CardSnapshot.id != recent_id)
+        .values(used_at=func.now() - timedelta(days=1))
+    )
+    await db_session.commit()
+
+    deleted = await repo.delete_unused_snapshots(
+        datetime.now(timezone.utc) - timedelta(hours=1), 100
+    )
+
+    assert deleted == 1
+    remaining = await db_session.execute(select(CardSnapshot.id))
+    assert set(remaining.scalars()) == {referenced_id, recent_id}
+    assert unused_id not in {referenced_id, recent_id}
+
+
+async def test_finish_session_completes_and_moves_the_cards(
+    db_session, make_user, make_cards
+):
+    user, other = await make_user(), await make_user()
+    cards = await make_cards(user, 2)
+    (other_card,) = await make_cards(other, 1)
+    session = await make_session_row(
+        db_session, user, cards, correct_answers=1, review_answers=2
+    )
+    repo = SessionRepository(db_session)
+
+    assert await repo.finish_session(session.id, user_id=other.id) is None
+
+    result = await repo.finish_session(
+        session.id,
+        user_id=user.id,
+        progress={"current_card_index": 2, "correct_answers": 3, "review_answers": 4},
+        cards_ids=[cards[0].id, other_card.id],
+        card_status="known",
+    )
+
+    assert (result["correct_answers"], result["review_answers"]) == (3, 4)
+    assert float(result["accuracy_percentage"]) == 75.0
+    assert result["completed_at"] is not None
+    row = await reload(db_session, session.id)
+    assert (row.status, row.current_card_index) == ("completed", 2)
+    statuses = await db_session.execute(
+        select(Card.id, Card.status).execution_options(populate_existing=True)
+    )
+    assert dict(statuses.all()) == {
+        cards[0].id: "known",
+        cards[1].id: "unknown",
+        other_card.id: "unknown",
+    }
+    assert await repo.finish_session(session.id) is None
@@ -0,0 +1,78 @@
+import pytest
+
+from app.repositories import CardRepository
+from app.schemas.card import CardCreate, CardFilters, CardUpdate
+from app.services import CardService
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def loads(monkeypatch):
+    # card reads that reached the DB
+    loads = []
+    for name in ("get_by_id", "get_by_filters"):
+        read = getattr(CardRepository, name)
+
+        async def load(self, *args, read=read, name=name):
+            loads.append(name)
+            return await read(self, *args)
+
+        monkeypatch.setattr(CardRepository, name, load)
+    return loads
+
+
+async def test_writes_carry_the_cached_list_over(
+    db_session, redis, make_user, make_cards, loads
+):
+    service = CardService(CardRepository(db_session), redis)
+    user = await make_user()
+    (card,) = await make_cards(user, 1)
+    filters = CardFilters(block_id=card.block_id)
+    await service.get_by_filters(user, filters)
+
+    created = await service.create(
+        user, CardCreate(term="new", definition="new", block_id=card.block_id)
+    )
+    assert [read.id for read in await service.get_by_filters(user, filters)] == [
+        card.id,
+        created.id,
+    ]
+    assert (await service.get_by_id(user, created.id)).term == "new"
+
+    await service.update(user, created.id, CardUpdate(term="edited"))
+    read_cards = await service.get_by_filters(user, filters)
+    assert [read.term for read in read_cards] == ["term 0", "edited"]
+    assert (await service.get_by_id(user, created.id)).term == "edited"
+
+    await service.delete(user, card.id)
+    assert [read.id for read in await service.get_by_filters(user, filters)] == [
+        created.id
+    ]
+    # the first list read, and the lookup of the deleted card
+    assert loads == ["get_by_filters", "get_by_id"]
+
+
+async def test_no_write_through_past_another_write(
+    db_session, redis, make_user, make_cards, loads, monkeypatch
+):
+    service = CardService(CardRepository(db_session), redis)
+    user = await make_user()
+    (card,) = await make_cards(user, 1)
+    filters = CardFilters(block_id=card.block_id)
+    await service.get_by_filters(user, filters)
+    create = CardRepository.create
+
+    async def create_racing_another_write(self, card_dict):
+        created_card = await create(self, card_dict)
+        await service.cache.bump([user.id], "cards")
+        return created_card
+
+    monkeypatch.setattr(CardRepository, "create", create_racing_another_write)
+    await service.create(
+        user, CardCreate(term="new", definition="new", block_id=card.block_id)
+    )
+
+    # two generations on, the list is filled again
+    assert len(await service.get_by_filters(user, filters)) == 2
+    assert loads == ["get_by_filters", "get_by_filters"]
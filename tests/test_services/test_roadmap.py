@@ -0,0 +1,50 @@
+import uuid
+
+import pytest
+
+from app.repositories import RoadmapRepository
+from app.schemas.roadmap import RoadmapFilters
+from app.services import RoadmapService
+from app.utils.cache import redis_breaker
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_missing_roadmap_lookups_are_cached_until_a_write(
+    db_session, redis, make_user, monkeypatch
+):
+    user = await make_user()
+    service = RoadmapService(RoadmapRepository(db_session), redis)
+    loads = []
+    get_by_id = RoadmapRepository.get_by_id
+
+    async def load(self, roadmap_id):
+        loads.append(roadmap_id)
+        return await get_by_id(self, roadmap_id)
+
+    monkeypatch.setattr(RoadmapRepository, "get_by_id", load)
+    roadmap_id = uuid.uuid4()
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="NOT_FOUND"):
+            await service.get_by_id(user, roadmap_id)
+    assert loads == [roadmap_id]
+
+    await service.cache.bump([user.id], "roadmaps")
+    with pytest.raises(ValueError, match="NOT_FOUND"):
+        await service.get_by_id(user, roadmap_id)
+    assert loads == [roadmap_id, roadmap_id]
+
+
+async def test_reads_fall_back_to_the_db_while_the_circuit_is_open(
+    db_session, redis, make_user, make_cards
+):
+    user = await make_user()
+    await make_cards(user, 1)
+    service = RoadmapService(RoadmapRepository(db_session), redis)
+    redis_breaker.opened_at = float("inf")
+
+    roadmaps = await service.get_by_filters(user, RoadmapFilters())
+    assert len(roadmaps) == 1
+    assert (await service.get_by_id(user, roadmaps[0].id)).id == roadmaps[0].id
+    assert await redis.keys() == []
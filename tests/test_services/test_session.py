@@ -0,0 +1,300 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import Session
+from app.repositories import CardRepository
+from app.schemas.session import (
+    AnswerOutcome,
+    SessionAnswer,
+    SessionAnswersBatch,
+    SessionFinish,
+    SessionUpdate,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+async def reload(db_session, session_id) -> Session:
+    result = await db_session.execute(
+        select(Session)
+        .where(Session.id == session_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
+async def test_finish_writes_the_live_progress(
+    db_session, session_service, make_user, make_cards, make_session
+):
+    user = await make_user()
+    cards = await make_cards(user, 3)
+    session = await make_session(user, cards)
+    await session_service.get_next_card_id(user, session.id)
+    await session_service.answer(
+        user,
+        session.id,
+        SessionAnswer(card_id=cards[0].id, outcome=AnswerOutcome.CORRECT),
+    )
+
+    result = await session_service.finish(
+        user, session.id, SessionFinish(card_ids=[cards[1].id])
+    )
+
+    assert (result.correct_answers, result.total_cards) == (1, 3)
+    row = await reload(db_session, session.id)
+    assert (row.status, row.current_card_index) == ("completed", 2)
+    assert await session_service.state.get_progress(session.id) is None
+    with pytest.raises(ValueError):
+        await session_service.answer(
+            user,
+            session.id,
+            SessionAnswer(card_id=cards[2].id, outcome=AnswerOutcome.CORRECT),
+        )
+
+
+async def test_answers_racing_finish_are_rejected(
+    db_session, session_service, make_user, make_cards, make_session, monkeypatch
+):
+    user = await make_user()
+    cards = await make_cards(user, 3)
+    session = await make_session(user, cards)
+    finish_session = session_service.repo.finish_session
+    rejected = []
+
+    async def answer_then_finish(*args, **kwargs):
+        try:
+            await session_service.answer(
+                user,
+                session.id,
+                SessionAnswer(card_id=cards[0].id, outcome=AnswerOutcome.CORRECT),
+            )
+        except ValueError as e:
+            rejected.append(e)
+        return await finish_session(*args, **kwargs)
+
+    monkeypatch.setattr(session_service.repo, "finish_session", answer_then_finish)
+
+    result = await session_service.finish(user, session.id)
+
+    assert len(rejected) == 1
+    assert result.correct_answers == 0
+
+
+async def test_failed_finish_restores_the_live_state(
+    db_session, session_service, make_user, make_cards, make_session, monkeypatch
+):
+    user = await make_user()
+    cards = await make_cards(user, 3)
+    session = await make_session(user, cards)
+    await session_service.answer(
+        user,
+        session.id,
+        SessionAnswer(card_id=cards[0].id, outcome=AnswerOutcome.REVIEW),
+    )
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(session_service.repo, "finish_session", fail)
+    with pytest.raises(ValueError):
+        await session_service.finish(user, session.id)
+
+    progress = await session_service.state.get_progress(session.id)
+    assert (progress["current_card_index"], progress["review_answers"]) == (1, 1)
+    assert (await reload(db_session, session.id)).status == "active"
+    # the restored queue continues after the answered card
+    assert await session_service.get_next_card_id(user, session.id) == cards[1].id
+
+
+async def test_next_card_restores_a_missing_state(
+    db_session, session_service, make_user, make_cards, make_session
+):
+    user = await make_user()
+    cards = await make_cards(user, 3)
+    session = await make_session(user, cards, mix=True)
+    queue = await session_service.get_queue(user, session.id, 0, 3)
+    await session_service.get_next_card_id(user, session.id)
+    await session_service.state.drop(session.id)
+
+    # the row still has the cursor at 0: the flusher never ran
+    assert await session_service.get_next_card_id(user, session.id) == (
+        queue.cards_ids[0]
+    )
+    assert await session_service.get_next_card_id(user, session.id) == (
+        queue.cards_ids[1]
+    )
+    progress = await session_service.state.get_progress(session.id)
+    assert progress["current_card_index"] == 2
+    # restored in redis, the row is untouched
+    assert (await reload(db_session, session.id)).current_card_index == 0
+
+
+async def test_answer_without_live_state_updates_the_row(
+    db_session, session_service, make_user, make_cards, make_session
+):
+    user = await make_user()
+    cards = await make_cards(user, 2)
+    session = await make_session(user, cards)
+    await session_service.state.drop(session.id)
+
+    progress = await session_service.answer(
+        user,
+        session.id,
+        SessionAnswer(
+            card_id=cards[1].id,
+            outcome=AnswerOutcome.INCORRECT,
+            card_status="review",
+        ),
+    )
+
+    assert (progress.current_card_index, progress.incorrect_answers) == (1, 1)
+    row = await reload(db_session, session.id)
+    assert (row.current_card_index, row.incorrect_answers) == (1, 1)
+    await db_session.refresh(cards[1])
+    assert (cards[1].status, cards[1].interval_days) == ("review", 1)
+
+
+async def test_failed_card_updates_revert_the_live_counters(
+    db_session, session_service, make_user, make_cards, make_session, monkeypatch
+):
+    user = await make_user()
+    cards = await make_cards(user, 2)
+    session = await make_session(user, cards)
+    answer = SessionAnswer(card_id=cards[0].id, outcome=AnswerOutcome.CORRECT)
+    apply_reviews = CardRepository.apply_reviews
+
+    async def fail_once(self, *args):
+        monkeypatch.setattr(CardRepository, "apply_reviews", apply_reviews)
+        raise SQLAlchemyError("down")
+
+    monkeypatch.setattr(CardRepository, "apply_reviews", fail_once)
+
+    with pytest.raises(ValueError):
+        await session_service.answer(user, session.id, answer)
+    progress = await session_service.state.get_progress(session.id)
+    assert (progress["current_card_index"], progress["correct_answers"]) == (0, 0)
+
+    # the retry counts the answer once
+    progress = await session_service.answer(user, session.id, answer)
+    assert (progress.current_card_index, progress.correct_answers) == (1, 1)
+    await db_session.refresh(cards[0])
+    assert cards[0].repetitions == 1
+
+
+async def test_answers_only_review_cards_of_the_session(
+    db_session, session_service, make_user, make_cards, make_session
+):
+    user = await make_user()
+    (card,) = await make_cards(user, 1)
+    (other_card,) = await make_cards(user, 1)
+    session = await make_session(user, [card])
+
+    await session_service.answer(
+        user,
+        session.id,
+        SessionAnswer(
+            card_id=other_card.id,
+            outcome=AnswerOutcome.CORRECT,
+            card_status="known",
+        ),
+    )
+
+    await db_session.refresh(other_card)
+    assert (other_card.status, other_card.repetitions) == ("unknown", 0)
+
+
+async def test_failed_batch_reverts_the_live_counters(
+    db_session, session_service, make_user, make_cards, make_session, monkeypatch
+):
+    user = await make_user()
+    cards = await make_cards(user, 2)
+    session = await make_session(user, cards)
+    batch = SessionAnswersBatch(
+        answers=[
+            SessionAnswer(card_id=card.id, outcome=AnswerOutcome.CORRECT)
+            for card in cards
+        ]
+    )
+    apply_reviews = CardRepository.apply_reviews
+
+    async def fail_once(self, *args):
+        monkeypatch.setattr(CardRepository, "apply_reviews", apply_reviews)
+        raise SQLAlchemyError("down")
+
+    monkeypatch.setattr(CardRepository, "apply_reviews", fail_once)
+
+    with pytest.raises(ValueError):
+        await session_service.answer_batch(user, session.id, batch)
+    progress = await session_service.state.get_progress(session.id)
+    assert (progress["current_card_index"], progress["correct_answers"]) == (0, 0)
+
+    # the retry counts the answers once
+    progress = await session_service.answer_batch(user, session.id, batch)
+    assert (progress.current_card_index, progress.correct_answers) == (2, 2)
+    await db_session.refresh(cards[0])
+    assert cards[0].repetitions == 1
+
+
+async def test_update_writes_the_taken_progress(
+    db_session, session_service, make_user, make_cards, make_session, monkeypatch
+):
+    user = await make_user()
+    cards = await make_cards(user, 3)
+    session = await make_session(user, cards)
+    await session_service.answer(
+        user,
+        session.id,
+        SessionAnswer(card_id=cards[0].id, outcome=AnswerOutcome.CORRECT),
+    )
+    update = session_service.repo.update
+    rejected = []
+
+    async def answer_then_update(*args, **kwargs):
+        try:
+            await session_service.answer(
+                user,
+                session.id,
+                SessionAnswer(card_id=cards[1].id, outcome=AnswerOutcome.CORRECT),
+            )
+        except ValueError as e:
+            rejected.append(e)
+        return await update(*args, **kwargs)
+
+    monkeypatch.setattr(session_service.repo, "update", answer_then_update)
+
+    updated = await session_service.update(
+        user, session.id, SessionUpdate(review_answers=2)
+    )
+
+    assert len(rejected) == 1
+    assert (
+        updated.current_card_index,
+        updated.correct_answers,
+        updated.review_answers,
+    ) == (1, 1, 2)
+    assert await session_service.state.get_progress(session.id) is None
+
+
+async def test_failed_update_restores_the_live_state(
+    db_session, session_service, make_user, make_cards, make_session, monkeypatch
+):
+    user = await make_user()
+    cards = await make_cards(user, 3)
+    session = await make_session(user, cards)
+    await session_service.answer(
+        user,
+        session.id,
+        SessionAnswer(card_id=cards[0].id, outcome=AnswerOutcome.REVIEW),
+    )
+
+    async def fail(*args, **kwargs):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(session_service.repo, "update", fail)
+    with pytest.raises(ValueError):
+        await session_service.update(user, session.id, SessionUpdate(review_answers=5))
+
+    progress = await session_service.state.get_progress(session.id)
+    assert (progress["current_card_index"], progress["review_answers"]) == (1, 1)
+    assert (await reload(db_session, session.id)).review_answers == 0
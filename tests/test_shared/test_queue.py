@@ -0,0 +1,21 @@
+from app.shared.queue import materialize_queue, queue_positions
+
+
+def test_permutation_is_pinned():
+    # stored shuffle seeds must keep producing the same queues
+    assert queue_positions(42, 10) == [0, 9, 5, 8, 6, 4, 7, 2, 1, 3]
+    assert queue_positions(2**62 + 12345, 12) == [7, 1, 6, 0, 2, 11, 8, 9, 10, 3, 4, 5]
+
+
+def test_queue_positions_pages_the_permutation():
+    positions = queue_positions(7, 100)
+    assert sorted(positions) == list(range(100))
+    assert queue_positions(7, 100, 20, 30) == positions[20:50]
+    assert queue_positions(7, 100, 90, 30) == positions[90:]
+    assert queue_positions(7, 100, 100, 5) == []
+
+
+def test_unshuffled_queue_keeps_the_snapshot_order():
+    assert queue_positions(None, 5, 1, 2) == [1, 2]
+    assert materialize_queue(["a", "b", "c"], None) == ["a", "b", "c"]
+    assert sorted(materialize_queue(["a", "b", "c"], 3)) == ["a", "b", "c"]
@@ -0,0 +1,130 @@
+from types import SimpleNamespace
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.utils.cache import (
+    get_generation_key,
+    is_next_generation,
+    remove_item,
+    upsert_item,
+)
+
+pytestmark = pytest.mark.anyio
+
+NUMBERS = TypeAdapter(list[int])
+
+
+async def test_bump_moves_the_entries_to_the_next_generation(cache, redis):
+    key = await cache.key("u1", "roadmaps", "list")
+    other_key = await cache.key("u2", "roadmaps", "list")
+    await cache.set(key, [1, 2], 60, NUMBERS)
+    assert await cache.get(key, NUMBERS) == [1, 2]
+
+    await cache.bump(["u1"], "roadmaps")
+
+    new_key = await cache.key("u1", "roadmaps", "list")
+    assert is_next_generation(key, new_key)
+    assert await cache.get(new_key, NUMBERS) is None
+    assert await cache.key("u2", "roadmaps", "list") == other_key
+    assert await redis.ttl(get_generation_key("u1", "roadmaps")) > 0
+
+
+async def test_a_bumped_tag_moves_the_entry(cache):
+    key = await cache.key("u1", "cards", "list", tags=("blocks",))
+    untagged_key = await cache.key("u1", "cards", "list")
+
+    await cache.bump(["u1"], "blocks")
+
+    assert await cache.key("u1", "cards", "list", tags=("blocks",)) != key
+    assert await cache.key("u1", "cards", "list") == untagged_key
+
+
+def failing_fill(error: str):
+    calls = []
+
+    async def fill():
+        calls.append(error)
+        raise ValueError(error)
+
+    return fill, calls
+
+
+async def test_not_found_is_kept_as_a_negative_entry(cache, redis):
+    key = await cache.key("u1", "roadmaps", "detail")
+    fill, calls = failing_fill("NOT_FOUND")
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="NOT_FOUND"):
+            await cache.get_or_fill(key, fill, 600, NUMBERS)
+        cache.invalidate_local([key])
+
+    assert calls == ["NOT_FOUND"]
+    assert 0 < await redis.ttl(key) <= cache.cfg.negative_ttl
+    with pytest.raises(ValueError, match="NOT_FOUND"):
+        await cache.get(key, NUMBERS)
+
+    await cache.bump(["u1"], "roadmaps")
+    key = await cache.key("u1", "roadmaps", "detail")
+    with pytest.raises(ValueError, match="NOT_FOUND"):
+        await cache.get_or_fill(key, fill, 600, NUMBERS)
+    assert len(calls) == 2
+
+
+async def test_other_errors_are_not_cached(cache, redis):
+    key = await cache.key("u1", "roadmaps", "detail")
+    fill, calls = failing_fill("OPERATION_FAILED")
+
+    for _ in range(2):
+        with pytest.raises(ValueError, match="OPERATION_FAILED"):
+            await cache.get_or_fill(key, fill, 600, NUMBERS)
+
+    assert len(calls) == 2
+    assert await redis.exists(key) == 0
+
+
+async def test_empty_results_are_kept_briefly(cache, redis):
+    key = await cache.key("u1", "roadmaps", "list")
+
+    async def fill():
+        return []
+
+    assert await cache.get_or_fill(key, fill, 600, NUMBERS, stale_ttl=600) == []
+    # no stale window either
+    assert 0 < await redis.ttl(key) <= cache.cfg.negative_ttl
+
+
+def test_next_generation_keys():
+    assert is_next_generation("c:v1:cards:u1:g3:list:d", "c:v1:cards:u1:g4:list:d")
+    assert is_next_generation("c:v1:cards:u1:g3.2:list", "c:v1:cards:u1:g4.2:list")
+    assert not is_next_generation("c:v1:cards:u1:g3:list", "c:v1:cards:u1:g5:list")
+    # a bumped tag is another write
+    assert not is_next_generation("c:v1:cards:u1:g3.2:list", "c:v1:cards:u1:g4.3:list")
+    assert not is_next_generation("c:v1:cards:u1:g3:list", "c:v1:cards:u2:g4:list")
+
+
+def test_list_patches():
+    first, second = SimpleNamespace(id=1, term="a"), SimpleNamespace(id=2, term="b")
+    edited = SimpleNamespace(id=1, term="c")
+
+    assert upsert_item(edited)([first, second]) == [edited, second]
+    assert upsert_item(second)([first]) == [first, second]
+    assert remove_item(1)([first, second]) == [second]
+
+
+async def test_put_and_patch_only_the_next_generation(cache):
+    key = await cache.key("u1", "roadmaps", "list")
+    await cache.set(key, [1], 60, NUMBERS)
+    await cache.bump(["u1"], "roadmaps")
+    next_key = await cache.key("u1", "roadmaps", "list")
+
+    assert await cache.patch_next(key, next_key, lambda items: items + [2], 60, NUMBERS)
+    assert await cache.get(next_key, NUMBERS) == [1, 2]
+    # not twice: the next entry is already there
+    assert not await cache.patch_next(key, next_key, lambda items: [3], 60, NUMBERS)
+
+    await cache.bump(["u1"], "roadmaps")
+    await cache.bump(["u1"], "roadmaps")
+    last_key = await cache.key("u1", "roadmaps", "list")
+    assert not await cache.put_next(next_key, last_key, [4], 60, NUMBERS)
+    assert await cache.get(last_key, NUMBERS) is None
@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from pydantic import TypeAdapter
+from redis.exceptions import ConnectionError
+
+from app.core.config import settings
+from app.utils.cache import CacheUnavailable, CircuitBreaker
+
+pytestmark = pytest.mark.anyio
+
+NUMBERS = TypeAdapter(list[int])
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(threshold=2, cooldown=10.0)
+
+    breaker.failure()
+    breaker.success()
+    breaker.failure()
+    assert breaker.allow()
+    breaker.failure()
+
+    assert breaker.open
+    assert not breaker.allow()
+
+
+def test_breaker_probes_once_after_the_cooldown():
+    breaker = CircuitBreaker(threshold=1, cooldown=10.0)
+    breaker.failure()
+    breaker.opened_at -= 10.0
+
+    assert breaker.allow()
+    # the others bypass while the probe is out
+    assert not breaker.allow()
+
+    breaker.failure()
+    assert not breaker.allow()
+    breaker.opened_at -= 10.0
+    assert breaker.allow()
+    breaker.success()
+    assert not breaker.open
+    assert breaker.allow()
+
+
+async def test_failing_redis_opens_the_circuit(cache, redis, monkeypatch):
+    key = await cache.key("u1", "roadmaps", "list")
+    calls = []
+
+    async def get(*args, **kwargs):
+        calls.append(args)
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(redis, "get", get)
+
+    for _ in range(3):
+        with pytest.raises(CacheUnavailable):
+            await cache._command("get", redis.get, key)
+    assert cache.breaker.open
+    with pytest.raises(CacheUnavailable, match="circuit open"):
+        await cache._command("get", redis.get, key)
+
+    assert len(calls) == 3
+    assert cache.metrics.redis_errors["get", "error"] == 3
+    assert cache.metrics.redis_errors["get", "open"] == 1
+
+
+async def test_slow_redis_times_out(cache, redis, monkeypatch):
+    monkeypatch.setattr(settings.cache, "command_timeout", 0.01)
+
+    async def get(*args, **kwargs):
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr(redis, "get", get)
+
+    with pytest.raises(CacheUnavailable):
+        await cache._command("get", redis.get, "key")
+    assert cache.breaker.failures == 1
+    assert cache.metrics.redis_errors["get", "timeout"] == 1
+
+
+async def test_fills_bypass_an_open_circuit(cache, redis):
+    key = await cache.key("u1", "roadmaps", "list")
+    cache.breaker.opened_at = float("inf")
+    calls = []
+
+    async def fill():
+        calls.append(1)
+        return [1]
+
+    assert await cache.get_or_fill(key, fill, 60, NUMBERS) == [1]
+    assert calls == [1]
+    assert await redis.exists(key) == 0
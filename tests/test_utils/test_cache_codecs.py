@@ -0,0 +1,88 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from pydantic import BaseModel, TypeAdapter
+
+from app.schemas.roadmap import RoadmapRead
+from app.utils.cache import codecs
+from app.utils.cache.codecs import (
+    decode_entry,
+    encode_entry,
+    encode_miss,
+    entry_delta_ms,
+    entry_error,
+    entry_json,
+    entry_matches,
+    entry_stale_at_ms,
+)
+
+ROADMAPS = TypeAdapter(list[RoadmapRead])
+
+
+def make_roadmaps(count: int) -> list[RoadmapRead]:
+    now = datetime.now(timezone.utc)
+    return [
+        RoadmapRead(
+            id=uuid.uuid4(),
+            user_id=uuid.uuid4(),
+            title=f"roadmap {index}",
+            description="description " * 20,
+            status="active",
+            created_at=now,
+            updated_at=now,
+        )
+        for index in range(count)
+    ]
+
+
+def test_entries_round_trip_with_their_timings():
+    roadmaps = make_roadmaps(2)
+
+    raw = encode_entry(roadmaps, ROADMAPS, delta_ms=12, stale_at_ms=345)
+
+    assert decode_entry(raw, ROADMAPS) == roadmaps
+    assert (entry_delta_ms(raw), entry_stale_at_ms(raw)) == (12, 345)
+    assert entry_json(raw, ROADMAPS) == ROADMAPS.dump_json(roadmaps)
+    assert entry_error(raw) is None
+
+
+def test_entries_of_another_schema_do_not_match():
+    class Other(BaseModel):
+        id: int
+
+    raw = encode_entry([], ROADMAPS)
+
+    assert entry_matches(raw, ROADMAPS)
+    assert not entry_matches(raw, TypeAdapter(list[Other]))
+
+
+def test_negative_entries_carry_the_error():
+    raw = encode_miss("NOT_FOUND", ROADMAPS)
+
+    assert entry_matches(raw, ROADMAPS)
+    assert entry_error(raw) == "NOT_FOUND"
+
+
+def test_msgpack_entries_stay_readable_after_a_codec_switch(monkeypatch):
+    pytest.importorskip("msgpack")
+    roadmaps = make_roadmaps(1)
+    monkeypatch.setattr(codecs.settings.cache, "codec", "msgpack")
+    raw = encode_entry(roadmaps, ROADMAPS)
+    monkeypatch.setattr(codecs.settings.cache, "codec", "json")
+
+    assert raw[:1] == b"m"
+    assert decode_entry(raw, ROADMAPS) == roadmaps
+    assert entry_json(raw, ROADMAPS) == ROADMAPS.dump_json(roadmaps)
+
+
+def test_large_entries_are_compressed(monkeypatch):
+    pytest.importorskip("zstandard")
+    roadmaps = make_roadmaps(50)
+    monkeypatch.setattr(codecs.settings.cache, "compression_threshold", 1024)
+
+    raw = encode_entry(roadmaps, ROADMAPS)
+
+    assert raw[1:2] == b"z"
+    assert len(raw) < len(ROADMAPS.dump_json(roadmaps))
+    assert decode_entry(raw, ROADMAPS) == roadmaps
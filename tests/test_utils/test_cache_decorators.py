@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+import pytest
+
+from app.models import Card
+from app.repositories import CardRepository
+from app.schemas.card import CardFilters
+from app.services import CardService
+from app.utils.cache import client, local_cache
+from app.utils.cache.codecs import decode_entry, encode_entry
+
+pytestmark = pytest.mark.anyio
+
+
+class ClosedSession:
+    # the DB session of a request that has already ended
+    def __getattr__(self, name):
+        raise AssertionError("the request's DB session was used")
+
+
+async def test_concurrent_misses_share_one_fill_on_its_own_session(
+    db_session, redis, make_user, make_cards, monkeypatch
+):
+    user = await make_user()
+    (card,) = await make_cards(user, 1)
+    loads = []
+    get_by_id = CardRepository.get_by_id
+
+    async def load(self, card_id):
+        loads.append(card_id)
+        await asyncio.sleep(0.05)
+        return await get_by_id(self, card_id)
+
+    monkeypatch.setattr(CardRepository, "get_by_id", load)
+    services = [CardService(CardRepository(ClosedSession()), redis) for _ in range(3)]
+
+    cards = await asyncio.gather(
+        *(service.get_by_id(user, card.id) for service in services)
+    )
+
+    assert [read.id for read in cards] == [card.id] * 3
+    assert loads == [card.id]
+    # now served from the cache
+    assert (await services[0].get_by_id(user, card.id)).id == card.id
+    assert loads == [card.id]
+
+
+async def test_stale_lists_are_refreshed_on_their_own_session(
+    db_session, redis, make_user, make_cards
+):
+    user = await make_user()
+    (card,) = await make_cards(user, 1)
+    filters = CardFilters(block_id=card.block_id)
+    service = CardService(CardRepository(db_session), redis)
+    await service.get_by_filters(user, filters)
+
+    # age the entry past its ttl, into the stale window
+    key = await service._get_by_filters.key(user, filters)
+    adapter = CardService._get_by_filters.adapter
+    stale_at_ms = int(time.time() * 1000) - 1000
+    raw = await redis.get(key)
+    await redis.set(
+        key, encode_entry(decode_entry(raw, adapter), adapter, stale_at_ms=stale_at_ms)
+    )
+    local_cache.clear()
+    db_session.add(
+        Card(user_id=user.id, block_id=card.block_id, term="new", definition="new")
+    )
+    await db_session.commit()
+
+    closed = CardService(CardRepository(ClosedSession()), redis)
+    assert [read.id for read in await closed.get_by_filters(user, filters)] == [card.id]
+    await asyncio.gather(*client._refreshes.values())
+
+    local_cache.clear()
+    refreshed = await closed.get_by_filters(user, filters)
+    assert len(refreshed) == 2
@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.utils.cache import client
+from app.utils.cache.codecs import encode_entry
+
+pytestmark = pytest.mark.anyio
+
+NUMBERS = TypeAdapter(list[int])
+
+
+def counting_fill(value, delay: float = 0.02):
+    calls = []
+
+    async def fill():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return value
+
+    return fill, calls
+
+
+async def test_concurrent_misses_fill_once(cache, redis):
+    key = await cache.key("u1", "roadmaps", "list")
+    fill, calls = counting_fill([1, 2])
+
+    values = await asyncio.gather(
+        *(cache.get_or_fill(key, fill, 60, NUMBERS) for _ in range(5))
+    )
+
+    assert values == [[1, 2]] * 5
+    assert len(calls) == 1
+    assert not await redis.exists(f"{key}:lock")
+    assert await cache.get_or_fill(key, fill, 60, NUMBERS) == [1, 2]
+    assert len(calls) == 1
+
+
+async def test_a_miss_waits_for_the_fill_of_another_worker(cache, redis):
+    key = await cache.key("u1", "roadmaps", "list")
+    await redis.set(f"{key}:lock", "other-worker")
+    fill, calls = counting_fill([3])
+
+    async def other_worker_fills():
+        await asyncio.sleep(0.1)
+        await redis.set(key, encode_entry([1, 2], NUMBERS))
+
+    filled = asyncio.create_task(other_worker_fills())
+    assert await cache.get_or_fill(key, fill, 60, NUMBERS) == [1, 2]
+    await filled
+    assert calls == []
+
+
+async def test_the_wait_for_another_worker_is_bounded(cache, redis, monkeypatch):
+    monkeypatch.setattr(cache.cfg, "fill_wait_timeout", 0.1)
+    key = await cache.key("u1", "roadmaps", "list")
+    await redis.set(f"{key}:lock", "stuck-worker")
+    fill, calls = counting_fill([3], delay=0)
+
+    assert await cache.get_or_fill(key, fill, 60, NUMBERS) == [3]
+    assert len(calls) == 1
+
+
+async def test_xfetch_recomputes_entries_early(cache, redis, monkeypatch):
+    monkeypatch.setattr(cache.cfg, "xfetch_enabled", True)
+    monkeypatch.setattr(client.random, "random", lambda: 0.5)
+    key = await cache.key("u1", "roadmaps", "list")
+    # a slow fill (10s) one second before expiry
+    await redis.set(key, encode_entry([1], NUMBERS, delta_ms=10_000), ex=1)
+    fill, calls = counting_fill([2], delay=0)
+
+    assert await cache.get_or_fill(key, fill, 60, NUMBERS) == [2]
+    assert len(calls) == 1
+
+
+def stale_entry(value) -> bytes:
+    return encode_entry(value, NUMBERS, stale_at_ms=int(time.time() * 1000) - 1000)
+
+
+async def test_stale_entries_are_served_and_refreshed_once(cache, redis):
+    key = await cache.key("u1", "roadmaps", "list")
+    await redis.set(key, stale_entry([1]), ex=60)
+    fill, calls = counting_fill([2])
+
+    values = await asyncio.gather(
+        *(cache.get_or_fill(key, fill, 60, NUMBERS, stale_ttl=60) for _ in range(3))
+    )
+    assert values == [[1]] * 3
+    await asyncio.gather(*client._refreshes.values())
+
+    assert len(calls) == 1
+    assert await cache.get_or_fill(key, fill, 60, NUMBERS, stale_ttl=60) == [2]
+    assert 60 < await redis.ttl(key) <= 120
+
+
+async def test_a_failed_refresh_keeps_the_stale_entry(cache, redis):
+    key = await cache.key("u1", "roadmaps", "list")
+    await redis.set(key, stale_entry([1]), ex=60)
+
+    async def fill():
+        raise ValueError("OPERATION_FAILED")
+
+    assert await cache.get_or_fill(key, fill, 60, NUMBERS, stale_ttl=60) == [1]
+    await asyncio.gather(*client._refreshes.values())
+
+    cache.invalidate_local([key])
+    assert await cache.get(key, NUMBERS) == [1]
+    assert not await redis.exists(f"{key}:lock")
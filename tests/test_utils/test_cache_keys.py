@@ -0,0 +1,106 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.schemas.session import SessionMode
+from app.utils.cache import cached
+from app.utils.cache.keys import get_args_digest
+
+pytestmark = pytest.mark.anyio
+
+
+def _has_filters(current_user, filters, **_) -> bool:
+    return bool(filters)
+
+
+class ItemRepository:
+    def __init__(self, session):
+        self.session = session
+
+
+class ItemService:
+    def __init__(self, cache):
+        self.cache = cache
+        self.repo = ItemRepository(None)
+        self.loads = []
+
+    @cached("items", "list", ttl=60, when=_has_filters)
+    async def get_by_filters(
+        self,
+        current_user,
+        filters: dict,
+        limit: int = 10,
+    ) -> list[int]:
+        self.loads.append((current_user.id, filters, limit))
+        return list(range(limit))
+
+    @cached("items", "all", ttl=60, user=None, adapter=TypeAdapter(list[str]))
+    async def get_names(self) -> list[str]:
+        self.loads.append("names")
+        return ["a", "b"]
+
+
+def make_user():
+    return SimpleNamespace(id=uuid.uuid4())
+
+
+def test_args_digest_is_canonical():
+    assert get_args_digest({"a": 1, "b": {2, 1}}) == get_args_digest(
+        {"b": {1, 2}, "a": 1}
+    )
+    assert get_args_digest(SessionMode.EXAM) == get_args_digest("exam")
+    assert get_args_digest({"a": 1}) != get_args_digest({"a": 2})
+    assert len(get_args_digest("x")) == 32
+
+
+async def test_cached_method_hits_per_user_and_arguments(cache):
+    service = ItemService(cache)
+    user, other = make_user(), make_user()
+
+    assert await service.get_by_filters(user, {"a": 1}) == list(range(10))
+    # defaults are bound, so the same call spelled out shares the entry
+    assert await service.get_by_filters(user, {"a": 1}, limit=10) == list(range(10))
+    assert len(service.loads) == 1
+
+    await service.get_by_filters(user, {"a": 1}, limit=2)
+    await service.get_by_filters(other, {"a": 1})
+    assert len(service.loads) == 3
+
+    key = await service.get_by_filters.key(user, {"a": 1})
+    assert f":items:{user.id}:g0:list:" in key
+
+
+async def test_cached_method_bypassed_by_when(cache):
+    service = ItemService(cache)
+    user = make_user()
+
+    await service.get_by_filters(user, {})
+    await service.get_by_filters(user, {})
+
+    assert len(service.loads) == 2
+
+
+async def test_cached_method_shared_between_users_and_bumped(cache):
+    service = ItemService(cache)
+
+    assert await service.get_names() == ["a", "b"]
+    assert await service.get_names() == ["a", "b"]
+    assert service.loads == ["names"]
+    assert await service.get_names.json() == b'["a","b"]'
+
+    await cache.bump(["all"], "items")
+    await service.get_names()
+    assert service.loads == ["names", "names"]
+
+
+def test_adapter_comes_from_the_return_annotation():
+    assert ItemService.get_by_filters.adapter.validate_python(["1"]) == [1]
+
+    @cached("items")
+    async def unannotated(self):
+        return []
+
+    with pytest.raises(TypeError, match="return annotation"):
+        unannotated.adapter
@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.utils.cache import (
+    Cache,
+    LocalCache,
+    get_generation_key,
+    get_invalidation_channel,
+    local_cache,
+)
+from app.workers.cache_invalidation import run_cache_invalidation_listener
+
+pytestmark = pytest.mark.anyio
+
+NUMBERS = TypeAdapter(list[int])
+
+
+def test_local_cache_evicts_the_least_recently_used_bytes():
+    local = LocalCache(max_bytes=10, ttl=5.0)
+    local.set("a", b"aaaa")
+    local.set("b", b"bbbb")
+    local.get("a")
+    local.set("c", b"cccc")
+
+    assert (local.get("a"), local.get("b"), local.get("c")) == (b"aaaa", None, b"cccc")
+    assert local.size == 8
+    local.set("big", b"x" * 11)
+    assert local.get("big") is None
+
+
+def test_local_cache_entries_expire(monkeypatch):
+    local = LocalCache(max_bytes=100, ttl=5.0)
+    local.set("short", b"1", ttl=1)
+    local.set("long", b"2", ttl=60)
+    now = time.monotonic()
+
+    monkeypatch.setattr(time, "monotonic", lambda: now + 2)
+    assert local.get("short") is None
+    assert local.get("long") == b"2"
+
+    # capped at the tier's own ttl
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+    assert local.get("long") is None
+
+
+async def test_reads_are_served_from_the_local_tier(cache, redis):
+    key = await cache.key("u1", "roadmaps", "list")
+    await cache.set(key, [1], 60, NUMBERS)
+    await redis.delete(key)
+
+    assert await cache.get(key, NUMBERS) == [1]
+    assert cache.metrics.hits["roadmaps", "local"] == 1
+
+
+@pytest.mark.skipif(local_cache is None, reason="the local tier is disabled")
+async def test_invalidations_reach_the_local_tier_of_other_workers(redis):
+    listener = asyncio.create_task(run_cache_invalidation_listener(redis))
+    try:
+        channel = get_invalidation_channel()
+        while not (await redis.pubsub_numsub(channel))[0][1]:
+            await asyncio.sleep(0.01)
+        local_cache.set("cache:v2:roadmaps:u1:g0:list", b"entry")
+
+        # another worker, without a local tier of its own
+        await Cache(redis, local=None).delete("cache:v2:roadmaps:u1:g0:list")
+
+        for _ in range(100):
+            if local_cache.get("cache:v2:roadmaps:u1:g0:list") is None:
+                break
+            await asyncio.sleep(0.01)
+        assert local_cache.get("cache:v2:roadmaps:u1:g0:list") is None
+    finally:
+        listener.cancel()
+
+
+async def test_a_generation_read_racing_a_bump_is_not_kept(cache, redis, monkeypatch):
+    generation_key = get_generation_key("u1", "roadmaps")
+    get = redis.get
+
+    async def get_then_bump(key):
+        generation = await get(key)
+        if key == generation_key:
+            # this process's own write lands before the read returns
+            monkeypatch.setattr(redis, "get", get)
+            await cache.bump(["u1"], "roadmaps")
+        return generation
+
+    monkeypatch.setattr(redis, "get", get_then_bump)
+
+    assert await cache.generation("u1", "roadmaps") == 0
+    assert await cache.generation("u1", "roadmaps") == 1
+
+
+async def test_generations_are_kept_in_the_local_tier(cache, redis):
+    await cache.generation("u1", "roadmaps")
+    await redis.incr(get_generation_key("u1", "roadmaps"))
+
+    # until a bump or an invalidation message reaches this process
+    assert await cache.generation("u1", "roadmaps") == 0
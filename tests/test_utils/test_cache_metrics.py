@@ -0,0 +1,61 @@
+import pytest
+from pydantic import TypeAdapter
+
+from app.core.authentication.fastapi_users import current_active_superuser
+from app.utils.cache import CacheMetrics
+
+pytestmark = pytest.mark.anyio
+
+NUMBERS = TypeAdapter(list[int])
+
+
+async def test_cache_counts_hits_misses_and_latency(cache):
+    key = await cache.key("u1", "roadmaps", "list")
+
+    async def fill():
+        return [1, 2]
+
+    await cache.get_or_fill(key, fill, 60, NUMBERS)
+    cache.invalidate_local([key])
+    await cache.get_or_fill(key, fill, 60, NUMBERS)
+    await cache.get_or_fill(key, fill, 60, NUMBERS)
+
+    metrics = cache.metrics
+    assert metrics.misses["roadmaps"] == 1
+    assert metrics.sets["roadmaps"] == 1
+    assert metrics.hits["roadmaps", "redis"] == 1
+    assert metrics.hits["roadmaps", "local"] == 1
+    assert metrics.bytes_read["roadmaps"] == 2 * metrics.bytes_written["roadmaps"]
+    assert metrics.latency["get"].count >= 1
+
+
+def test_render_uses_the_prometheus_text_format():
+    metrics = CacheMetrics()
+    metrics.hit("cards", "local", 10)
+    metrics.miss("cards")
+    metrics.redis_error("get", "timeout")
+    metrics.register_gauge("cache_queue_depth", "Queued writes.", lambda: 3)
+    with metrics.timed("get"):
+        pass
+
+    text = metrics.render()
+
+    assert 'cache_hits_total{namespace="cards",tier="local"} 1' in text
+    assert 'cache_misses_total{namespace="cards"} 1' in text
+    assert 'cache_redis_errors_total{command="get",reason="timeout"} 1' in text
+    assert "# TYPE cache_queue_depth gauge\ncache_queue_depth 3" in text
+    assert 'cache_redis_command_seconds_bucket{command="get",le="+Inf"} 1' in text
+    assert 'cache_redis_command_seconds_count{command="get"} 1' in text
+
+
+async def test_metrics_endpoint(client):
+    client_user = client.user
+    from main import app
+
+    app.dependency_overrides[current_active_superuser] = lambda: client_user
+
+    response = await client.get("/api/v1/metrics/cache")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE cache_hits_total counter" in response.text
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.utils.cache import CacheWriter
+
+pytestmark = pytest.mark.anyio
+
+NUMBERS = TypeAdapter(list[int])
+
+
+def recording_write(writes: list, name: str, fail: bool = False):
+    async def write():
+        writes.append(name)
+        if fail:
+            raise RuntimeError(name)
+
+    return write
+
+
+async def test_writer_runs_the_queued_writes_in_the_background():
+    writer = CacheWriter(max_size=10, concurrency=2)
+    writes = []
+    task = asyncio.create_task(writer.run())
+    await asyncio.sleep(0)
+    assert writer.running
+
+    assert writer.submit(recording_write(writes, "a", fail=True))
+    assert writer.submit(recording_write(writes, "b"))
+    await asyncio.wait_for(writer.queue.join(), 1)
+
+    # a failed write does not stop the consumers
+    assert writes == ["a", "b"]
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert not writer.running
+
+
+async def test_full_writer_rejects_and_drains_the_rest():
+    writer = CacheWriter(max_size=2, concurrency=1)
+    writes = []
+
+    assert writer.submit(recording_write(writes, "a"))
+    assert writer.submit(recording_write(writes, "b"))
+    assert not writer.submit(recording_write(writes, "c"))
+    assert writer.depth == 2
+
+    await writer.drain()
+    assert writes == ["a", "b"]
+    assert writer.depth == 0
+
+
+async def test_fills_hand_the_redis_write_to_the_writer(cache, redis):
+    cache.writer = CacheWriter(max_size=1, concurrency=1)
+    cache.writer.running = True
+    key = await cache.key("u1", "roadmaps", "list")
+    other_key = await cache.key("u1", "roadmaps", "detail")
+
+    async def fill():
+        return [1]
+
+    assert await cache.get_or_fill(key, fill, 60, NUMBERS) == [1]
+    # answered from the local tier, the lock held until the write runs
+    assert await redis.exists(key) == 0
+    assert await redis.exists(f"{key}:lock") == 1
+    assert await cache.get(key, NUMBERS) == [1]
+
+    # the queue is full: dropped, and the lock released at once
+    assert await cache.get_or_fill(other_key, fill, 60, NUMBERS) == [1]
+    assert cache.metrics.dropped_writes["roadmaps"] == 1
+    assert await redis.exists(f"{other_key}:lock") == 0
+
+    await cache.writer.drain()
+    assert await redis.exists(key) == 1
+    assert await redis.exists(f"{key}:lock") == 0
+    assert await redis.exists(other_key) == 0
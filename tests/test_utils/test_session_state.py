@@ -0,0 +1,97 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.schemas.session import SessionMode, SessionRead, SessionStatus
+from app.utils.session_state import SessionStateStore
+
+pytestmark = pytest.mark.anyio
+
+
+def make_session_read(**fields) -> SessionRead:
+    return SessionRead(
+        **{
+            "id": uuid.uuid4(),
+            "user_id": uuid.uuid4(),
+            "roadmap_id": uuid.uuid4(),
+            "mode": SessionMode.EXAM,
+            "status": SessionStatus.ACTIVE,
+            "total_cards": 3,
+            "current_card_index": 0,
+            "correct_answers": 0,
+            "incorrect_answers": 0,
+            "review_answers": 0,
+            "created_at": datetime.now(timezone.utc),
+            "updated_at": datetime.now(timezone.utc),
+            **fields,
+        }
+    )
+
+
+@pytest.fixture
+async def seeded(redis):
+    store = SessionStateStore(redis)
+    session = make_session_read()
+    await store.seed(session, [uuid.uuid4() for _ in range(3)])
+    return store, session
+
+
+async def test_take_returns_progress_and_leaves_a_tombstone(seeded, redis):
+    store, session = seeded
+    await store.advance(session.id, session.user_id)
+    await store.apply(session.id, session.user_id, {"correct_answers": 1})
+
+    progress = await store.take(session.id, session.user_id)
+
+    assert progress == {
+        "current_card_index": 1,
+        "correct_answers": 1,
+        "incorrect_answers": 0,
+        "review_answers": 0,
+    }
+    assert not await redis.sismember(store.dirty_key, str(session.id))
+    assert not await redis.exists(store._key(session.id, "queue"))
+    # the flusher skips the tombstone, answers and card flips are rejected
+    assert await store.get_progress(session.id) is None
+    with pytest.raises(ValueError, match="SESSION_NOT_ACTIVE"):
+        await store.apply(session.id, session.user_id, {"correct_answers": 1})
+    with pytest.raises(ValueError):
+        await store.advance(session.id, session.user_id)
+    with pytest.raises(ValueError, match="SESSION_NOT_ACTIVE"):
+        await store.take(session.id, session.user_id)
+    assert not await store.restore(session, [])
+
+
+async def test_take_checks_the_owner(seeded):
+    store, session = seeded
+    with pytest.raises(PermissionError):
+        await store.take(session.id, uuid.uuid4())
+    assert await store.get_progress(session.id) is not None
+
+
+async def test_take_without_state(redis):
+    store = SessionStateStore(redis)
+    assert await store.take(uuid.uuid4(), None) is None
+
+
+async def test_drop_clears_the_tombstone(seeded):
+    store, session = seeded
+    await store.take(session.id, None)
+    await store.drop(session.id)
+    assert await store.restore(session, [])
+
+
+async def test_apply_reports_the_cursor_move_it_made(seeded):
+    store, session = seeded
+
+    owner_id, progress, applied = await store.apply(
+        session.id,
+        session.user_id,
+        {"correct_answers": 4, "current_card_index": 4},
+    )
+
+    assert owner_id == session.user_id
+    assert (progress["current_card_index"], progress["correct_answers"]) == (3, 4)
+    # stopped at the end of the queue
+    assert applied == {"correct_answers": 4, "current_card_index": 3}
@@ -0,0 +1,101 @@
+import uuid
+
+import pytest
+
+import main
+from app.repositories import AnswerEventRepository
+from app.workers.answer_events import AnswerEventBuffer
+
+pytestmark = pytest.mark.anyio
+
+
+def make_events(count: int, user_id=None) -> list[dict]:
+    user_id = user_id or uuid.uuid4()
+    return [
+        {
+            "id": uuid.uuid4(),
+            "session_id": uuid.uuid4(),
+            "card_id": uuid.uuid4(),
+            "user_id": user_id,
+            "outcome": "correct",
+            "latency_ms": index,
+        }
+        for index in range(count)
+    ]
+
+
+async def test_flush_writes_batches(db_session, make_user):
+    user = await make_user()
+    buffer = AnswerEventBuffer(flush_interval_ms=10, flush_batch_size=2, max_size=10)
+    buffer.add(make_events(3, user.id))
+
+    assert await buffer.flush() == 2
+    assert await buffer.flush() == 1
+    assert await buffer.flush() == 0
+
+    events = await AnswerEventRepository(db_session).get_all()
+    assert sorted(event.latency_ms for event in events) == [0, 1, 2]
+
+
+async def test_failed_flush_requeues_in_order(monkeypatch):
+    buffer = AnswerEventBuffer(flush_interval_ms=10, flush_batch_size=3, max_size=10)
+    events = make_events(4)
+    buffer.add(events)
+
+    async def fail(self, events_data):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(AnswerEventRepository, "create_many", fail)
+    with pytest.raises(RuntimeError):
+        await buffer.flush()
+
+    assert list(buffer.events) == events
+    assert buffer.dropped == 0
+
+
+async def test_failed_flush_does_not_evict_newer_events(monkeypatch):
+    buffer = AnswerEventBuffer(flush_interval_ms=10, flush_batch_size=3, max_size=4)
+    failed, newer = make_events(3), make_events(3)
+    buffer.add(failed)
+
+    async def add_then_fail(self, events_data):
+        # the buffer fills up while the insert is in flight
+        buffer.add(newer)
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(AnswerEventRepository, "create_many", add_then_fail)
+    with pytest.raises(RuntimeError):
+        await buffer.flush()
+
+    assert list(buffer.events) == failed[2:] + newer
+    assert buffer.dropped == 2
+
+
+async def test_shutdown_drains_past_a_failing_step(redis, monkeypatch):
+    monkeypatch.setattr(main.BlockingConnectionPool, "from_url", lambda *a, **kw: None)
+    monkeypatch.setattr(main, "Redis", lambda connection_pool: redis)
+    monkeypatch.setattr(main.settings.session_sweeper, "enabled", False)
+
+    async def fail():
+        raise RuntimeError("database is down")
+
+    flushed = []
+
+    async def flush_session_states(redis):
+        flushed.append(redis)
+        return 0
+
+    closed = []
+
+    async def close(close_connection_pool=None):
+        closed.append(close_connection_pool)
+
+    monkeypatch.setattr(main.answer_events, "flush", fail)
+    monkeypatch.setattr(main, "flush_session_states", flush_session_states)
+    monkeypatch.setattr(redis, "close", close)
+
+    async with main.lifespan(main.app):
+        pass
+
+    assert flushed == [redis]
+    assert closed == [True]
@@ -0,0 +1,60 @@
+import pytest
+
+from app.models import Block
+from app.repositories import BlockRepository, CardRepository, RoadmapRepository
+from app.schemas.block import BlockFilters
+from app.schemas.card import CardFilters
+from app.schemas.roadmap import RoadmapFilters
+from app.services import BlockService, CardService, RoadmapService
+from app.utils.cache import Cache
+from app.workers.cache_warmup import warm_up_user_cache
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_warm_up_fills_the_list_reads(
+    db_session, redis, make_user, make_cards, monkeypatch
+):
+    user = await make_user()
+    cards = await make_cards(user, 2)
+    block = await db_session.get(Block, cards[0].block_id)
+
+    # the roadmap list, one block list and one card list
+    assert await warm_up_user_cache(redis, user) == 3
+
+    async def fail(self, filters):
+        raise AssertionError("the list was read from the DB")
+
+    for repo in (RoadmapRepository, BlockRepository, CardRepository):
+        monkeypatch.setattr(repo, "get_by_filters", fail)
+
+    roadmaps = await RoadmapService(
+        RoadmapRepository(db_session), redis
+    ).get_by_filters(user, RoadmapFilters())
+    assert [roadmap.id for roadmap in roadmaps] == [block.roadmap_id]
+    blocks = await BlockService(BlockRepository(db_session), redis).get_by_filters(
+        user, BlockFilters(roadmap_id=block.roadmap_id)
+    )
+    assert [read.id for read in blocks] == [block.id]
+    read_cards = await CardService(CardRepository(db_session), redis).get_by_filters(
+        user, CardFilters(block_id=block.id)
+    )
+    assert {card.id for card in read_cards} == {card.id for card in cards}
+
+
+async def test_warm_up_skips_lists_written_while_loading(
+    db_session, redis, make_user, make_cards, monkeypatch
+):
+    user = await make_user()
+    await make_cards(user, 1)
+    get_by_filters = CardRepository.get_by_filters
+
+    async def load_then_write(self, filters):
+        db_cards = await get_by_filters(self, filters)
+        await Cache(redis).bump([user.id], "cards")
+        return db_cards
+
+    monkeypatch.setattr(CardRepository, "get_by_filters", load_then_write)
+
+    assert await warm_up_user_cache(redis, user) == 0
+    assert await redis.keys("*:roadmaps:*") == []
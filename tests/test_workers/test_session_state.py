@@ -0,0 +1,68 @@
+import pytest
+from sqlalchemy import select
+
+from app.models import Session
+from app.repositories import SessionRepository
+from app.utils.session_state import SessionStateStore
+from app.workers.session_state import flush_session_states
+
+pytestmark = pytest.mark.anyio
+
+
+async def reload(db_session, session_id) -> Session:
+    result = await db_session.execute(
+        select(Session)
+        .where(Session.id == session_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
+async def test_flush_writes_dirty_progress(
+    db_session, redis, make_user, make_cards, make_session
+):
+    user = await make_user()
+    cards = await make_cards(user, 3)
+    session = await make_session(user, cards)
+    store = SessionStateStore(redis)
+    await store.apply(
+        session.id, user.id, {"current_card_index": 2, "correct_answers": 2}
+    )
+
+    assert await flush_session_states(redis) == 1
+    assert await flush_session_states(redis) == 0
+
+    row = await reload(db_session, session.id)
+    assert (row.current_card_index, row.correct_answers) == (2, 2)
+
+
+async def test_failed_flush_marks_the_sessions_dirty_again(
+    db_session, redis, make_user, make_cards, make_session, monkeypatch
+):
+    user = await make_user()
+    cards = await make_cards(user, 2)
+    session = await make_session(user, cards)
+    store = SessionStateStore(redis)
+    await store.apply(session.id, user.id, {"review_answers": 1})
+
+    async def fail(self, progress_rows):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(SessionRepository, "update_progress_many", fail)
+    with pytest.raises(RuntimeError):
+        await flush_session_states(redis)
+
+    assert await redis.smembers(store.dirty_key) == {str(session.id).encode()}
+
+
+async def test_reads_merge_the_live_progress(
+    session_service, make_user, make_cards, make_session
+):
+    user = await make_user()
+    cards = await make_cards(user, 2)
+    session = await make_session(user, cards)
+    await session_service.state.apply(session.id, user.id, {"incorrect_answers": 1})
+
+    live = await session_service.get_by_id(user, session.id)
+
+    assert live.incorrect_answers == 1
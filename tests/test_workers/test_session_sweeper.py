@@ -0,0 +1,106 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select, update
+
+from app.models import Session
+from app.repositories import SessionRepository
+from app.utils.session_state import SessionStateStore
+from app.workers.session_sweeper import sweep_stale_sessions
+
+pytestmark = pytest.mark.anyio
+
+
+async def make_stale(db_session, session_id) -> None:
+    await db_session.execute(
+        update(Session)
+        .where(Session.id == session_id)
+        .values(updated_at=datetime.now(timezone.utc) - timedelta(days=1))
+    )
+    await db_session.commit()
+
+
+async def reload(db_session, session_id) -> Session:
+    result = await db_session.execute(
+        select(Session)
+        .where(Session.id == session_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one()
+
+
+async def test_sweep_abandons_stale_sessions_only(
+    db_session, redis, make_user, make_cards, make_session
+):
+    user = await make_user()
+    cards = await make_cards(user, 2)
+    stale = await make_session(user, cards)
+    fresh = await make_session(user, cards)
+    await make_stale(db_session, stale.id)
+
+    assert await sweep_stale_sessions(redis) == [stale.id]
+
+    assert (await reload(db_session, stale.id)).status == "abandoned"
+    assert (await reload(db_session, fresh.id)).status == "active"
+    store = SessionStateStore(redis)
+    assert await store.get_progress(stale.id) is None
+    assert await store.get_progress(fresh.id) is not None
+
+
+async def test_sweep_keeps_answers_that_race_the_abandon(
+    db_session, redis, make_user, make_cards, make_session, monkeypatch
+):
+    user = await make_user()
+    cards = await make_cards(user, 3)
+    session = await make_session(user, cards)
+    await make_stale(db_session, session.id)
+    store = SessionStateStore(redis)
+    await store.apply(
+        session.id, user.id, {"correct_answers": 1, "current_card_index": 1}
+    )
+
+    abandon_stale_sessions = SessionRepository.abandon_stale_sessions
+
+    async def abandon_then_answer(self, *args):
+        abandoned_ids = await abandon_stale_sessions(self, *args)
+        # lands in the live state after the row is abandoned
+        await store.apply(
+            session.id, user.id, {"review_answers": 1, "current_card_index": 1}
+        )
+        return abandoned_ids
+
+    monkeypatch.setattr(
+        SessionRepository, "abandon_stale_sessions", abandon_then_answer
+    )
+
+    await sweep_stale_sessions(redis)
+
+    row = await reload(db_session, session.id)
+    assert row.status == "abandoned"
+    assert (row.current_card_index, row.correct_answers, row.review_answers) == (
+        2,
+        1,
+        1,
+    )
+    # tombstone dropped too
+    assert await store.apply(session.id, user.id, {"correct_answers": 1}) is None
+
+
+async def test_sweep_leaves_sessions_taken_by_finish(
+    db_session, redis, make_user, make_cards, make_session
+):
+    user = await make_user()
+    cards = await make_cards(user, 2)
+    session = await make_session(user, cards)
+    await make_stale(db_session, session.id)
+    store = SessionStateStore(redis)
+    await store.apply(session.id, user.id, {"correct_answers": 1})
+    assert await store.take(session.id, user.id) is not None
+
+    assert await sweep_stale_sessions(redis) == [session.id]
+
+    row = await reload(db_session, session.id)
+    assert (row.status, row.correct_answers) == ("abandoned", 0)
+    # the finish still holds its tombstone
+    with pytest.raises(ValueError, match="SESSION_NOT_ACTIVE"):
+        await store.apply(session.id, user.id, {"correct_answers": 1})